@@ -0,0 +1,130 @@
+"""
+Benchmark the classification schemes on a county-scale history.
+
+A synthetic panel of ~3,200 counties over 50 years of months (about two
+million values, with a 2020-like collapse) is classified with every scheme
+of `classification.py`, and the run reports the time and the goodness of
+variance fit (GVF, 1 for a perfect fit) of each. It checks that:
+
+- Jenks on the whole panel finishes within JENKS_BUDGET_SECONDS;
+- the breaks Jenks finds on the histogram fit nearly as well as Fisher's
+  exact algorithm on every distinct value of a sample of the panel;
+- quantile classes hold the same number of values and equal-interval
+  classes have the same width;
+- every value that is not NaN gets a color, including those below the
+  lowest fixed bin, which used to be drawn grey.
+
+The run exits with status 1 if any check fails. Run from the repository root:
+
+    python -m src.benchmarks.bench_classification
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from src.visualization.choropleth import color_scale, default_scale, missing_color
+from src.visualization.classification import SCHEMES, class_breaks, jenks_breaks
+
+# Longest time Jenks may take on the whole county panel
+JENKS_BUDGET_SECONDS = 3.0
+
+# Largest loss of GVF allowed for breaks found on the histogram
+GVF_TOLERANCE = 0.005
+
+
+def county_history(n_counties=3200, n_months=600, seed=0):
+    """
+    Annual percent changes of employment, months x counties, with a crash and rebound.
+    """
+    rng = np.random.default_rng(seed)
+    trend = rng.normal(1.2, 1.0, n_counties)
+    values = trend + rng.standard_t(4, (n_months, n_counties)) * 1.5
+    # Two months of collapse and the rebound a year later
+    values[-60:-58] -= rng.gamma(4, 3, (2, n_counties))
+    values[-48:-46] += rng.gamma(4, 2, (2, n_counties))
+    values[rng.random(values.shape) < 0.02] = np.nan
+    return np.round(values, 2)
+
+
+def gvf(values, breaks):
+    """
+    Goodness of variance fit of classes: 1 - within-class / total squared deviation.
+    """
+    values = np.sort(values[np.isfinite(values)])
+    classes = np.split(values, np.searchsorted(values, breaks[1:-1], side="right"))
+    within = sum(((c - c.mean()) ** 2).sum() for c in classes if len(c))
+    return 1 - within / ((values - values.mean()) ** 2).sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the classification schemes")
+    parser.add_argument("--counties", type=int, default=3200)
+    parser.add_argument("--months", type=int, default=600)
+    parser.add_argument("--classes", type=int, default=5)
+    args = parser.parse_args()
+
+    history = county_history(args.counties, args.months)
+    values = history[np.isfinite(history)]
+    k = args.classes
+    failures = []
+
+    print(f"{values.size / 1e6:.2f}M values, {k} classes")
+    print(f"{'scheme':<16}{'time':>8}{'GVF':>8}  breaks")
+    results = {}
+    for scheme in SCHEMES:
+        start = time.perf_counter()
+        breaks = class_breaks(history, scheme, k)
+        seconds = time.perf_counter() - start
+        results[scheme] = (breaks, seconds)
+        inner = " ".join(f"{b:.2f}" for b in breaks[1:-1])
+        print(f"{scheme:<16}{seconds:7.2f}s{gvf(values, breaks):8.4f}  {inner}")
+
+    if results["jenks"][1] > JENKS_BUDGET_SECONDS:
+        failures.append(
+            f"Jenks took {results['jenks'][1]:.2f}s > {JENKS_BUDGET_SECONDS}s"
+        )
+
+    # Exact Jenks on every distinct value of a sample against the histogram
+    sample = np.random.default_rng(1).choice(values, 20_000, replace=False)
+    exact = jenks_breaks(sample, k, max_bins=len(np.unique(sample)))
+    binned = jenks_breaks(sample, k, max_bins=256)
+    exact_gvf, binned_gvf = gvf(sample, exact), gvf(sample, binned)
+    print(f"sample GVF: exact {exact_gvf:.4f}, 256 histogram bins {binned_gvf:.4f}")
+    if binned_gvf < exact_gvf - GVF_TOLERANCE:
+        failures.append(f"histogram Jenks GVF {binned_gvf:.4f} < exact {exact_gvf:.4f}")
+
+    quantile = color_scale(history, "quantile", k)
+    counts = np.bincount(quantile.classify(values), minlength=k)
+    if counts.max() - counts.min() > 0.01 * values.size:
+        failures.append(f"quantile classes hold {counts.tolist()} values")
+    widths = np.diff(results["equal_interval"][0])
+    if not np.allclose(widths, widths[0]):
+        failures.append(f"equal-interval classes have widths {widths.tolist()}")
+
+    for name, scale in [("fixed", default_scale)] + [
+        (scheme, color_scale(history, scheme, k)) for scheme in SCHEMES
+    ]:
+        colors = scale.value_colors(history)
+        uncolored = np.isfinite(history) & (colors == missing_color)
+        if uncolored.any():
+            failures.append(
+                f"{name}: {uncolored.sum()} values, down to "
+                f"{history[uncolored].min():.2f}, are drawn as missing"
+            )
+        if not (colors[np.isnan(history)] == missing_color).all():
+            failures.append(f"{name}: missing values get a class color")
+        if len(scale.color_mapping) != len(scale.colors):
+            failures.append(f"{name}: the legend labels are not distinct")
+
+    if failures:
+        print("Classification checks failed:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark the county map from collection to the saved image, offline.
+
+The counties come from `county_fixture` (about 3,200 grid cells cut from the
+state shapefile) and their LAUS series from the FRED stub server, so every
+step of the county mode runs as it would on real data:
+
+    fixture    write the synthetic county shapefile
+    fetch      `collect_county_data` for every county through the stub
+    transform  annual percent change of the county panel
+    geometry   build the county and state assets at the level of detail for the DPI
+    merge      join the latest month onto the counties by FIPS code
+    render     `draw_county_map` and savefig
+
+The render must stay within RENDER_BUDGET_SECONDS; the run exits with status
+1 if it does not, or if the FIPS join loses counties.
+
+Run from the repository root:
+
+    python -m src.benchmarks.bench_county_map
+    python -m src.benchmarks.bench_county_map --dpi 150 --output county.png
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+
+from src.benchmarks.county_fixture import write_county_shapefile
+from src.benchmarks.fred_stub import start_stub_server, stub_fred_client
+from src.data.counties import collect_county_data, county_fips
+from src.visualization.county_map import draw_county_map, merge_county_data
+from src.visualization.fonts import load_fonts
+from src.visualization.geometry import (
+    SHAPEFILE_PATH,
+    detail_level,
+    load_geometry_asset,
+)
+
+# Longest acceptable time to draw and save the full county map
+RENDER_BUDGET_SECONDS = 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the county map")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--output", help="Also save the rendered map here")
+    args = parser.parse_args()
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        shapefile_path = write_county_shapefile(
+            SHAPEFILE_PATH, os.path.join(folder, "tl_2023_us_county.shp")
+        )
+        fips_codes = county_fips(shapefile_path)
+        timings["fixture"] = time.perf_counter() - start
+
+        server = start_stub_server(latency=0, series_start="2022-01-01")
+        try:
+            start = time.perf_counter()
+            data = collect_county_data(
+                api_key=None,
+                fips_codes=fips_codes,
+                observation_start="2022-01-01",
+                max_workers=16,
+                requests_per_minute=None,
+                fred=stub_fred_client(server),
+            )
+            timings["fetch"] = time.perf_counter() - start
+        finally:
+            server.shutdown()
+
+        start = time.perf_counter()
+        apc = data.pct_change(periods=12) * 100
+        selected_row = apc.iloc[-1]
+        timings["transform"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        level = detail_level(args.dpi)
+        counties = load_geometry_asset(shapefile_path, folder, level)
+        states = load_geometry_asset(SHAPEFILE_PATH, folder, level)
+        timings["geometry"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        merged = merge_county_data(counties, selected_row, "apc")
+        timings["merge"] = time.perf_counter() - start
+
+        fonts = load_fonts()
+        start = time.perf_counter()
+        fig = draw_county_map(
+            merged, "apc", "Benchmark", fonts=fonts, state_outlines=states
+        )
+        labels = sum(len(ax.texts) for ax in fig.axes)
+        fig.savefig(
+            args.output or os.path.join(folder, "county.png"),
+            dpi=args.dpi,
+            bbox_inches="tight",
+        )
+        plt.close(fig)
+        timings["render"] = time.perf_counter() - start
+
+    mapped = int(merged["apc"].notna().sum())
+    print(
+        f"{len(fips_codes)} counties, {data.shape[0]} months, {mapped} mapped, "
+        f"{labels} labels at {args.dpi} dpi (level of detail {level})"
+    )
+    for name, seconds in timings.items():
+        print(f"{name:<10}{seconds:8.2f}s")
+
+    failures = []
+    if timings["render"] > RENDER_BUDGET_SECONDS:
+        failures.append(
+            f"render took {timings['render']:.1f}s > {RENDER_BUDGET_SECONDS}s"
+        )
+    if mapped != len(fips_codes):
+        failures.append(f"only {mapped} of {len(fips_codes)} counties were joined")
+    if failures:
+        print("County map checks failed:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Compare the levels of detail of the geometry asset.
+
+For every level in DETAIL_LEVELS the benchmark reports the number of
+vertices, the time to build and load the cached asset, the median time to
+draw and save the map at a given DPI, and how far the image is from the
+one drawn with the full shapefile (share of pixels that differ by more
+than a small threshold). The level `detail_level` picks for that DPI is
+marked.
+
+Run from the repository root:
+
+    python -m src.benchmarks.bench_detail_levels
+    python -m src.benchmarks.bench_detail_levels --dpi 150
+"""
+
+import argparse
+import io
+import statistics
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import shapely
+from PIL import Image
+
+from src.data.storage import PanelStore
+from src.visualization.choropleth import draw_employment_map, merge_map_data
+from src.visualization.fonts import load_fonts
+from src.visualization.geometry import (
+    DETAIL_LEVELS,
+    SHAPEFILE_PATH,
+    build_geometry_asset,
+    detail_level,
+    load_geometry_asset,
+)
+
+
+def render(geometry, selected_row, fonts, dpi):
+    """
+    Draw and save the map to memory; return the image as an RGB array.
+    """
+    data = merge_map_data(geometry, selected_row, "apc")
+    fig = draw_employment_map(data, "apc", subtitle="Benchmark", fonts=fonts)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    return np.asarray(Image.open(buffer).convert("RGB"), dtype=np.int16)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the levels of detail")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    selected_row = PanelStore("data/store").read_row("employment_state_apc")
+    fonts = load_fonts()
+    chosen = detail_level(args.dpi)
+
+    results = []
+    reference = None
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for level, tolerance in enumerate(DETAIL_LEVELS):
+            start = time.perf_counter()
+            build_geometry_asset(SHAPEFILE_PATH, cache_dir, level)
+            build_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            geometry = load_geometry_asset(SHAPEFILE_PATH, cache_dir, level)
+            load_time = time.perf_counter() - start
+            vertices = int(shapely.get_num_coordinates(geometry.geometry.values).sum())
+
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                image = render(geometry, selected_row, fonts, args.dpi)
+                times.append(time.perf_counter() - start)
+
+            if reference is None:
+                reference = image
+            if image.shape == reference.shape:
+                changed = (np.abs(image - reference).max(axis=2) > 32).mean() * 100
+            else:
+                changed = float("nan")
+            results.append(
+                (level, tolerance, vertices, build_time, load_time, times, changed)
+            )
+
+    print(f"{args.dpi} dpi, detail_level picks level {chosen}")
+    print(
+        f"{'level':<7}{'tolerance':>10}{'vertices':>10}{'build s':>9}"
+        f"{'load ms':>9}{'render ms':>11}{'pixels %':>10}"
+    )
+    for level, tolerance, vertices, build_time, load_time, times, changed in results:
+        marker = " <" if level == chosen else ""
+        print(
+            f"{level:<7}{tolerance:>10}{vertices:>10}{build_time:9.2f}"
+            f"{load_time * 1e3:9.1f}{statistics.median(times) * 1e3:11.1f}"
+            f"{changed:10.3f}{marker}"
+        )
+
+
+if __name__ == "__main__":
+    main()
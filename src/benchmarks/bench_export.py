@@ -0,0 +1,173 @@
+"""
+Compare the single-render export with one `savefig` per file.
+
+The map of the latest month is drawn once, then exported to every size and
+format of the usual export set (see `export.py`) in two ways:
+
+    separate   one savefig per file, each rasterizing or walking the figure again
+    shared     `export_figure`: one Agg render resized for every bitmap, the
+               vector files alongside, all written concurrently
+
+The run reports both totals, the cost of drawing the figure itself (what N
+separate runs of the render script would also pay N times) and the time of
+each file. It checks that every file is written at its width, that the
+largest bitmap matches savefig's output pixel for pixel up to antialiasing,
+that the smaller ones match a savefig at their own size closely, and that
+exporting twice gives identical files. It exits with status 1 if any check
+fails. Needs the state shapefile, the font cache and the panel store. Run
+from the repository root:
+
+    python -m src.benchmarks.bench_export
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+from PIL import Image
+
+from src.data.storage import PanelStore
+from src.visualization.choropleth import draw_employment_map, merge_map_data
+from src.visualization.export import (
+    PAD_INCHES,
+    export_figure,
+    export_files,
+    tight_bbox,
+)
+from src.visualization.fonts import load_fonts
+from src.visualization.geometry import detail_level, load_geometry_asset
+
+# Largest mean difference allowed between a shared and a separate bitmap, in
+# 0-255 levels: tiny for the full-size render, larger once resized
+LARGEST_TOLERANCE = 0.5
+RESIZED_TOLERANCE = 6.0
+
+
+def draw_map():
+    selected_row = PanelStore("data/store").read_row("employment_state_apc")
+    geometry = load_geometry_asset(level=detail_level(dpi=300))
+    data = merge_map_data(geometry, selected_row, "apc")
+    return draw_employment_map(
+        data,
+        "apc",
+        subtitle=f"Total nonfarm employment, annual percent change ({selected_row.name:%b %Y})",
+        fonts=load_fonts(),
+    )
+
+
+def save_separately(fig, folder, bitmaps, vectors):
+    """
+    Write every file with its own savefig call, timing each one.
+    """
+    bbox = tight_bbox(fig)
+    seconds = {}
+    for file_name, width in bitmaps:
+        start = time.perf_counter()
+        fig.savefig(
+            os.path.join(folder, file_name),
+            dpi=width / bbox.width,
+            bbox_inches="tight",
+            pad_inches=PAD_INCHES,
+        )
+        seconds[file_name] = time.perf_counter() - start
+    for file_name in vectors:
+        start = time.perf_counter()
+        fig.savefig(
+            os.path.join(folder, file_name), bbox_inches="tight", pad_inches=PAD_INCHES
+        )
+        seconds[file_name] = time.perf_counter() - start
+    return seconds
+
+
+def pixels(path, size=None):
+    image = Image.open(path).convert("RGB")
+    if size is not None and image.size != size:
+        image = image.resize(size, Image.LANCZOS)
+    return np.asarray(image, dtype=float)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the single-render export")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    fig = draw_map()
+    # The first draw lays out the labels, which every export needs anyway
+    fig.canvas.draw()
+    draw_seconds = time.perf_counter() - start
+
+    bitmaps, vectors = export_files("employment_map")
+    n_files = len(bitmaps) + len(vectors)
+    failures = []
+    with tempfile.TemporaryDirectory() as folder:
+        separate_dir = os.path.join(folder, "separate")
+        os.makedirs(separate_dir)
+        start = time.perf_counter()
+        separate = save_separately(fig, separate_dir, bitmaps, vectors)
+        separate_seconds = time.perf_counter() - start
+
+        shared_dirs = [os.path.join(folder, f"shared_{i}") for i in range(2)]
+        timings = [
+            export_figure(fig, path, bitmaps, vectors, max_workers=args.workers)
+            for path in shared_dirs
+        ]
+        shared = timings[0]
+
+        print(f"{n_files} files; drawing the figure itself takes {draw_seconds:.2f}s")
+        print(f"{'file':<32}{'separate':>10}{'shared':>10}")
+        for file_name in [name for name, _ in bitmaps] + vectors:
+            shared_file = shared["files"][os.path.join(shared_dirs[0], file_name)]
+            print(f"{file_name:<32}{separate[file_name]:9.3f}s{shared_file:9.3f}s")
+        print(f"{'shared render':<32}{'':>10}{shared['render']:9.3f}s")
+        print(f"{'total':<32}{separate_seconds:9.3f}s{shared['total']:9.3f}s")
+        print(
+            f"speed-up {separate_seconds / shared['total']:.1f}x; "
+            f"{n_files} separate runs of the render script would take about "
+            f"{n_files * draw_seconds + separate_seconds:.1f}s"
+        )
+
+        largest = max(width for _, width in bitmaps)
+        for file_name, width in bitmaps:
+            shared_path = os.path.join(shared_dirs[0], file_name)
+            with Image.open(shared_path) as image:
+                size = image.size
+            if size[0] != width:
+                failures.append(f"{file_name} is {size[0]} px wide, not {width}")
+            if not file_name.endswith(".png"):
+                continue
+            difference = np.abs(
+                pixels(shared_path)
+                - pixels(os.path.join(separate_dir, file_name), size)
+            ).mean()
+            tolerance = LARGEST_TOLERANCE if width == largest else RESIZED_TOLERANCE
+            if difference > tolerance:
+                failures.append(
+                    f"{file_name} differs from savefig by {difference:.2f} levels"
+                )
+        for file_name in [name for name, _ in bitmaps] + vectors:
+            contents = []
+            for path in shared_dirs:
+                with open(os.path.join(path, file_name), "rb") as f:
+                    contents.append(f.read())
+            if contents[0] != contents[1]:
+                failures.append(f"{file_name} changes between two exports")
+    plt.close(fig)
+
+    if failures:
+        print("Export checks failed:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
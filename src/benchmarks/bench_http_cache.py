@@ -0,0 +1,121 @@
+"""
+Benchmark the FRED response cache against the stub server.
+
+Fetches the state panel through a cached client four times and counts the
+requests that reach the server:
+
+    cold        empty cache: one request per series, all stored
+    warm        rerun within the TTL: no request at all
+    revalidate  TTL expired: one conditional request per series, answered 304
+    capped      a size cap of half the cache: least recently used responses evicted
+
+The run checks that the panels are identical every time, that the warm run
+makes zero requests, that the revalidation downloads nothing, and that the
+capped cache stays under its cap. It exits with status 1 if any check fails.
+Run from the repository root:
+
+    python -m src.benchmarks.bench_http_cache
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+
+from src.benchmarks.fred_stub import start_stub_server, stub_fred_client
+from src.data.fetch_fred import collect_state_data
+from src.data.http_cache import ResponseCache
+from src.pipeline import STATE_CODES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the FRED response cache")
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=args.latency)
+    failures = []
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            panels = []
+            for name in ["cold", "warm", "revalidate", "capped"]:
+                # A fresh cache over the same folder for every run, so the
+                # counters cover that run only
+                if name == "revalidate":
+                    cache = ResponseCache(folder, ttl=0)
+                elif name == "capped":
+                    size = cache.stats()["bytes"]
+                    cache = ResponseCache(folder, ttl=3600, max_bytes=size // 2)
+                    # Start empty, so every response is stored again under the cap
+                    cache.clear()
+                else:
+                    cache = ResponseCache(folder, ttl=3600)
+
+                requests, sent = server.request_count, server.bytes_sent
+                not_modified = server.not_modified
+                start = time.perf_counter()
+                panels.append(
+                    collect_state_data(
+                        api_key=None,
+                        state_codes=STATE_CODES,
+                        series_suffix="NA",
+                        observation_start="1984-01-01",
+                        max_workers=8,
+                        requests_per_minute=None,
+                        fred=cache.attach(stub_fred_client(server)),
+                    )
+                )
+                seconds = time.perf_counter() - start
+                stats = cache.stats()
+                rows.append(
+                    (
+                        name,
+                        seconds,
+                        server.request_count - requests,
+                        server.not_modified - not_modified,
+                        server.bytes_sent - sent,
+                        stats,
+                    )
+                )
+    finally:
+        server.shutdown()
+
+    print(
+        f"{'run':<12}{'time':>8}{'requests':>10}{'304':>6}{'KB sent':>9}"
+        f"{'hits':>6}{'misses':>8}{'evicted':>9}{'cache KB':>10}"
+    )
+    for name, seconds, requests, not_modified, sent, stats in rows:
+        print(
+            f"{name:<12}{seconds:7.2f}s{requests:10d}{not_modified:6d}{sent / 1e3:9.1f}"
+            f"{stats['hits']:6d}{stats['misses']:8d}{stats['evictions']:9d}"
+            f"{stats['bytes'] / 1e3:10.1f}"
+        )
+
+    n_series = len(STATE_CODES)
+    by_name = {row[0]: row for row in rows}
+    if not all(panel.equals(panels[0]) for panel in panels[1:]):
+        failures.append("cached panels differ from the downloaded one")
+    if by_name["warm"][2] != 0:
+        failures.append(f"warm rerun made {by_name['warm'][2]} requests")
+    if by_name["warm"][5]["hits"] != n_series or by_name["warm"][5]["misses"] != 0:
+        failures.append(
+            f"warm rerun had {by_name['warm'][5]['hits']} hits and "
+            f"{by_name['warm'][5]['misses']} misses"
+        )
+    if by_name["revalidate"][3] != n_series or by_name["revalidate"][4] != 0:
+        failures.append("revalidation downloaded responses again")
+    capped = by_name["capped"][5]
+    if capped["evictions"] == 0 or capped["bytes"] > cache.max_bytes:
+        failures.append(
+            f"capped cache holds {capped['bytes']} > {cache.max_bytes} bytes"
+        )
+    if failures:
+        print("Cache checks failed:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
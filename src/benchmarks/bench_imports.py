@@ -0,0 +1,130 @@
+"""
+Check that the package modules import fast and without side effects.
+
+Every module is imported in a fresh interpreter, so nothing is cached
+between them, and three things are checked:
+
+- the import time reported by `python -X importtime`, best of several runs,
+  against the budget in IMPORT_BUDGETS;
+- that none of the heavy libraries a module is not allowed to load at import
+  time (HEAVY_MODULES) ends up in sys.modules;
+- that the import does no I/O beyond reading files: an audit hook records
+  file writes, socket connections and subprocesses.
+
+The budgets leave room for slower CI machines; the modules that only need
+the standard library stay far below 100 ms, and those built on pandas
+below 500 ms. The run exits with status 1 if any check fails.
+
+Run from the repository root:
+
+    python -m src.benchmarks.bench_imports
+"""
+
+import json
+import subprocess
+import sys
+
+# Libraries that take hundreds of milliseconds to import and are loaded lazily
+HEAVY_MODULES = ["fredapi", "geopandas", "matplotlib", "pyfonts", "dotenv"]
+
+# Import time budget in milliseconds for each module
+IMPORT_BUDGETS = {
+    "src.pipeline": 100,
+    "src.instrumentation": 100,
+    "src.data.extract_fred_data_employment": 100,
+    "src.data.extract_fred_data_employment_quarto": 100,
+    "src.visualization.fonts": 100,
+    "src.data.http_cache": 100,
+    "src.visualization.geometry": 100,
+    "src.visualization.classification": 100,
+    "src.visualization.export": 100,
+    "src.data.fetch_fred": 500,
+    "src.data.counties": 500,
+    "src.data.storage": 500,
+    "src.data.series_panel": 500,
+    "src.data.vintages": 500,
+    "src.data.incremental": 500,
+    "src.features.growth": 500,
+    "src.visualization.choropleth": 500,
+    "src.visualization.county_map": 500,
+    "src.visualization.labels": 500,
+    "src.visualization.interactive": 500,
+    "src.visualization.vizualise": 500,
+}
+
+# Import a module with an audit hook recording any I/O other than reading files
+PROBE_SCRIPT = """
+import importlib, json, sys
+
+events = []
+
+def audit(event, args):
+    if event == "open" and isinstance(args[1], str) and set(args[1]) & set("wax+"):
+        events.append(f"open {args[0]} {args[1]}")
+    elif event in ("socket.connect", "subprocess.Popen", "os.remove", "os.rename"):
+        events.append(f"{event} {args[1] if len(args) > 1 else ''}")
+
+sys.addaudithook(audit)
+importlib.import_module(sys.argv[1])
+heavy = sorted(
+    name for name in json.loads(sys.argv[2]) if name in sys.modules
+)
+print(json.dumps({"heavy": heavy, "io": events}))
+"""
+
+
+def import_time_ms(module, repeat=5):
+    """
+    Best cumulative import time of a module over fresh interpreters, in ms.
+    """
+    times = []
+    for _ in range(repeat):
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stderr
+        # The last line is the module itself, with the cumulative time in us
+        times.append(int(stderr.strip().splitlines()[-1].split("|")[1]) / 1e3)
+    return min(times)
+
+
+def import_effects(module):
+    """
+    The heavy libraries loaded and the I/O done while importing a module.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE_SCRIPT, module, json.dumps(HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    failures = []
+    print(f"{'module':<48}{'ms':>8}{'budget':>8}")
+    for module, budget in IMPORT_BUDGETS.items():
+        milliseconds = import_time_ms(module)
+        effects = import_effects(module)
+        print(f"{module:<48}{milliseconds:8.1f}{budget:8d}")
+
+        if milliseconds > budget:
+            failures.append(f"{module} imports in {milliseconds:.0f} ms > {budget} ms")
+        if effects["heavy"]:
+            failures.append(f"{module} loads {', '.join(effects['heavy'])} on import")
+        for event in effects["io"]:
+            failures.append(f"{module} does I/O on import: {event}")
+
+    if failures:
+        print("Import checks failed:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+    print("All modules within their import budget and free of side effects")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare a full-history FRED pull with an incremental update of a stored panel.
+
+Run from the repository root:
+
+    python -m src.benchmarks.bench_incremental
+"""
+
+import time
+
+import numpy as np
+
+from src.benchmarks.fred_stub import start_stub_server, stub_fred_client
+from src.data.fetch_fred import collect_state_data
+from src.data.incremental import (
+    incremental_start_dates,
+    merge_panel,
+    update_annual_pct_change,
+)
+
+STATE_CODES = [f"S{i:02d}" for i in range(51)]
+
+
+def collect(server, observation_start):
+    server.bytes_sent = 0
+    start = time.perf_counter()
+    data = collect_state_data(
+        api_key=None,
+        state_codes=STATE_CODES,
+        series_suffix="NA",
+        observation_start=observation_start,
+        max_workers=8,
+        requests_per_minute=None,
+        fred=stub_fred_client(server),
+    )
+    return data, server.bytes_sent, time.perf_counter() - start
+
+
+def main(latency=0.05):
+    server = start_stub_server(latency=latency)
+    try:
+        full, full_bytes, full_time = collect(server, "1984-01-01")
+        full_apc = full.pct_change(periods=12) * 100
+        print(f"full history:        {full_bytes / 1e3:8.1f} KB {full_time:6.2f}s")
+
+        for new_months in (1, 3, 12):
+            # Pretend the last run happened `new_months` releases ago
+            stored = full.iloc[:-new_months]
+            stored_apc = stored.pct_change(periods=12) * 100
+
+            fresh, fetched_bytes, fetch_time = collect(
+                server, incremental_start_dates(stored, STATE_CODES)
+            )
+            start = time.perf_counter()
+            data, changed_from = merge_panel(stored, fresh)
+            apc = update_annual_pct_change(stored_apc, data, changed_from)
+            merge_time = time.perf_counter() - start
+
+            assert data.equals(full)
+            np.testing.assert_allclose(apc.values, full_apc.values, equal_nan=True)
+            print(
+                f"{new_months:2d} new month(s):    {fetched_bytes / 1e3:8.1f} KB "
+                f"{fetch_time:6.2f}s (+{merge_time * 1e3:.1f} ms merge and APC)"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
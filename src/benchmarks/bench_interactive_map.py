@@ -0,0 +1,139 @@
+"""
+Compare the interactive map payload with shipping the same map as raw GeoJSON.
+
+The baseline is the projected state outlines as GeoJSON plus the monthly values
+as a JSON array, which is what a page would load without the quantized
+topology. Reports the raw and gzipped payload sizes and, if Node.js is
+installed, the time to decode each payload into SVG paths, which is the
+client-side work before the first month can be drawn.
+
+Run from the repository root:
+
+    python -m src.benchmarks.bench_interactive_map
+"""
+
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from src.data.storage import PanelStore
+from src.visualization.interactive import (
+    GEOJSON_PATH,
+    TEMPLATE_DIR,
+    page_payload,
+    project_states,
+)
+from src.visualization.topology import build_topology
+
+# Decode both payloads the way a page would and report the median time in ms
+NODE_SCRIPT = """
+const fs = require("fs");
+const map = require(process.argv[1]);
+const topologyText = fs.readFileSync(process.argv[2], "utf8");
+const geojsonText = fs.readFileSync(process.argv[3], "utf8");
+
+function geojsonPaths(collection) {
+  return collection.features.map(function (feature) {
+    const geometry = feature.geometry;
+    const polygons = geometry.type === "Polygon" ? [geometry.coordinates] : geometry.coordinates;
+    const d = polygons.map(function (polygon) {
+      return polygon.map(function (ring) { return "M" + ring.join("L") + "Z"; }).join("");
+    }).join("");
+    return { id: feature.id, d: d };
+  });
+}
+
+function median(run) {
+  const times = [];
+  for (let i = 0; i < 50; i++) {
+    const start = process.hrtime.bigint();
+    run();
+    times.push(Number(process.hrtime.bigint() - start) / 1e6);
+  }
+  times.sort(function (a, b) { return a - b; });
+  return times[times.length >> 1];
+}
+
+const topology = median(function () {
+  const data = JSON.parse(topologyText);
+  map.topologyPaths(data.topology);
+  map.decodeValues(data);
+});
+const geojson = median(function () {
+  const data = JSON.parse(geojsonText);
+  geojsonPaths(data.geometry);
+});
+console.log(JSON.stringify({ topology: topology, geojson: geojson }));
+"""
+
+
+def sizes(text):
+    data = text.encode()
+    return len(data), len(gzip.compress(data, compresslevel=9))
+
+
+def main():
+    geometries = project_states(gpd.read_file(GEOJSON_PATH))
+    topology = build_topology(geometries)
+    panel = PanelStore("data/store").read("employment_state_apc")
+    panel = panel.loc[panel.notna().any(axis=1).idxmax() :]
+
+    payload = json.dumps(page_payload(topology, panel, "yoy"), separators=(",", ":"))
+
+    state_codes = list(geometries)
+    features = [
+        {"type": "Feature", "id": code, "geometry": shapely.geometry.mapping(geometry)}
+        for code, geometry in geometries.items()
+    ]
+    values = panel.reindex(columns=state_codes).round(2).to_numpy()
+    baseline = json.dumps(
+        {
+            "geometry": {"type": "FeatureCollection", "features": features},
+            "values": np.where(np.isnan(values), None, values).tolist(),
+        },
+        separators=(",", ":"),
+    )
+
+    print(f"{len(state_codes)} states, {len(panel)} months")
+    print(f"{'payload':<22}{'raw KB':>10}{'gzip KB':>10}")
+    for name, text in (("topology + int16", payload), ("GeoJSON + JSON", baseline)):
+        raw, compressed = sizes(text)
+        print(f"{name:<22}{raw / 1e3:10.1f}{compressed / 1e3:10.1f}")
+
+    node = shutil.which("node")
+    if node is None:
+        print("Node.js not found, skipping the decode timings")
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = []
+        for name, text in (("topology.json", payload), ("geojson.json", baseline)):
+            paths.append(os.path.join(folder, name))
+            with open(paths[-1], "w") as f:
+                f.write(text)
+        output = subprocess.run(
+            [
+                node,
+                "-e",
+                NODE_SCRIPT,
+                os.path.abspath(os.path.join(TEMPLATE_DIR, "interactive_map.js")),
+                *paths,
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    timings = json.loads(output)
+    print(f"decode to SVG paths, topology + int16: {timings['topology']:6.2f} ms")
+    print(f"decode to SVG paths, GeoJSON + JSON:   {timings['geojson']:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Benchmark automatic label placement on the states and on ~3,200 counties.
+
+The states are labeled the way the map does it: two-line labels inside the
+regions where they fit, one-line labels where only those fit, and callouts
+with leader lines for the rest. They are labeled with the annual percent
+changes of the latest month, of April 2020, whose values such as "-23.71"
+are the widest of the history, and with a template sized for the widest
+value of the history and showing April 2020. The counties come from
+`county_fixture` and only get labels that fit inside them. Every run uses
+the scale of the contiguous panel of the map, with label sizes measured in
+matplotlib's default font so no font cache is needed, and checks that:
+
+- no two placed label boxes overlap, measuring each from the text drawn;
+- every visible state gets a label, inside or as a callout;
+- no leader line crosses another;
+- the county placement, best of COUNTY_REPEATS runs, stays within
+  COUNTY_BUDGET_SECONDS.
+
+The run exits with status 1 if any check fails. Run from the repository root:
+
+    python -m src.benchmarks.bench_labels
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import shapely
+from matplotlib.font_manager import FontProperties
+
+from src.benchmarks.county_fixture import synthetic_counties
+from src.data.counties import LAST_STATE_FIPS
+from src.data.storage import PanelStore
+from src.visualization.choropleth import (
+    callout_fontsize,
+    format_value,
+    label_fontsize,
+    label_sizes,
+    label_vsep,
+    panel_limits,
+    value_separators,
+    widest_value,
+)
+from src.visualization.geometry import (
+    SHAPEFILE_PATH,
+    detail_level,
+    load_geometry_asset,
+)
+from src.visualization.labels import axis_scale, place_labels, text_size
+
+# Longest acceptable time to place the labels of ~3,200 counties
+COUNTY_BUDGET_SECONDS = 1.0
+
+# Runs of the county placement, the fastest of which is compared with the budget
+COUNTY_REPEATS = 3
+
+# Months whose values label the states; April 2020 has the widest values
+STATE_MONTHS = [None, "2020-04-01"]
+
+
+def contiguous_axis():
+    """
+    An axis of the size and limits of the contiguous panel of the map.
+    """
+    fig = plt.figure(figsize=(20 * 0.25, 15 * 0.25), dpi=300)
+    grid = fig.add_gridspec(2, 2, height_ratios=[4, 1])
+    fig.subplots_adjust(hspace=0.04)
+    ax = fig.add_subplot(grid[0, :])
+    xlim, ylim = panel_limits["contiguous"]
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    ax.set_aspect("equal")
+    return fig, ax
+
+
+def overlaps(placement, widths, heights, scale):
+    """
+    Number of pairs of placed label boxes that overlap.
+    """
+    placed = placement["placed"].to_numpy()
+    x = placement["x"].to_numpy()[placed] * scale[0]
+    y = placement["y"].to_numpy()[placed] * scale[1]
+    w, h = widths[placed], heights[placed]
+    boxes = shapely.box(x - w / 2, y - h / 2, x + w / 2, y + h / 2)
+    pairs = shapely.STRtree(boxes).query(boxes, predicate="overlaps")
+    return int((pairs[0] < pairs[1]).sum())
+
+
+def drawn_sizes(codes, texts, layout, font):
+    """
+    Size in points of every state label as drawn: its code and its value text
+    in the layout it was placed in.
+    """
+    sizes = []
+    for code, text, k in zip(codes, texts, layout):
+        fontsize = callout_fontsize if k == -1 else label_fontsize
+        code_width, code_height = text_size(code, font, fontsize)
+        if k == 0:
+            width, height = text_size(text, font, fontsize)
+            sizes.append((max(code_width, width), code_height + height + label_vsep))
+        else:
+            width, height = text_size(value_separators[k] + text, font, fontsize)
+            sizes.append((code_width + width, max(code_height, height)))
+    return np.array(sizes).reshape(-1, 2).T
+
+
+def crossing_leaders(placement):
+    """
+    Number of pairs of leader lines that cross.
+    """
+    callouts = placement[placement["callout"]]
+    leaders = shapely.linestrings(
+        np.stack(
+            [
+                callouts[["anchor_x", "anchor_y"]].to_numpy(),
+                callouts[["tail_x", "tail_y"]].to_numpy(),
+            ],
+            axis=1,
+        )
+    )
+    pairs = shapely.STRtree(leaders).query(leaders, predicate="crosses")
+    return int((pairs[0] < pairs[1]).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark label placement")
+    parser.add_argument("--counties", type=int, default=3200)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--store-dir", default="data/store")
+    args = parser.parse_args()
+
+    font = FontProperties()
+    with tempfile.TemporaryDirectory() as folder:
+        states = load_geometry_asset(SHAPEFILE_PATH, folder, detail_level(args.dpi))
+    states = states[
+        (states["region"] == "contiguous") & (states["STATEFP"] <= LAST_STATE_FIPS)
+    ].reset_index(drop=True)
+    counties = synthetic_counties(states, args.counties)
+    fig, ax = contiguous_axis()
+    scale = axis_scale(ax)
+    limits = (*ax.get_xlim(), *ax.get_ylim())
+    # As on the map, callouts may use the margins left and right of the panel
+    (left, _), (right, _) = ax.transData.inverted().transform(
+        fig.transFigure.transform([(0, 0), (1, 0)])
+    )
+    failures = []
+
+    # States: two lines, one line, then a callout, each sized for its value
+    # or, as a template is, for the widest value of the history
+    codes = states["STUSPS"].to_numpy()
+    fonts = {"medium": font, "light": font}
+    store = PanelStore(args.store_dir)
+    cases = []
+    for month in STATE_MONTHS:
+        row = store.read_row("employment_state_apc", month)
+        texts = [format_value(value) for value in row.reindex(codes)]
+        cases.append((f"{row.name:%b %Y}", texts, texts))
+    history = store.read("employment_state_apc")[codes].to_numpy()
+    cases.append(("template", widest_value(history, fonts), cases[-1][2]))
+
+    for name, sized, texts in cases:
+        layouts, callout_size = label_sizes(codes, fonts, sized)
+        start = time.perf_counter()
+        placement = place_labels(
+            states.geometry.values,
+            layouts,
+            scale,
+            (left, right, *limits[2:]),
+            callout_size,
+        )
+        state_seconds = time.perf_counter() - start
+
+        layout = placement["layout"].to_numpy()
+        widths, heights = drawn_sizes(codes, texts, layout, font)
+        state_overlaps = overlaps(placement, widths, heights, scale)
+        unplaced = codes[~placement["placed"].to_numpy()]
+        crossings = crossing_leaders(placement)
+        print(
+            f"states    {len(codes):5d} regions {state_seconds:6.2f}s  {name}: "
+            f"{int((layout >= 0).sum())} inside, "
+            f"{int(placement['callout'].sum())} callouts, "
+            f"{state_overlaps} overlaps, {crossings} crossing leaders"
+        )
+        if state_overlaps:
+            failures.append(f"{name}: {state_overlaps} state labels overlap")
+        if len(unplaced):
+            failures.append(f"{name}: states without a label: {', '.join(unplaced)}")
+        if crossings:
+            failures.append(f"{name}: {crossings} leader lines cross")
+
+    # Counties: one-line values inside their county only
+    texts = np.char.mod("%.1f", np.random.default_rng(0).normal(1, 2, len(counties)))
+    sizes = {text: text_size(text, font, 2) for text in set(texts)}
+    width, height = np.array([sizes[text] for text in texts]).T
+    geometries = counties.geometry.values
+
+    county_seconds = np.inf
+    for _ in range(COUNTY_REPEATS):
+        start = time.perf_counter()
+        placement = place_labels(
+            geometries,
+            [(width, height)],
+            scale,
+            limits,
+            priority=shapely.area(geometries),
+        )
+        county_seconds = min(county_seconds, time.perf_counter() - start)
+
+    county_overlaps = overlaps(placement, width, height, scale)
+    print(
+        f"counties  {len(counties):5d} regions {county_seconds:6.2f}s  "
+        f"{int(placement['placed'].sum())} inside, {county_overlaps} overlaps"
+    )
+    if county_overlaps:
+        failures.append(f"{county_overlaps} county labels overlap")
+    if county_seconds > COUNTY_BUDGET_SECONDS:
+        failures.append(
+            f"county placement took {county_seconds:.2f}s > {COUNTY_BUDGET_SECONDS}s"
+        )
+    plt.close(fig)
+
+    if failures:
+        print("Label placement checks failed:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
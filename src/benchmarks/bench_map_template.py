@@ -0,0 +1,85 @@
+"""
+Compare per-frame render time of a full figure rebuild with a reused MapTemplate.
+
+Renders the same months both ways, with the labels of both sized for the
+widest value of the months, checks that the images are identical and reports
+the time per frame. Needs the state shapefile and the font cache
+(`python -m src.visualization.fonts warm`). Run from the repository root:
+
+    python -m src.benchmarks.bench_map_template
+"""
+
+import argparse
+import io
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+
+from src.data.storage import PanelStore
+from src.visualization.choropleth import (
+    MapTemplate,
+    draw_employment_map,
+    merge_map_data,
+    widest_value,
+)
+from src.visualization.fonts import load_fonts
+from src.visualization.geometry import load_geometry_asset
+
+
+def save(fig, dpi):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=12)
+    parser.add_argument("--dpi", type=int, default=150)
+    args = parser.parse_args()
+
+    panel = PanelStore("data/store").read("employment_state_apc").iloc[-args.frames :]
+    geometry = load_geometry_asset()
+    fonts = load_fonts()
+
+    def subtitle(date):
+        return f"Total nonfarm employment, year-on-year growth ({date:%b %Y})"
+
+    sized_text = widest_value(panel.to_numpy(), fonts)
+
+    start = time.perf_counter()
+    rebuilt = []
+    for date, state_values in panel.iterrows():
+        data = merge_map_data(geometry, state_values, "value")
+        fig = draw_employment_map(
+            data, "value", subtitle(date), fonts, sized_text=sized_text
+        )
+        rebuilt.append(save(fig, args.dpi))
+        plt.close(fig)
+    rebuild_time = (time.perf_counter() - start) / len(panel)
+
+    start = time.perf_counter()
+    template = MapTemplate(geometry, panel.columns, fonts, values=panel.to_numpy())
+    setup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    redrawn = []
+    for date, state_values in panel.iterrows():
+        fig = template.render(state_values, subtitle(date))
+        redrawn.append(save(fig, args.dpi))
+    template_time = (time.perf_counter() - start) / len(panel)
+
+    identical = sum(a == b for a, b in zip(rebuilt, redrawn))
+    print(f"{len(panel)} frames at {args.dpi} dpi, {identical} identical images")
+    print(f"full rebuild:   {rebuild_time * 1e3:8.1f} ms/frame")
+    print(f"template:       {template_time * 1e3:8.1f} ms/frame")
+    print(f"template setup: {setup_time * 1e3:8.1f} ms once")
+    print(f"speed-up:       {rebuild_time / template_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
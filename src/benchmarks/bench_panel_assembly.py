@@ -0,0 +1,97 @@
+"""
+Scaling benchmark for building the panel from many retrieved series.
+
+Compares the former column-by-column insertion with the batched assembly in
+`collect_state_data` on synthetic inputs, using an in-memory FRED client so
+only the assembly is measured.
+
+Run from the repository root:
+
+    python -m src.benchmarks.bench_panel_assembly
+"""
+
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.data.fetch_fred import collect_state_data
+
+
+class InMemoryFred:
+    """
+    Minimal stand-in for `fredapi.Fred` that serves pre-built series.
+    """
+
+    def __init__(self, series):
+        self.series = series
+
+    def get_series(self, series_id, observation_start=None):
+        return self.series[series_id]
+
+
+def synthetic_inputs(n_series, n_months=492, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1984-01-01", periods=n_months, freq="MS")
+    levels = rng.uniform(300, 15000, n_series) * np.exp(
+        np.cumsum(rng.normal(0.0015, 0.004, (n_months, n_series)), axis=0)
+    )
+    codes = [f"R{i:05d}" for i in range(n_series)]
+    series = {
+        f"{code}NA": pd.Series(levels[:, i], index=dates)
+        for i, code in enumerate(codes)
+    }
+    return codes, series
+
+
+def insert_columns(fred, codes):
+    # The previous implementation: grow an empty frame one column at a time
+    all_data = pd.DataFrame()
+    for code in codes:
+        all_data[code] = fred.get_series(f"{code}NA")
+    return all_data
+
+
+def main():
+    print(
+        f"{'series':>7} {'insert':>9} {'batched':>9} {'float32':>9} {'speedup':>8} {'MB':>12}"
+    )
+    for n_series in (50, 500, 5000):
+        codes, series = synthetic_inputs(n_series)
+        fred = InMemoryFred(series)
+
+        start = time.perf_counter()
+        with warnings.catch_warnings():
+            # pandas warns about the fragmentation this loop causes
+            warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+            inserted = insert_columns(fred, codes)
+        insert_time = time.perf_counter() - start
+
+        timings = {}
+        panels = {}
+        for dtype in (None, "float32"):
+            start = time.perf_counter()
+            panels[dtype] = collect_state_data(
+                api_key=None,
+                state_codes=codes,
+                series_suffix="NA",
+                requests_per_minute=None,
+                fred=fred,
+                dtype=dtype,
+            )
+            timings[dtype] = time.perf_counter() - start
+
+        assert panels[None].equals(inserted)
+        memory = [
+            panels[d].memory_usage(index=False).sum() / 1e6 for d in (None, "float32")
+        ]
+        print(
+            f"{n_series:7d} {insert_time:8.3f}s {timings[None]:8.3f}s "
+            f"{timings['float32']:8.3f}s {insert_time / timings[None]:7.1f}x "
+            f"{memory[0]:5.1f}/{memory[1]:5.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+End-to-end benchmark of the map pipeline: fetch, transform, merge, project, render.
+
+Every stage runs offline: series come from the FRED stub server and the
+regions are a synthetic grid of polygons, so panels of any size can be
+measured, from the 51 states up to the ~3,200 counties and from 1 to 500
+months. For each panel size the suite records the wall time and the peak
+memory of every stage and compares them with the stored baseline;
+the run exits with status 1 if a stage got slower or bigger than the
+tolerance allows. Stages or sizes the baseline has no entry for are
+listed as unchecked, so a stale baseline does not pass silently.
+
+Run from the repository root:
+
+    python -m src.benchmarks.bench_pipeline
+    python -m src.benchmarks.bench_pipeline --sizes 51x12 3200x120
+    python -m src.benchmarks.bench_pipeline --save-baseline
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import geopandas as gpd
+import matplotlib.pyplot as plt
+import pandas as pd
+from matplotlib.font_manager import FontProperties
+from shapely.geometry import box
+
+from src.benchmarks.fred_stub import start_stub_server, stub_fred_client
+from src.data.fetch_fred import collect_state_data
+from src.features.growth import compute_growth_metrics
+from src.instrumentation import memory_status, reset_peak_rss
+from src.visualization.choropleth import (
+    annotate_states,
+    bin_values,
+    merge_map_data,
+    plot_with_legend,
+)
+from src.visualization.geometry import prepare_geometry
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "pipeline_baseline.json")
+DEFAULT_SIZES = ["51x12", "51x500", "3200x120"]
+LAST_MONTH = "2024-12-01"
+
+
+def synthetic_regions(n_regions):
+    """
+    A grid of rectangular regions over the contiguous US, in EPSG:4326.
+
+    Returns:
+    - GeoDataFrame: One row per region with 'STUSPS', 'STATEFP', 'NAME' and
+      'geometry' columns.
+    """
+    columns = math.ceil(math.sqrt(n_regions * 2.4))
+    rows = math.ceil(n_regions / columns)
+    width, height = 58 / columns, 24 / rows
+    cells = [
+        box(
+            -125 + column * width,
+            25 + row * height,
+            -125 + (column + 1) * width,
+            25 + (row + 1) * height,
+        )
+        for row in range(rows)
+        for column in range(columns)
+    ][:n_regions]
+    codes = [f"R{i:04d}" for i in range(n_regions)]
+    return gpd.GeoDataFrame(
+        {"STUSPS": codes, "STATEFP": codes, "NAME": codes},
+        geometry=cells,
+        crs="EPSG:4326",
+    )
+
+
+def pipeline_stages(server, regions, n_months):
+    """
+    The stages of one pipeline run, each a function that takes and returns the run state.
+    """
+    start = pd.Timestamp(LAST_MONTH) - pd.DateOffset(months=n_months - 1)
+    fonts = dict.fromkeys(["title", "light", "medium"], FontProperties())
+
+    def fetch(state):
+        state["data"] = collect_state_data(
+            api_key=None,
+            state_codes=list(regions["STUSPS"]),
+            series_suffix="NA",
+            observation_start=start.strftime("%Y-%m-%d"),
+            max_workers=8,
+            requests_per_minute=None,
+            fred=stub_fred_client(server),
+        )
+        return state
+
+    def transform(state):
+        data = state["data"]
+        state["apc"] = data.pct_change(periods=12) * 100
+        with warnings.catch_warnings():
+            # Short panels have no year-on-year values to standardize
+            warnings.simplefilter("ignore", RuntimeWarning)
+            state["growth"] = compute_growth_metrics(data)
+        state["selected_row"] = state["apc"].iloc[-1]
+        pivoted = state["selected_row"].reset_index()
+        pivoted.columns = ["State", "apc"]
+        state["pivoted"] = pivoted
+        return state
+
+    def merge(state):
+        state["merged"] = merge_map_data(regions, state["selected_row"], "apc")
+        return state
+
+    def project(state):
+        state["projected"] = prepare_geometry(state["merged"])
+        return state
+
+    def render(state):
+        data = state["projected"].copy()
+        data["binned"] = bin_values(data["apc"])
+        fig, ax = plt.subplots(figsize=(5, 3.75), dpi=150)
+        plot_with_legend(data, ax, xlim=(-126, -66), ylim=(24, 50))
+        annotate_states(data, ax, value_col="apc", fonts=fonts)
+        ax.set_axis_off()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
+        plt.close(fig)
+        state["image_bytes"] = len(buffer.getvalue())
+        return state
+
+    return [fetch, transform, merge, project, render]
+
+
+def measure(stages):
+    """
+    Run the stages in order and record the time and peak memory of each one.
+
+    Peak memory is the highest RSS reached during the stage above the RSS it
+    started with. Where the kernel peak cannot be reset (outside Linux) the
+    peak of tracemalloc is used instead, which also slows the stage down.
+
+    Returns:
+    - dict: Stage name to {'seconds', 'peak_mb'}.
+    """
+    results = {}
+    state = {}
+    for stage in stages:
+        use_rss = reset_peak_rss()
+        if use_rss:
+            rss_before = memory_status("VmRSS")
+        else:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        state = stage(state)
+        seconds = time.perf_counter() - start
+
+        if use_rss:
+            peak = (memory_status("VmHWM") - rss_before) * 1024
+        else:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        results[stage.__name__] = {"seconds": seconds, "peak_mb": peak / 1e6}
+    return results
+
+
+def missing_from_baseline(results, baseline):
+    """
+    List the stages measured in this run that the baseline has no entry for.
+    """
+    return [
+        f"{size} {stage}"
+        for size, stages in results.items()
+        for stage in stages
+        if stage not in baseline.get(size, {})
+    ]
+
+
+def regressions(
+    results, baseline, tolerance, memory_tolerance, min_seconds=0.05, min_mb=5
+):
+    """
+    List the stages that are slower or use more memory than the baseline allows.
+
+    Small absolute differences are ignored, so millisecond stages do not fail on noise.
+    """
+    found = []
+    for size, stages in results.items():
+        for stage, result in stages.items():
+            base = baseline.get(size, {}).get(stage)
+            if base is None:
+                continue
+            if (
+                result["seconds"] > base["seconds"] * (1 + tolerance)
+                and result["seconds"] - base["seconds"] > min_seconds
+            ):
+                found.append(
+                    f"{size} {stage}: {result['seconds']:.3f}s "
+                    f"(baseline {base['seconds']:.3f}s)"
+                )
+            if (
+                result["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance)
+                and result["peak_mb"] - base["peak_mb"] > min_mb
+            ):
+                found.append(
+                    f"{size} {stage}: {result['peak_mb']:.1f} MB "
+                    f"(baseline {base['peak_mb']:.1f} MB)"
+                )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the map pipeline")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="Panel sizes as <regions>x<months>, e.g., 51x120",
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store this run as the baseline"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.5, help="Allowed relative slowdown"
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative growth of peak memory",
+    )
+    args = parser.parse_args()
+
+    server = start_stub_server(latency=0, series_start="1980-01-01")
+    results = {}
+    try:
+        for size in args.sizes:
+            n_regions, n_months = (int(part) for part in size.split("x"))
+            stages = pipeline_stages(server, synthetic_regions(n_regions), n_months)
+            results[size] = measure(stages)
+
+            print(f"{n_regions} regions x {n_months} months")
+            for stage, result in results[size].items():
+                print(
+                    f"  {stage:<10}{result['seconds']:9.3f}s"
+                    f"{result['peak_mb']:10.1f} MB peak"
+                )
+    finally:
+        server.shutdown()
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline first")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    missing = missing_from_baseline(results, baseline)
+    if missing:
+        print("Not in the baseline, unchecked (re-run with --save-baseline):")
+        for line in missing:
+            print(f"  {line}")
+    found = regressions(results, baseline, args.tolerance, args.memory_tolerance)
+    if found:
+        print("Regressions against the baseline:")
+        for line in found:
+            print(f"  {line}")
+        sys.exit(1)
+    print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
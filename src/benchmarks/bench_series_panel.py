@@ -0,0 +1,151 @@
+"""
+Benchmark the multi-series panel against fetching the series one suffix at a time.
+
+Every tracked series (STATE_SERIES) is fetched for every state from the FRED
+stub server, first with one `collect_state_data` call per suffix, as the
+single-series code would, then in one batch with `collect_series_panel`,
+alternately over a few repeats, and refreshed incrementally from a stored
+panel as the pipeline does. The run reports the best time of each and the
+memory of the panel, and checks that:
+
+- both give the same values;
+- the batch is no slower than the separate calls, within 10% for noise;
+- the incremental refresh gives the same panel as the full fetch;
+- the panel's memory is exactly series x states x dates x 4 bytes (float32);
+- per-series slices share memory with the panel, in memory and memory-mapped
+  from the store after a write and a read.
+
+The run exits with status 1 if any check fails. Run from the repository root:
+
+    python -m src.benchmarks.bench_series_panel
+    python -m src.benchmarks.bench_series_panel --latency 0.05 --workers 16
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from src.benchmarks.fred_stub import start_stub_server, stub_fred_client
+from src.data.fetch_fred import collect_state_data
+from src.data.incremental import merge_panel
+from src.data.series_panel import (
+    STATE_SERIES,
+    SeriesPanel,
+    collect_series_panel,
+    series_start_dates,
+)
+from src.data.storage import PanelStore
+from src.pipeline import STATE_CODES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the multi-series panel")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    suffixes = list(STATE_SERIES)
+    server = start_stub_server(latency=args.latency, series_start="2000-01-01")
+    try:
+        fred = stub_fred_client(server)
+        options = dict(
+            observation_start="2000-01-01",
+            max_workers=args.workers,
+            requests_per_minute=None,
+            fred=fred,
+        )
+
+        # Alternate which goes first, so neither gains from warming up the other
+        separate_seconds = batch_seconds = float("inf")
+        for repeat in range(args.repeats):
+            for run in ["separate", "batch"][:: 1 if repeat % 2 else -1]:
+                start = time.perf_counter()
+                if run == "separate":
+                    separate = {
+                        suffix: collect_state_data(None, STATE_CODES, suffix, **options)
+                        for suffix in suffixes
+                    }
+                    separate_seconds = min(
+                        separate_seconds, time.perf_counter() - start
+                    )
+                else:
+                    panel = collect_series_panel(None, STATE_CODES, suffixes, **options)
+                    batch_seconds = min(batch_seconds, time.perf_counter() - start)
+
+        # Refresh the panel as the pipeline does once it is stored
+        options["observation_start"] = series_start_dates(panel, STATE_CODES, suffixes)
+        start = time.perf_counter()
+        fresh = collect_series_panel(None, STATE_CODES, suffixes, **options)
+        merged, _ = merge_panel(panel.to_frame(), fresh.to_frame())
+        refreshed = SeriesPanel.from_frame(merged)
+        incremental_seconds = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    shape = panel.values.shape
+    print(
+        f"{shape[0]} series x {shape[1]} states x {shape[2]} months, "
+        f"{panel.nbytes / 1e6:.2f} MB ({panel.values.dtype})"
+    )
+    print(f"one call per series {separate_seconds:8.2f}s")
+    print(f"one batch           {batch_seconds:8.2f}s")
+    print(f"incremental refresh {incremental_seconds:8.2f}s")
+
+    failures = []
+    if batch_seconds > 1.1 * separate_seconds:
+        failures.append(
+            f"one batch took {batch_seconds:.2f}s, more than the "
+            f"{separate_seconds:.2f}s of one call per series"
+        )
+    if not (
+        refreshed.series_names == panel.series_names
+        and refreshed.states == panel.states
+        and refreshed.dates.equals(panel.dates)
+        and np.array_equal(refreshed.values, panel.values, equal_nan=True)
+    ):
+        failures.append("the incremental refresh differs from the full fetch")
+    for suffix, data in separate.items():
+        expected = data.reindex(panel.dates).to_numpy(dtype="float32")
+        if not np.array_equal(
+            panel.series(suffix).to_numpy(), expected, equal_nan=True
+        ):
+            failures.append(f"series {suffix} differs from the separate fetch")
+    expected_bytes = len(suffixes) * len(STATE_CODES) * len(panel.dates) * 4
+    if panel.nbytes != expected_bytes:
+        failures.append(f"panel uses {panel.nbytes} bytes, not {expected_bytes}")
+    if not all(
+        np.shares_memory(panel.series(suffix).to_numpy(), panel.values)
+        for suffix in suffixes
+    ):
+        failures.append("per-series slices copy the panel")
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = PanelStore(folder)
+        panel.write(store, "state_series")
+        stored = SeriesPanel.read(store, "state_series")
+        if not isinstance(stored.values, np.memmap):
+            failures.append("the stored panel is not memory-mapped")
+        if not np.array_equal(stored.values, panel.values, equal_nan=True):
+            failures.append("the stored panel differs from the fetched one")
+        if not np.shares_memory(stored.series("UR").to_numpy(), stored.values):
+            failures.append("per-series slices of the stored panel copy it")
+        row = store.read_row("state_series", panel.dates[-1].strftime("%Y-%m-%d"))
+        if not np.array_equal(
+            row.loc["UR"].to_numpy(), panel.series("UR").iloc[-1].to_numpy()
+        ):
+            failures.append("a month of one series read from the store differs")
+        del stored
+
+    if failures:
+        print("Multi-series panel checks failed:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark the vintage store against a pile of dated CSV snapshots.
+
+Two years of monthly pulls of a synthetic state panel are written as full CSV
+snapshots, as the extract scripts do. Every pull adds a month and revises the
+two before it, and the February pulls revise the whole previous year, like
+the annual benchmark revision. The snapshots are then imported into a
+`VintageStore`, and the run reports the size of both and the time to answer
+two questions from each:
+
+    as of      the panel as it was on the day of every pull
+    history    the revisions of one state and month, for random cells
+
+It checks that every panel and every history read from the store matches the
+snapshots, and exits with status 1 if any check fails. Run from the
+repository root:
+
+    python -m src.benchmarks.bench_vintages
+    python -m src.benchmarks.bench_vintages --pulls 48 --queries 500
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data.incremental import load_panel
+from src.data.vintages import VintageStore
+
+STATE_CODES = [f"S{i:02d}" for i in range(51)]
+
+
+def write_snapshots(folder, pulls, seed=0):
+    """
+    Write one full CSV snapshot per monthly pull, with revisions, and return their dates.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1984-01-01", "2023-12-01", freq="MS")
+    panel = pd.DataFrame(
+        rng.normal(0, 1, (len(dates), len(STATE_CODES))).cumsum(axis=0) + 1000,
+        index=dates,
+        columns=STATE_CODES,
+    ).round(1)
+    pull_dates = []
+    for pull in range(pulls):
+        month = panel.index[-1] + pd.offsets.MonthBegin()
+        panel.loc[month] = (panel.iloc[-1] + rng.normal(0, 1, len(STATE_CODES))).round(
+            1
+        )
+        revised = 13 if month.month == 1 else 3
+        panel.iloc[-revised:-1] += rng.normal(0, 0.5, (revised - 1, len(STATE_CODES)))
+        panel = panel.round(1)
+        pull_date = month + pd.DateOffset(months=1, days=7)
+        panel.to_csv(os.path.join(folder, f"employment_state_{pull_date:%Y%m%d}.csv"))
+        pull_dates.append(pull_date)
+    return pull_dates
+
+
+def folder_size(folder):
+    return sum(
+        os.path.getsize(os.path.join(parent, name))
+        for parent, _, names in os.walk(folder)
+        for name in names
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vintage store")
+    parser.add_argument("--pulls", type=int, default=24)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as folder:
+        snapshot_dir = os.path.join(folder, "snapshots")
+        os.makedirs(snapshot_dir)
+        pull_dates = write_snapshots(snapshot_dir, args.pulls)
+        paths = [
+            os.path.join(snapshot_dir, f"employment_state_{date:%Y%m%d}.csv")
+            for date in pull_dates
+        ]
+
+        store = VintageStore(os.path.join(folder, "vintages"))
+        start = time.perf_counter()
+        store.import_snapshots("employment_state", snapshot_dir, "employment_state_")
+        import_seconds = time.perf_counter() - start
+        pile_bytes = folder_size(snapshot_dir)
+        store_bytes = folder_size(os.path.join(folder, "vintages", "employment_state"))
+
+        # The panel as of every pull, from its snapshot and from the store
+        start = time.perf_counter()
+        snapshots = [load_panel(path) for path in paths]
+        csv_as_of_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        panels = [store.as_of("employment_state", date) for date in pull_dates]
+        store_as_of_seconds = time.perf_counter() - start
+        for date, snapshot, panel in zip(pull_dates, snapshots, panels):
+            if not panel.equals(snapshot):
+                failures.append(
+                    f"panel as of {date:%Y-%m-%d} differs from its snapshot"
+                )
+
+        # The revisions of random cells, by scanning every snapshot and from the store
+        rng = np.random.default_rng(1)
+        last = snapshots[-1]
+        cells = [
+            (
+                STATE_CODES[rng.integers(len(STATE_CODES))],
+                last.index[-rng.integers(1, 40)],
+            )
+            for _ in range(args.queries)
+        ]
+        # Even with every snapshot read once and kept in memory, each history
+        # needs one lookup per snapshot
+        start = time.perf_counter()
+        for state, month in cells:
+            [
+                snapshot.at[month, state]
+                for snapshot in snapshots
+                if month in snapshot.index
+            ]
+        csv_history_seconds = csv_as_of_seconds + time.perf_counter() - start
+        start = time.perf_counter()
+        histories = [
+            store.history("employment_state", state, f"{month:%Y-%m-%d}")
+            for state, month in cells
+        ]
+        store_history_seconds = time.perf_counter() - start
+        frame = pd.concat(
+            [
+                snapshot.stack().rename(date)
+                for date, snapshot in zip(pull_dates, snapshots)
+            ],
+            axis=1,
+        )
+        for (state, month), history in zip(cells, histories):
+            # The expected revisions: the value of every snapshot where it changed
+            reported = frame.loc[(month, state)].dropna()
+            expected = reported[reported.ne(reported.shift())]
+            if not np.array_equal(history.to_numpy(), expected.to_numpy()) or not (
+                history.index.equals(pd.DatetimeIndex(expected.index))
+            ):
+                failures.append(f"revisions of {state} {month:%Y-%m} differ")
+
+    print(
+        f"{args.pulls} pulls of {len(STATE_CODES)} states x {len(last)} months, "
+        f"imported in {import_seconds:.2f}s"
+    )
+    print(f"{'':<22}{'CSV snapshots':>15}{'vintage store':>15}")
+    print(f"{'size':<22}{pile_bytes / 1e6:14.2f}M{store_bytes / 1e6:14.2f}M")
+    print(
+        f"{f'as of, {len(pull_dates)} dates':<22}"
+        f"{csv_as_of_seconds:14.3f}s{store_as_of_seconds:14.3f}s"
+    )
+    print(
+        f"{f'history, {len(cells)} cells':<22}"
+        f"{csv_history_seconds:14.3f}s{store_history_seconds:14.3f}s"
+    )
+    if failures:
+        print("Vintage store checks failed:")
+        for line in failures[:20]:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Synthetic county shapefile for exercising the county map offline.
+
+The TIGER county shapefile is a large download, so the benchmarks cut the
+state polygons into a grid of cells instead. Every state gets a number of
+cells that grows with the square root of its area, about 3,200 in total like
+the real counties, and every cell gets a county FIPS code under its state's
+code. The cells tile each state exactly, so they share borders the way real
+counties do. Paired with the FRED stub server, which answers any series ID,
+the whole county pipeline runs without network access.
+"""
+
+import numpy as np
+import shapely
+
+from src.visualization.topology import simplify_geometries
+
+# About the number of US counties and county equivalents
+N_COUNTIES = 3200
+
+
+def grid_cells(shape, cell):
+    """
+    The polygonal parts of a square grid of the given cell size inside a shape.
+    """
+    minx, miny, maxx, maxy = shape.bounds
+    xs = np.arange(minx, maxx, cell)
+    ys = np.arange(miny, maxy, cell)
+    grid_x, grid_y = [a.ravel() for a in np.meshgrid(xs, ys)]
+    cells = shapely.box(grid_x, grid_y, grid_x + cell, grid_y + cell)
+    parts = shapely.intersection(cells, shape)
+    return parts[shapely.area(parts) > 0]
+
+
+def synthetic_counties(states, n_counties=N_COUNTIES):
+    """
+    Cut state polygons into grid cells that stand in for counties.
+
+    Parameters:
+    - states: GeoDataFrame read from the TIGER state shapefile.
+    - n_counties (int): Approximate number of counties to create.
+
+    Returns:
+    - GeoDataFrame: One row per county with GEOID, STATEFP, COUNTYFP, NAME and
+      geometry columns, in the CRS of the states.
+    """
+    import geopandas as gpd
+
+    areas = shapely.area(states.geometry.values)
+    shares = np.sqrt(areas) / np.sqrt(areas).sum()
+    counts = np.maximum(1, np.round(shares * n_counties)).astype(int)
+
+    # Drop the redundant detail of the shapefile to keep the cutting fast,
+    # keeping the borders between states shared
+    shapes = simplify_geometries(dict(enumerate(states.geometry)), 0.001)
+
+    rows = []
+    for i, (_, state) in enumerate(states.iterrows()):
+        shape, count = shapes[i], counts[i]
+        cell = np.sqrt(shape.area / count)
+        parts = grid_cells(shape, cell)
+        # Cells along the coast are partial, so retry once with larger cells
+        if len(parts) > count:
+            parts = grid_cells(shape, cell * np.sqrt(len(parts) / count))
+        for number, part in enumerate(parts, start=1):
+            polygons = [p for p in shapely.get_parts(part) if p.geom_type == "Polygon"]
+            code = f"{number * 2 - 1:03d}"  # county codes are odd numbers
+            rows.append(
+                {
+                    "GEOID": state["STATEFP"] + code,
+                    "STATEFP": state["STATEFP"],
+                    "COUNTYFP": code,
+                    "NAME": f"{state['STUSPS']} {number}",
+                    "geometry": shapely.multipolygons(polygons),
+                }
+            )
+    return gpd.GeoDataFrame(rows, crs=states.crs)
+
+
+def write_county_shapefile(state_shapefile_path, path, n_counties=N_COUNTIES):
+    """
+    Write a synthetic county shapefile built from the state shapefile.
+
+    Returns:
+    - str: The path written.
+    """
+    import geopandas as gpd
+
+    counties = synthetic_counties(gpd.read_file(state_shapefile_path), n_counties)
+    counties.to_file(path)
+    return path
@@ -0,0 +1,156 @@
+"""
+Local stand-in for the FRED observations endpoint.
+
+The server answers `/fred/series/observations` with the same XML that FRED
+returns, generating a deterministic monthly series for any series ID. It can
+add latency, reject unknown series and throttle or fail the first requests
+for a series, so the fetch code can be exercised offline. Unlike FRED, it tags
+every response with an ETag and answers a matching If-None-Match with 304,
+so the revalidation of `src.data.http_cache` can be exercised too.
+"""
+
+import hashlib
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+from fredapi import Fred
+
+
+def synthetic_series(series_id, start="1984-01-01", end="2024-12-01"):
+    """
+    Build a deterministic monthly series for a series ID.
+
+    Parameters:
+    - series_id (str): The FRED series ID used to seed the generator.
+    - start (str): First observation date (YYYY-MM-DD).
+    - end (str): Last observation date (YYYY-MM-DD).
+
+    Returns:
+    - pd.Series: Employment-like levels indexed by month start.
+    """
+    dates = pd.date_range(start, end, freq="MS")
+    rng = np.random.default_rng(zlib.crc32(series_id.encode()))
+    growth = rng.normal(0.0015, 0.004, len(dates))
+    values = rng.uniform(300, 15000) * np.exp(np.cumsum(growth))
+    return pd.Series(np.round(values, 1), index=dates)
+
+
+# FRED's messages for the statuses the first requests of a series can get
+THROTTLE_MESSAGES = {
+    403: "Forbidden.  The API key is not registered.",
+    429: "Too Many Requests.  Exceeded Rate Limit",
+    500: "Internal Server Error.",
+    503: "Service Unavailable.",
+}
+
+
+class FredStubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        series_id = params.get("series_id", "")
+
+        with server.lock:
+            server.request_count += 1
+            attempts = server.attempts.get(series_id, 0) + 1
+            server.attempts[series_id] = attempts
+
+        time.sleep(server.latency)
+
+        if not url.path.endswith("/series/observations"):
+            self.send_error_xml(404, "Not Found.")
+        elif series_id in server.missing_series:
+            self.send_error_xml(400, "Bad Request.  The series does not exist.")
+        elif attempts <= server.throttle_first:
+            self.send_error_xml(
+                server.throttle_status, THROTTLE_MESSAGES[server.throttle_status]
+            )
+        else:
+            data = synthetic_series(series_id, start=server.series_start)
+            if "observation_start" in params:
+                data = data[data.index >= params["observation_start"]]
+            if "observation_end" in params:
+                data = data[data.index <= params["observation_end"]]
+            rows = "".join(
+                f'<observation date="{date:%Y-%m-%d}" value="{value}"/>'
+                for date, value in data.items()
+            )
+            self.send_xml(200, f"<observations>{rows}</observations>")
+
+    def send_error_xml(self, status, message):
+        self.send_xml(status, f'<error code="{status}" message="{message}"/>')
+
+    def send_xml(self, status, body):
+        payload = f'<?xml version="1.0" encoding="utf-8"?>{body}'.encode()
+        etag = f'"{hashlib.sha256(payload).hexdigest()[:16]}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            with self.server.lock:
+                self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        with self.server.lock:
+            self.server.bytes_sent += len(payload)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        if status == 200:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(
+    latency=0.1,
+    missing_series=(),
+    throttle_first=0,
+    series_start="1984-01-01",
+    throttle_status=429,
+):
+    """
+    Start the stub server on a free local port in a background thread.
+
+    Parameters:
+    - latency (float): Seconds to wait before answering each request.
+    - missing_series (iterable): Series IDs answered with FRED's "does not exist" error.
+    - throttle_first (int): Number of requests per series answered with an error first.
+    - series_start (str): First observation date of every series (YYYY-MM-DD).
+    - throttle_status (int): HTTP status of those errors, a key of THROTTLE_MESSAGES.
+
+    Returns:
+    - ThreadingHTTPServer: The running server. Call `shutdown()` when done.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FredStubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.missing_series = set(missing_series)
+    server.throttle_first = throttle_first
+    server.throttle_status = throttle_status
+    server.series_start = series_start
+    server.request_count = 0
+    server.bytes_sent = 0
+    server.not_modified = 0
+    server.attempts = {}
+    server.lock = threading.Lock()
+    server.root_url = f"http://127.0.0.1:{server.server_port}/fred"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stub_fred_client(server):
+    """
+    Create a FRED client whose requests go to the stub server.
+    """
+    fred = Fred(api_key="stub")
+    fred.root_url = server.root_url
+    return fred
@@ -0,0 +1,136 @@
+"""
+County employment from the BLS Local Area Unemployment Statistics (LAUS) on FRED.
+
+Every county series is keyed by the county's five-digit FIPS code, the same
+GEOID used by the TIGER county shapefile, so the panel joins onto the
+geometries without a lookup table:
+
+    LAUCN<FIPS>00000000<measure>    e.g., LAUCN481130000000005, employment in Dallas County, TX
+
+FIPS codes are strings. Read as numbers they lose their leading zero (Alabama
+is 01), so `normalize_fips` pads them back before any join.
+"""
+
+import pandas as pd
+
+from src.data.fetch_fred import FRED_REQUESTS_PER_MINUTE, collect_state_data
+
+# Prefix of the county series IDs
+LAUS_PREFIX = "LAUCN"
+
+# LAUS measure codes, the last two digits of the series ID
+LAUS_MEASURES = {
+    "unemployment_rate": "03",
+    "unemployment": "04",
+    "employment": "05",
+    "labor_force": "06",
+}
+
+# County series start in 1990
+COUNTY_START = "1990-01-01"
+
+# State FIPS codes above this are territories, which LAUS covers unevenly
+LAST_STATE_FIPS = "56"
+
+
+def normalize_fips(codes):
+    """
+    Turn FIPS codes read as numbers or strings into five-digit strings.
+
+    Parameters:
+    - codes (iterable): FIPS codes, e.g., [1001, '1003', '06037', 48113.0].
+
+    Returns:
+    - list: Zero-padded codes, e.g., ['01001', '01003', '06037', '48113'].
+    """
+    codes = pd.Series(list(codes), dtype=object).astype(str)
+    return codes.str.replace(r"\.0$", "", regex=True).str.zfill(5).tolist()
+
+
+def laus_suffix(measure):
+    """
+    The part of a county series ID after the FIPS code, e.g., '0000000005' for employment.
+    """
+    return f"00000000{LAUS_MEASURES[measure]}"
+
+
+def county_series_id(fips, measure="employment"):
+    """
+    The FRED ID of a county LAUS series, e.g., 'LAUCN481130000000005'.
+    """
+    return f"{LAUS_PREFIX}{fips}{laus_suffix(measure)}"
+
+
+def county_fips(shapefile_path, include_territories=False):
+    """
+    Read the FIPS codes of every county from a TIGER county shapefile.
+
+    Only the attribute table is read, not the geometries.
+
+    Parameters:
+    - shapefile_path (str): Path to the county shapefile, e.g., tl_2023_us_county.shp.
+    - include_territories (bool): Keep Puerto Rico and the island areas.
+
+    Returns:
+    - list: Sorted five-digit FIPS codes.
+    """
+    import geopandas as gpd
+
+    table = gpd.read_file(
+        shapefile_path, columns=["GEOID", "STATEFP"], ignore_geometry=True
+    )
+    if not include_territories:
+        table = table[table["STATEFP"] <= LAST_STATE_FIPS]
+    return sorted(normalize_fips(table["GEOID"]))
+
+
+def collect_county_data(
+    api_key,
+    fips_codes,
+    measure="employment",
+    observation_start=COUNTY_START,
+    max_workers=8,
+    requests_per_minute=FRED_REQUESTS_PER_MINUTE,
+    max_retries=3,
+    fred=None,
+    dtype="float32",
+):
+    """
+    Retrieve one LAUS measure for every county and compile it into a single DataFrame.
+
+    The requests go through `collect_state_data`, so they share its rate limit,
+    retries and batched assembly. About 3,200 counties take half an hour at the
+    default rate limit; use an incremental `observation_start` for updates.
+
+    Parameters:
+    - api_key (str): Your FRED API key.
+    - fips_codes (list): County FIPS codes, e.g., from `county_fips`.
+    - measure (str): One of LAUS_MEASURES.
+    - observation_start (str or dict): The start date for retrieving data (YYYY-MM-DD),
+      or a mapping of FIPS code to start date.
+    - max_workers (int): Number of concurrent requests.
+    - requests_per_minute (float): Sustained request rate. None disables rate limiting.
+    - max_retries (int): Number of retries for each series after a transient failure.
+    - fred (Fred): Optional pre-configured FRED client, e.g., pointed at a stub server.
+    - dtype (str): dtype of the panel; float32 by default to halve its memory use.
+
+    Returns:
+    - pd.DataFrame: Panel indexed by date with one column per FIPS code.
+    """
+    fips_codes = normalize_fips(fips_codes)
+    if isinstance(observation_start, dict):
+        observation_start = dict(
+            zip(normalize_fips(observation_start), observation_start.values())
+        )
+    return collect_state_data(
+        api_key,
+        fips_codes,
+        series_suffix=laus_suffix(measure),
+        observation_start=observation_start,
+        max_workers=max_workers,
+        requests_per_minute=requests_per_minute,
+        max_retries=max_retries,
+        fred=fred,
+        dtype=dtype,
+        series_prefix=LAUS_PREFIX,
+    )
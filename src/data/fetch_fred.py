@@ -0,0 +1,256 @@
+import random
+import threading
+import time
+import urllib.error
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# FRED allows 120 requests per minute for each API key. No 60 second window
+# can hold more requests than the burst plus a minute of refill, so the
+# default bucket refills at 60 requests per minute with a burst of 60: one
+# sweep of the 56 state series goes out at once, at the concurrency of the
+# workers, and longer batches are paced at one request per second.
+FRED_LIMIT_PER_MINUTE = 120
+FRED_REQUESTS_PER_MINUTE = 60
+FRED_BURST = 60
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to keep request rates under an API limit.
+
+    Parameters:
+    - rate (float): Number of tokens added per second.
+    - capacity (int): Maximum number of tokens that can be stored (the burst size).
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a token is available and consume it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                # Refill the bucket for the time elapsed since the last call
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def http_status(error):
+    """
+    HTTP status code of a failed request, or None if it got no HTTP answer.
+
+    fredapi raises HTTP errors again as ValueError(message) while handling
+    them, so the original error, with its code, is the context.
+    """
+    for cause in (error, error.__context__):
+        if isinstance(cause, urllib.error.HTTPError):
+            return cause.code
+    return None
+
+
+def is_retryable(error):
+    """
+    Decide whether a failed FRED request is worth retrying.
+
+    Throttling (429) and server errors (5xx) are retried, as are network
+    errors and unparseable responses. Other HTTP errors, e.g., 400 for a
+    series that does not exist or a bad API key, are not.
+    """
+    status = http_status(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    if isinstance(error, (OSError, ET.ParseError)):
+        return True
+    if isinstance(error, ValueError):
+        return "does not exist" not in str(error)
+    return False
+
+
+def fetch_series(
+    fred,
+    series_id,
+    observation_start=None,
+    rate_limiter=None,
+    max_retries=3,
+    backoff=1.0,
+    **kwargs,
+):
+    """
+    Retrieve a single series from FRED, retrying transient failures with exponential backoff.
+
+    Parameters:
+    - fred (Fred): FRED client used for the request.
+    - series_id (str): The FRED series ID, e.g., 'TXNA'.
+    - observation_start (str): The start date for retrieving data (YYYY-MM-DD).
+    - rate_limiter (TokenBucket): Optional limiter acquired before every attempt.
+    - max_retries (int): Number of retries after the first failed attempt.
+    - backoff (float): Base delay in seconds, doubled on every retry.
+    - kwargs: Further FRED observation parameters, e.g., sort_order='desc', limit=24.
+
+    Returns:
+    - pd.Series: Observations for the series, indexed by date.
+    """
+    for attempt in range(max_retries + 1):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            return fred.get_series(
+                series_id, observation_start=observation_start, **kwargs
+            )
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            # Exponential backoff with jitter so parallel workers do not retry in lockstep
+            time.sleep(backoff * 2**attempt * (1 + random.random()))
+
+
+def fetch_many(
+    fred,
+    series_ids,
+    observation_start=None,
+    max_workers=1,
+    requests_per_minute=FRED_REQUESTS_PER_MINUTE,
+    max_retries=3,
+):
+    """
+    Retrieve many series in one batch that shares a rate limit and a pool of workers.
+
+    Parameters:
+    - fred (Fred): FRED client used for the requests.
+    - series_ids (list): FRED series IDs, e.g., ['TXNA', 'TXUR'].
+    - observation_start (str or dict): The start date for retrieving data (YYYY-MM-DD),
+      or a mapping of series ID to start date.
+    - max_workers (int): Number of concurrent requests. 1 fetches the series one after another.
+    - requests_per_minute (float): Sustained request rate allowed by the token bucket.
+      None disables rate limiting.
+    - max_retries (int): Number of retries for each series after a transient failure.
+
+    Returns:
+    - list: The observations of each series in the order of `series_ids`, None
+      where the series could not be retrieved.
+    """
+    # Share one limiter between all workers so the API key limit holds overall.
+    # The burst is what the limit leaves over a minute at the sustained rate.
+    rate_limiter = None
+    if requests_per_minute is not None:
+        rate_limiter = TokenBucket(
+            rate=requests_per_minute / 60,
+            capacity=max(
+                1, min(FRED_BURST, FRED_LIMIT_PER_MINUTE - requests_per_minute)
+            ),
+        )
+
+    def fetch(series_id):
+        if isinstance(observation_start, dict):
+            start = observation_start[series_id]
+        else:
+            start = observation_start
+        try:
+            return fetch_series(
+                fred,
+                series_id,
+                observation_start=start,
+                rate_limiter=rate_limiter,
+                max_retries=max_retries,
+            )
+        except Exception as e:
+            print(f"Error retrieving data for {series_id}: {e}")
+            return None
+
+    # Retrieve every series, concurrently when more than one worker is requested
+    if max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(fetch, series_ids))
+    return [fetch(series_id) for series_id in series_ids]
+
+
+def collect_state_data(
+    api_key,
+    state_codes,
+    series_suffix,
+    observation_start="2000-01-01",
+    max_workers=1,
+    requests_per_minute=FRED_REQUESTS_PER_MINUTE,
+    max_retries=3,
+    fred=None,
+    dtype=None,
+    series_prefix="",
+):
+    """
+    Retrieve employment data for each US state from FRED API and compile into a single DataFrame.
+
+    Parameters:
+    - api_key (str): Your FRED API key.
+    - state_codes (list): List of state codes, e.g., ['TX', 'CA', 'NY', ...].
+    - series_suffix (str): The suffix for the FRED series ID.
+    - observation_start (str or dict): The start date for retrieving data (YYYY-MM-DD),
+      or a mapping of state code to start date to request a different window per state.
+    - max_workers (int): Number of concurrent requests. 1 fetches the states one after another.
+    - requests_per_minute (float): Sustained request rate allowed by the token bucket.
+      None disables rate limiting.
+    - max_retries (int): Number of retries for each series after a transient failure.
+    - fred (Fred): Optional pre-configured FRED client, e.g., pointed at a stub server.
+    - dtype (str): Optional dtype for the panel, e.g., 'float32' to halve its memory use.
+    - series_prefix (str): Text before the code in the series ID, e.g., 'LAUCN' for
+      the county series built by `src.data.counties`.
+
+    Returns:
+    - pd.DataFrame: DataFrame with employment data for each state, indexed by date.
+    """
+    # Initialize FRED client
+    if fred is None:
+        from fredapi import Fred
+
+        fred = Fred(api_key=api_key)
+
+    # Construct the series IDs
+    series_ids = [
+        f"{series_prefix}{state_code}{series_suffix}" for state_code in state_codes
+    ]
+    if isinstance(observation_start, dict):
+        observation_start = {
+            series_id: observation_start[state_code]
+            for series_id, state_code in zip(series_ids, state_codes)
+        }
+    results = fetch_many(
+        fred,
+        series_ids,
+        observation_start=observation_start,
+        max_workers=max_workers,
+        requests_per_minute=requests_per_minute,
+        max_retries=max_retries,
+    )
+
+    # Build the panel in one aligned step instead of inserting column by column.
+    # The series may start at different dates when per-state windows are used,
+    # so they are aligned on the sorted union of their dates.
+    series = {
+        state_code: data
+        for state_code, data in zip(state_codes, results)
+        if data is not None
+    }
+    if not series:
+        return pd.DataFrame()
+    all_data = pd.concat(series, axis=1, sort=True)
+
+    if dtype is not None:
+        all_data = all_data.astype(dtype, copy=False)
+
+    return all_data
@@ -0,0 +1,260 @@
+"""
+On-disk cache of FRED responses, so reruns do not download the same series again.
+
+The cache sits under the FRED client: `ResponseCache.attach` routes every
+request a `fredapi.Fred` makes through `ResponseCache.fetch`. Each response is
+stored under a hash of its URL without the API key, which holds the series ID
+and every query parameter, as two files:
+
+    <cache_dir>/<key>.xml     the response body
+    <cache_dir>/<key>.json    URL, ETag, Last-Modified and the time it was stored
+
+A response younger than the TTL is served from disk without any request.
+An older one is revalidated: the request carries its ETag or Last-Modified,
+and a 304 answer renews it without a download. FRED itself answers every
+request in full, so there the TTL is what saves the requests. The body's
+modification time records its last use, and the least recently used
+responses are deleted when the cache grows over its size cap.
+
+Inspect or empty the cache with:
+
+    python -m src.data.http_cache stats
+    python -m src.data.http_cache clear
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+
+HTTP_CACHE_DIR = "data/interim/http_cache"
+
+# Responses younger than this are used without asking FRED, in seconds
+DEFAULT_TTL = 12 * 3600
+
+# Largest size of the cached responses before the least recently used go, in bytes
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def cache_key(url):
+    """
+    Key of a request: a hash of its URL without the API key.
+    """
+    url = re.sub(r"[&?]api_key=[^&]*", "", url)
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe on-disk cache of HTTP responses with a TTL and a size cap.
+
+    Parameters:
+    - cache_dir (str): Folder of the cached responses, created if needed.
+    - ttl (float): Seconds during which a response is used without a request.
+    - max_bytes (int): Size of the cached bodies above which the least recently
+      used are evicted.
+    """
+
+    def __init__(
+        self, cache_dir=HTTP_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES
+    ):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "revalidated": 0, "evictions": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self.sizes = {
+            name[: -len(".xml")]: os.path.getsize(os.path.join(cache_dir, name))
+            for name in os.listdir(cache_dir)
+            if name.endswith(".xml")
+        }
+        self.total = sum(self.sizes.values())
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".xml", base + ".json"
+
+    def stats(self):
+        """
+        Hit, miss, revalidation and eviction counts, and the number and size of the entries.
+        """
+        with self.lock:
+            return {
+                **self.counters,
+                "entries": len(self.sizes),
+                "bytes": self.total,
+            }
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def load(self, key):
+        """
+        The stored body and metadata of a key, or None if it is not cached.
+        """
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+            # The modification time of the body is its last use, for the eviction
+            os.utime(body_path)
+        except (OSError, ValueError):
+            return None
+        return body, meta
+
+    def store(self, key, body, meta):
+        """
+        Write a response, then evict the least recently used ones over the size cap.
+        """
+        body_path, meta_path = self._paths(key)
+        for path, data in ((body_path, body), (meta_path, json.dumps(meta).encode())):
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        with self.lock:
+            self.total += len(body) - self.sizes.get(key, 0)
+            self.sizes[key] = len(body)
+            if self.total > self.max_bytes:
+                self._evict(keep=key)
+
+    def _evict(self, keep):
+        # Oldest use first, down to 90% of the cap so the scan is not repeated
+        # on every write; the response just stored always stays
+        last_used = {}
+        for key in self.sizes:
+            try:
+                last_used[key] = os.path.getmtime(self._paths(key)[0])
+            except OSError:
+                last_used[key] = 0
+        for key in sorted(last_used, key=last_used.get):
+            if self.total <= 0.9 * self.max_bytes:
+                break
+            if key != keep:
+                self._remove(key)
+                self.counters["evictions"] += 1
+
+    def _remove(self, key):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.total -= self.sizes.pop(key)
+
+    def fetch(self, url, api_key=None):
+        """
+        Return the XML body of a GET request, from the cache when it is fresh.
+
+        Parameters:
+        - url (str): Request URL without the API key.
+        - api_key (str): Appended to the URL of requests that reach the server.
+
+        Returns:
+        - bytes: The response body.
+        """
+        key = cache_key(url)
+        cached = self.load(key)
+        if cached is not None and time.time() - cached[1]["stored"] < self.ttl:
+            self._count("hits")
+            return cached[0]
+
+        headers = {}
+        if cached is not None:
+            if cached[1].get("etag"):
+                headers["If-None-Match"] = cached[1]["etag"]
+            if cached[1].get("last_modified"):
+                headers["If-Modified-Since"] = cached[1]["last_modified"]
+        full_url = url if api_key is None else f"{url}&api_key={api_key}"
+        try:
+            response = urllib.request.urlopen(
+                urllib.request.Request(full_url, headers=headers)
+            )
+        except urllib.error.HTTPError as error:
+            if error.code != 304 or cached is None:
+                raise
+            # Not modified: the stored body is current for another TTL
+            body, meta = cached
+            self._count("revalidated")
+            self.store(key, body, {**meta, "stored": time.time()})
+            return body
+
+        body = response.read()
+        self._count("misses")
+        self.store(
+            key,
+            body,
+            {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "stored": time.time(),
+            },
+        )
+        return body
+
+    def attach(self, fred):
+        """
+        Route the requests of a `fredapi.Fred` client through the cache.
+
+        fredapi sends every request through its private `__fetch_data`, which
+        is replaced on this client only; errors are raised as fredapi does.
+        A client without it, e.g., from a fredapi release that renamed it,
+        is rejected rather than left silently uncached.
+
+        Returns:
+        - Fred: The same client.
+        """
+        if not callable(getattr(fred, "_Fred__fetch_data", None)):
+            raise TypeError(
+                f"Cannot cache the requests of {type(fred).__name__}: it has no "
+                "fredapi Fred.__fetch_data method to route them through"
+            )
+        fred._Fred__fetch_data = functools.partial(self._fetch_xml, fred)
+        return fred
+
+    def _fetch_xml(self, fred, url):
+        try:
+            body = self.fetch(url, fred.api_key)
+        except urllib.error.HTTPError as error:
+            root = ET.fromstring(error.read())
+            raise ValueError(root.get("message"))
+        return ET.fromstring(body)
+
+    def clear(self):
+        """
+        Delete every cached response.
+        """
+        with self.lock:
+            for key in list(self.sizes):
+                self._remove(key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the FRED response cache")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--cache-dir", default=HTTP_CACHE_DIR)
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.cache_dir)
+    if args.command == "clear":
+        cache.clear()
+    stats = cache.stats()
+    print(
+        f"{stats['entries']} responses, {stats['bytes'] / 1e6:.1f} MB in {args.cache_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
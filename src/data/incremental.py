@@ -0,0 +1,121 @@
+import os
+import re
+
+import pandas as pd
+
+# Number of trailing months re-requested for every series to pick up revisions.
+# BLS revises the two previous months every release and re-benchmarks the
+# state series once a year, so a year and a bit covers both.
+REVISION_MONTHS = 13
+
+
+def latest_snapshot(directory, prefix):
+    """
+    Find the most recent dated snapshot written by the extract scripts.
+
+    Parameters:
+    - directory (str): Folder containing the snapshots.
+    - prefix (str): File name prefix before the date, e.g., 'employment_state_'.
+
+    Returns:
+    - str or None: Path of the snapshot with the latest YYYYMMDD date, or None if there is none.
+    """
+    pattern = re.compile(rf"^{re.escape(prefix)}(\d{{8}})\.csv$")
+    snapshots = [
+        (match.group(1), name)
+        for name in os.listdir(directory)
+        if (match := pattern.match(name))
+    ]
+    if not snapshots:
+        return None
+    return os.path.join(directory, max(snapshots)[1])
+
+
+def load_panel(path):
+    """
+    Read a date-indexed panel written by the extract scripts.
+    """
+    return pd.read_csv(
+        path, index_col=0, parse_dates=True, float_precision="round_trip"
+    )
+
+
+def incremental_start_dates(
+    stored, state_codes, revision_months=REVISION_MONTHS, default_start="1984-01-01"
+):
+    """
+    Work out the first observation date to request for each state.
+
+    Parameters:
+    - stored (pd.DataFrame): Previously stored panel, indexed by date.
+    - state_codes (list): List of state codes to fetch.
+    - revision_months (int): Number of months before the latest stored observation to re-request.
+    - default_start (str): Start date for states that have nothing stored yet (YYYY-MM-DD).
+
+    Returns:
+    - dict: Mapping of state code to start date (YYYY-MM-DD).
+    """
+    last_observation = stored.apply(pd.Series.last_valid_index)
+
+    start_dates = {}
+    for state_code in state_codes:
+        last = last_observation.get(state_code)
+        if last is None or pd.isna(last):
+            start_dates[state_code] = default_start
+        else:
+            start = last - pd.DateOffset(months=revision_months)
+            start_dates[state_code] = start.strftime("%Y-%m-%d")
+    return start_dates
+
+
+def merge_panel(stored, fresh):
+    """
+    Merge freshly fetched observations into the stored panel.
+
+    Fresh values replace stored ones, so revisions inside the requested window are kept.
+
+    Parameters:
+    - stored (pd.DataFrame): Previously stored panel, indexed by date.
+    - fresh (pd.DataFrame): Recently fetched observations, indexed by date.
+
+    Returns:
+    - tuple: The merged panel and the earliest date whose values changed (None if nothing changed).
+    """
+    merged = fresh.combine_first(stored)
+    # Keep the stored column order and append any new states at the end
+    columns = list(stored.columns) + [c for c in fresh.columns if c not in stored]
+    merged = merged[columns]
+
+    # Compare against the stored panel on the merged index to find changed rows
+    previous = stored.reindex(index=merged.index, columns=merged.columns)
+    changed = (merged != previous) & ~(merged.isna() & previous.isna())
+    changed_rows = changed.any(axis=1)
+    changed_from = changed_rows.idxmax() if changed_rows.any() else None
+    return merged, changed_from
+
+
+def update_annual_pct_change(stored_apc, data, changed_from, periods=12):
+    """
+    Recompute the annual percent change only for rows affected by new or revised data.
+
+    Parameters:
+    - stored_apc (pd.DataFrame): Previously computed percent changes, indexed by date.
+    - data (pd.DataFrame): Merged employment panel, indexed by date.
+    - changed_from (Timestamp): Earliest date whose values changed, or None.
+    - periods (int): Number of periods for the percent change (12 for year-on-year).
+
+    Returns:
+    - pd.DataFrame: Percent changes for the full panel.
+    """
+    if changed_from is None:
+        return stored_apc.reindex(index=data.index, columns=data.columns)
+
+    # A change in row i affects the percent changes of rows i to i + periods, so
+    # rows before it are reused and only the tail is computed, starting from
+    # the `periods` rows it needs for its base values
+    position = data.index.get_loc(changed_from)
+    window = data.iloc[max(position - periods, 0) :]
+    recomputed = (window.pct_change(periods=periods) * 100).loc[changed_from:]
+
+    kept = stored_apc.reindex(columns=data.columns).loc[stored_apc.index < changed_from]
+    return pd.concat([kept, recomputed])
@@ -0,0 +1,237 @@
+"""
+Several FRED series for every state, kept as one (series, state, date) panel.
+
+FRED names the state series by the state code followed by a suffix, so a
+list of suffixes and a list of states make a grid of series IDs:
+
+    TXNA    total nonfarm employment in Texas
+    TXUR    unemployment rate in Texas
+    CAMFG   manufacturing employment in California
+
+`collect_series_panel` fetches the whole grid in one batch through
+`fetch_many`, so all requests share one rate limit and one pool of workers
+that stays busy across suffixes, and writes the observations straight into
+a single preallocated array. Given a stored panel, `series_start_dates`
+works out the revision window of every series so only that is requested. Its
+memory use is known before the first request: series x states x dates x
+the size of the dtype, 4 bytes by default.
+
+The array is laid out series by series, so each series is one contiguous
+(state, date) block. `SeriesPanel.series` returns it as the usual date x
+state DataFrame without copying, which the growth metrics and the map code
+take as they are, and the panel is stored with its (series, state)
+MultiIndex columns as one dataset of the `PanelStore`, from which it is
+memory-mapped back in the same layout.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.data.fetch_fred import FRED_REQUESTS_PER_MINUTE, fetch_many
+from src.data.incremental import REVISION_MONTHS, incremental_start_dates
+
+# Suffixes of the state series tracked by the project and their descriptions
+STATE_SERIES = {
+    "NA": "Total nonfarm employment",
+    "UR": "Unemployment rate",
+    "LF": "Civilian labor force",
+    "MFG": "Manufacturing employment",
+    "CONS": "Construction employment",
+    "GOVT": "Government employment",
+}
+
+# Names of the column levels of a multi-series panel
+LEVELS = ["series", "state"]
+
+
+class SeriesPanel:
+    """
+    Values of several series for several states, as one (series, state, date) array.
+
+    Parameters:
+    - values (np.ndarray): Array shaped (series, state, date), C-contiguous.
+    - series (list): Series suffixes, e.g., ['NA', 'UR'].
+    - states (list): State codes.
+    - dates (pd.DatetimeIndex): Observation dates.
+    """
+
+    def __init__(self, values, series, states, dates):
+        if values.shape != (len(series), len(states), len(dates)):
+            raise ValueError(
+                f"values of shape {values.shape} do not match {len(series)} series, "
+                f"{len(states)} states and {len(dates)} dates"
+            )
+        self.values = values
+        self.series_names = list(series)
+        self.states = list(states)
+        self.dates = pd.DatetimeIndex(dates)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    def series(self, suffix):
+        """
+        One series for every state, as a panel indexed by date, without copying.
+
+        Parameters:
+        - suffix (str): Series suffix, e.g., 'UR'.
+
+        Returns:
+        - pd.DataFrame: Panel indexed by date with one column per state, a view
+          of the panel's array.
+        """
+        block = self.values[self.series_names.index(suffix)]
+        return pd.DataFrame(block.T, index=self.dates, columns=self.states, copy=False)
+
+    def state(self, code):
+        """
+        Every series of one state, as a DataFrame indexed by date with one column per series.
+        """
+        block = self.values[:, self.states.index(code)]
+        return pd.DataFrame(
+            block.T, index=self.dates, columns=self.series_names, copy=False
+        )
+
+    def to_frame(self):
+        """
+        The panel as a DataFrame indexed by date with (series, state) columns, without copying.
+        """
+        columns = pd.MultiIndex.from_product(
+            [self.series_names, self.states], names=LEVELS
+        )
+        flat = self.values.reshape(len(columns), len(self.dates))
+        return pd.DataFrame(flat.T, index=self.dates, columns=columns, copy=False)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        Build a panel from a DataFrame indexed by date with (series, state) columns.
+
+        Missing (series, state) pairs are filled with NaN.
+        """
+        series = list(frame.columns.unique(0))
+        states = list(frame.columns.unique(1))
+        columns = pd.MultiIndex.from_product([series, states], names=LEVELS)
+        values = frame.reindex(columns=columns).to_numpy().T
+        shape = (len(series), len(states), len(frame))
+        return cls(
+            np.ascontiguousarray(values).reshape(shape), series, states, frame.index
+        )
+
+    def write(self, store, name, snapshot_date=None):
+        """
+        Store the panel as one dataset, skipping the write if it is unchanged.
+
+        Returns:
+        - bool: True if the dataset was written.
+        """
+        return store.write(name, self.to_frame(), snapshot_date=snapshot_date)
+
+    @classmethod
+    def read(cls, store, name):
+        """
+        Memory-map a panel written by `write`; only the series used are read from disk.
+        """
+        values, dates, columns = store.read_values(name)
+        series = list(columns.unique(0))
+        states = list(columns.unique(1))
+        shape = (len(series), len(states), len(dates))
+        return cls(values.reshape(shape), series, states, dates)
+
+
+def series_ids(suffixes, state_codes):
+    """
+    FRED IDs of every (series, state) pair, series by series as in the panel.
+    """
+    return [f"{state}{suffix}" for suffix in suffixes for state in state_codes]
+
+
+def series_start_dates(
+    stored,
+    state_codes,
+    suffixes=tuple(STATE_SERIES),
+    revision_months=REVISION_MONTHS,
+    default_start="1990-01-01",
+):
+    """
+    Work out the first observation date to request for each series of a stored panel.
+
+    Parameters:
+    - stored (SeriesPanel): Previously stored panel.
+    - state_codes (list): List of state codes to fetch.
+    - suffixes (list): Series suffixes to fetch; defaults to STATE_SERIES.
+    - revision_months (int): Number of months before the latest stored observation to re-request.
+    - default_start (str): Start date for series that have nothing stored yet (YYYY-MM-DD).
+
+    Returns:
+    - dict: Mapping of series ID (e.g., 'TXUR') to start date (YYYY-MM-DD).
+    """
+    frame = stored.to_frame()
+    frame.columns = [f"{state}{suffix}" for suffix, state in frame.columns]
+    return incremental_start_dates(
+        frame,
+        series_ids(suffixes, state_codes),
+        revision_months=revision_months,
+        default_start=default_start,
+    )
+
+
+def collect_series_panel(
+    api_key,
+    state_codes,
+    suffixes=tuple(STATE_SERIES),
+    observation_start="2000-01-01",
+    max_workers=8,
+    requests_per_minute=FRED_REQUESTS_PER_MINUTE,
+    max_retries=3,
+    fred=None,
+    dtype="float32",
+):
+    """
+    Retrieve every (series, state) pair of a grid in one batch and compile them into a panel.
+
+    Parameters:
+    - api_key (str): Your FRED API key.
+    - state_codes (list): List of state codes, e.g., ['TX', 'CA', 'NY', ...].
+    - suffixes (list): Series suffixes, e.g., ['NA', 'UR']; defaults to STATE_SERIES.
+    - observation_start (str or dict): The start date for retrieving data (YYYY-MM-DD),
+      or a mapping of series ID (e.g., 'TXUR') to start date.
+    - max_workers (int): Number of concurrent requests.
+    - requests_per_minute (float): Sustained request rate. None disables rate limiting.
+    - max_retries (int): Number of retries for each series after a transient failure.
+    - fred (Fred): Optional pre-configured FRED client, e.g., pointed at a stub server.
+    - dtype (str): dtype of the panel; float32 by default to halve its memory use.
+
+    Returns:
+    - SeriesPanel: Every series for every state on the union of their dates,
+      NaN where a series has no observation or could not be retrieved.
+    """
+    if fred is None:
+        from fredapi import Fred
+
+        fred = Fred(api_key=api_key)
+
+    suffixes, state_codes = list(suffixes), list(state_codes)
+    results = fetch_many(
+        fred,
+        series_ids(suffixes, state_codes),
+        observation_start=observation_start,
+        max_workers=max_workers,
+        requests_per_minute=requests_per_minute,
+        max_retries=max_retries,
+    )
+
+    # Fill one preallocated array, so the panel never exists twice in memory
+    fetched = [data for data in results if data is not None]
+    dates = pd.DatetimeIndex(
+        np.unique(np.concatenate([data.index.to_numpy() for data in fetched]))
+        if fetched
+        else []
+    )
+    values = np.full((len(suffixes), len(state_codes), len(dates)), np.nan, dtype)
+    flat = values.reshape(-1, len(dates))
+    for row, data in enumerate(results):
+        if data is not None:
+            flat[row, dates.get_indexer(data.index)] = data.to_numpy()
+    return SeriesPanel(values, suffixes, state_codes, dates)
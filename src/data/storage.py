@@ -0,0 +1,244 @@
+"""
+Columnar storage for the date-indexed panels produced by the extract scripts.
+
+Each dataset is kept once, as typed NumPy arrays that can be memory-mapped:
+
+    <root>/manifest.json            names, columns, dtypes, date range and hashes
+    <root>/<name>/values.npy        one row per column (state), one entry per date
+    <root>/<name>/dates.npy         datetime64 observation dates
+
+Panels with (series, state) MultiIndex columns, such as the multi-series
+panel of `src.data.series_panel`, keep their column tuples and level names in
+the manifest, and their rows are ordered series by series, so every series
+is one contiguous block of the values file.
+
+Storing each state's history contiguously means loading one state or one
+month only touches the pages it needs instead of parsing the whole history
+from text. A write whose content matches the stored hash is skipped, so
+repeated runs with no new data do not duplicate anything. The dated CSV
+snapshots can still be exported on demand with `export_csv`.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+MANIFEST = "manifest.json"
+
+
+class PanelStore:
+    """
+    Directory of memory-mappable panels with a JSON manifest.
+
+    Parameters:
+    - root (str): Folder holding the manifest and one sub-folder per dataset.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"datasets": {}}
+
+    def __contains__(self, name):
+        return name in self.manifest["datasets"]
+
+    def names(self):
+        return list(self.manifest["datasets"])
+
+    def info(self, name):
+        """
+        Return the manifest entry of a dataset.
+        """
+        try:
+            return self.manifest["datasets"][name]
+        except KeyError:
+            raise KeyError(f"Dataset '{name}' not found in {self.root}") from None
+
+    def write(self, name, data, snapshot_date=None):
+        """
+        Store a date-indexed panel, skipping the write if the content is unchanged.
+
+        Parameters:
+        - name (str): Dataset name, e.g., 'employment_state'.
+        - data (pd.DataFrame): Panel indexed by date with one column per state.
+        - snapshot_date (str): Date of the run that produced the data (YYYYMMDD). Defaults to today.
+
+        Returns:
+        - bool: True if the dataset was written, False if it was already stored.
+        """
+        values = np.ascontiguousarray(data.to_numpy().T)
+        dates = data.index.to_numpy().astype("datetime64[ns]")
+        levels = None
+        if isinstance(data.columns, pd.MultiIndex):
+            levels = list(data.columns.names)
+            columns = [[str(v) for v in c] for c in data.columns]
+        else:
+            columns = [str(c) for c in data.columns]
+
+        # Hash the content so identical panels are stored only once
+        digest = hashlib.sha256()
+        digest.update(values.tobytes())
+        digest.update(dates.tobytes())
+        digest.update(json.dumps(columns).encode())
+        sha256 = digest.hexdigest()
+
+        entry = self.manifest["datasets"].get(name)
+        if entry is not None and entry["sha256"] == sha256:
+            return False
+
+        folder = os.path.join(self.root, name)
+        os.makedirs(folder, exist_ok=True)
+        for file_name, array in (("values.npy", values), ("dates.npy", dates)):
+            temp_path = os.path.join(folder, f".{file_name}.tmp")
+            with open(temp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(temp_path, os.path.join(folder, file_name))
+
+        snapshot_date = snapshot_date or datetime.today().strftime("%Y%m%d")
+        snapshots = entry["snapshots"] if entry is not None else []
+        snapshots.append({"date": snapshot_date, "sha256": sha256})
+        self.manifest["datasets"][name] = {
+            "columns": columns,
+            "dtype": str(values.dtype),
+            "start": str(dates[0].astype("datetime64[D]")) if len(dates) else None,
+            "end": str(dates[-1].astype("datetime64[D]")) if len(dates) else None,
+            "rows": len(dates),
+            "sha256": sha256,
+            "snapshots": snapshots,
+        }
+        if levels is not None:
+            self.manifest["datasets"][name]["levels"] = levels
+        self._save_manifest()
+        return True
+
+    def _save_manifest(self):
+        # The manifest is replaced last so readers never see half-written datasets
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def _arrays(self, name):
+        self.info(name)
+        folder = os.path.join(self.root, name)
+        values = np.load(os.path.join(folder, "values.npy"), mmap_mode="r")
+        dates = np.load(os.path.join(folder, "dates.npy"))
+        return values, dates
+
+    def columns(self, name):
+        """
+        The columns of a dataset: a list, or a MultiIndex for multi-level panels.
+        """
+        entry = self.info(name)
+        if "levels" in entry:
+            return pd.MultiIndex.from_tuples(
+                [tuple(c) for c in entry["columns"]], names=entry["levels"]
+            )
+        return entry["columns"]
+
+    def read_values(self, name):
+        """
+        Memory-map the values of a dataset without loading them.
+
+        Parameters:
+        - name (str): Dataset name.
+
+        Returns:
+        - tuple: Read-only values shaped (columns, dates), the datetime64
+          dates and the columns as returned by `columns`.
+        """
+        values, dates = self._arrays(name)
+        return values, dates, self.columns(name)
+
+    def read(self, name, columns=None, start=None, end=None):
+        """
+        Load a panel, or a slice of it, without reading the rest from disk.
+
+        Parameters:
+        - name (str): Dataset name.
+        - columns (list): Optional subset of columns (states) to load, as tuples
+          for multi-level panels.
+        - start (str): Optional first date to load (YYYY-MM-DD).
+        - end (str): Optional last date to load (YYYY-MM-DD).
+
+        Returns:
+        - pd.DataFrame: Panel indexed by date.
+        """
+        values, dates = self._arrays(name)
+        all_columns = self.columns(name)
+
+        first = 0 if start is None else dates.searchsorted(np.datetime64(start, "ns"))
+        last = (
+            len(dates)
+            if end is None
+            else dates.searchsorted(np.datetime64(end, "ns"), side="right")
+        )
+        if columns is None:
+            columns = all_columns
+            block = values[:, first:last]
+        else:
+            positions = {column: i for i, column in enumerate(all_columns)}
+            block = values[[positions[c] for c in columns], first:last]
+            if isinstance(all_columns, pd.MultiIndex):
+                columns = pd.MultiIndex.from_tuples(columns, names=all_columns.names)
+
+        return pd.DataFrame(
+            np.array(block).T,
+            index=pd.DatetimeIndex(dates[first:last]),
+            columns=columns,
+        )
+
+    def read_column(self, name, column):
+        """
+        Load the full history of one column (state) as a Series.
+        """
+        return self.read(name, columns=[column])[column]
+
+    def read_row(self, name, date=None):
+        """
+        Load the values of every column for one date as a Series.
+
+        Parameters:
+        - name (str): Dataset name.
+        - date (str): Observation date (YYYY-MM-DD). Defaults to the latest date.
+
+        Returns:
+        - pd.Series: Values indexed by column, named by the observation date.
+        """
+        values, dates = self._arrays(name)
+        if date is None:
+            position = len(dates) - 1
+        else:
+            position = dates.searchsorted(np.datetime64(date, "ns"))
+            if position == len(dates) or dates[position] != np.datetime64(date, "ns"):
+                raise KeyError(f"No observation for {date} in dataset '{name}'")
+        return pd.Series(
+            np.array(values[:, position]),
+            index=self.columns(name),
+            name=pd.Timestamp(dates[position]),
+        )
+
+    def export_csv(self, name, path):
+        """
+        Write a dataset as a CSV in the layout of the dated snapshots.
+        """
+        self.read(name).to_csv(path, index=True)
+
+    def import_csv(self, name, path):
+        """
+        Load a dated CSV snapshot into the store, e.g., to seed it from existing files.
+        """
+        # round_trip parses every float back to the value it was written from
+        data = pd.read_csv(
+            path, index_col=0, parse_dates=True, float_precision="round_trip"
+        )
+        snapshot_date = os.path.splitext(path)[0].rsplit("_", 1)[-1]
+        return self.write(name, data, snapshot_date=snapshot_date)
@@ -0,0 +1,372 @@
+"""
+Append-only store of the vintages of a panel: what FRED reported on each pull.
+
+Every pull is compared with the panel as of the previous one and only the
+cells that changed (new months, revisions) are appended, as fixed-width
+binary records:
+
+    <root>/<name>/cells.bin      (vintage, column, date, value) records, in pull order
+    <root>/<name>/keys.npy       (column, date) key of every record, sorted
+    <root>/<name>/order.npy      record numbers in the order of the sorted keys
+    <root>/<name>/checkpoints/<end>/values.npy, dates.npy
+                                 the panel after the records before <end>
+    <root>/<name>/vintages.json  columns, checkpoints and, for every vintage,
+                                 its date and last record
+
+The first vintage holds the full panel and each later one only its changes,
+so a year of monthly pulls costs little more than one panel instead of one
+full CSV snapshot per pull. Records are never rewritten, so the store can be
+copied or synced incrementally. The index is derived from them: the sorted
+keys of every append are merged into it. A checkpoint of the whole panel is
+written whenever the records since the last one outnumber its cells, which
+keeps the checkpoints smaller than the records themselves.
+
+Both queries read only the records they need:
+
+- `as_of` loads the latest checkpoint up to the last record of the latest
+  vintage on or before the date, and applies the records written since;
+- `history` binary-searches the index for one (column, date) cell and reads
+  its records, one per vintage that changed it.
+
+Cells missing from a pull, e.g., outside an incremental window, are not
+treated as deleted, so pulls of a trailing window are recorded as they are.
+
+Query the store of the pipeline with:
+
+    python -m src.data.vintages list
+    python -m src.data.vintages as-of 2025-03-01
+    python -m src.data.vintages history TX 2024-12-01
+"""
+
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# One record per changed cell; dates and vintages are days since 1970-01-01
+CELL_DTYPE = np.dtype(
+    [("vintage", "<i4"), ("column", "<i4"), ("date", "<i4"), ("value", "<f8")]
+)
+
+MANIFEST = "vintages.json"
+
+# Dates are offset by the smallest day so that those before 1970 pack as
+# non-negative 32-bit numbers and keep their order below the column
+MIN_DAY = np.iinfo(np.int32).min
+
+
+def _days(dates):
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+def _keys(columns, dates):
+    # Sortable (column, date) key: the column number in the high 32 bits and
+    # the offset date in the low ones
+    dates = np.asarray(dates, dtype=np.int64) - MIN_DAY
+    return np.asarray(columns, dtype=np.int64) << 32 | dates & 0xFFFFFFFF
+
+
+class VintageStore:
+    """
+    Folder of append-only vintage logs, one per dataset.
+
+    Parameters:
+    - root (str): Folder holding one sub-folder per dataset.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, name, file_name):
+        return os.path.join(self.root, name, file_name)
+
+    def _manifest(self, name):
+        path = self._path(name, MANIFEST)
+        if not os.path.exists(path):
+            return {"columns": [], "checkpoints": [], "vintages": []}
+        with open(path) as f:
+            manifest = json.load(f)
+        manifest.setdefault("checkpoints", [])
+        return manifest
+
+    def _save_manifest(self, name, manifest):
+        # Written last, so readers never see records of a half-written vintage
+        path = self._path(name, MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def _cells(self, name, end):
+        path = self._path(name, "cells.bin")
+        if end == 0:
+            return np.zeros(0, dtype=CELL_DTYPE)
+        return np.memmap(path, dtype=CELL_DTYPE, mode="r", shape=(end,))
+
+    def vintages(self, name):
+        """
+        Dates of the vintages of a dataset, oldest first.
+
+        Returns:
+        - pd.DatetimeIndex: One date per recorded pull.
+        """
+        return pd.DatetimeIndex(
+            [vintage["date"] for vintage in self._manifest(name)["vintages"]]
+        )
+
+    def record(self, name, data, vintage_date):
+        """
+        Append the cells of a pull that differ from the latest vintage.
+
+        Parameters:
+        - name (str): Dataset name, e.g., 'employment_state'.
+        - data (pd.DataFrame): The pulled panel, indexed by date with one column per state.
+        - vintage_date (str): Date of the pull (YYYY-MM-DD or YYYYMMDD), on or
+          after the latest recorded vintage.
+
+        Returns:
+        - int: Number of cells recorded; a pull without changes is recorded
+          as a vintage without cells.
+        """
+        manifest = self._manifest(name)
+        vintage = pd.Timestamp(vintage_date)
+        if manifest["vintages"] and vintage < pd.Timestamp(
+            manifest["vintages"][-1]["date"]
+        ):
+            raise ValueError(
+                f"Vintage {vintage:%Y-%m-%d} is older than the latest one of '{name}', "
+                f"{manifest['vintages'][-1]['date']}; the store is append-only"
+            )
+
+        # New states get the next column numbers
+        columns = manifest["columns"]
+        columns.extend(str(c) for c in data.columns if str(c) not in columns)
+        positions = {column: i for i, column in enumerate(columns)}
+
+        # Compare every reported cell with its value in the latest vintage
+        values = data.to_numpy(dtype="float64")
+        rows, cols = np.nonzero(~np.isnan(values))
+        new = values[rows, cols]
+        dates = _days(data.index)[rows]
+        column_numbers = np.array([positions[str(c)] for c in data.columns])[cols]
+        end = manifest["vintages"][-1]["end"] if manifest["vintages"] else 0
+        if end:
+            previous = self._latest_values(name, end, column_numbers, dates)
+            changed = ~(new == previous)
+        else:
+            changed = np.ones(len(new), dtype=bool)
+
+        cells = np.zeros(int(changed.sum()), dtype=CELL_DTYPE)
+        cells["vintage"] = _days([vintage])[0]
+        cells["column"] = column_numbers[changed]
+        cells["date"] = dates[changed]
+        cells["value"] = new[changed]
+
+        os.makedirs(os.path.join(self.root, name), exist_ok=True)
+        if len(cells):
+            with open(self._path(name, "cells.bin"), "ab") as f:
+                # Drop the records of an append that did not reach the manifest
+                f.truncate(end * CELL_DTYPE.itemsize)
+                f.write(cells.tobytes())
+            self._write_index(name, end, end + len(cells))
+            end += len(cells)
+
+            checkpoints = manifest["checkpoints"]
+            since = end - (checkpoints[-1]["end"] if checkpoints else 0)
+            if not checkpoints or since > checkpoints[-1]["cells"]:
+                checkpoints.append(self._write_checkpoint(name, manifest, end))
+
+        manifest["vintages"].append(
+            {"date": f"{vintage:%Y-%m-%d}", "end": end, "changed": len(cells)}
+        )
+        self._save_manifest(name, manifest)
+        return len(cells)
+
+    def _write_index(self, name, start, end):
+        # Sort the keys of the appended records start:end and merge them into the index
+        cells = self._cells(name, end)[start:]
+        new_keys = _keys(cells["column"], cells["date"])
+        new_order = np.argsort(new_keys, kind="stable")
+        keys, order = new_keys[new_order], new_order + start
+        if start:
+            old_order, old_keys, _ = self._index(name, start)
+            # Inserted after the equal keys, so each cell keeps its vintage order
+            at = np.searchsorted(old_keys, keys, side="right")
+            keys = np.insert(old_keys, at, keys)
+            order = np.insert(old_order, at, order)
+        for file_name, array in (("keys.npy", keys), ("order.npy", order)):
+            path = self._path(name, file_name)
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(path + ".tmp", path)
+
+    def _write_checkpoint(self, name, manifest, end):
+        dates, values = self._panel(name, manifest, end)
+        folder = self._path(name, os.path.join("checkpoints", str(end)))
+        os.makedirs(folder, exist_ok=True)
+        for file_name, array in (("dates.npy", dates), ("values.npy", values)):
+            path = os.path.join(folder, file_name)
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(path + ".tmp", path)
+        return {"end": end, "cells": int(values.size)}
+
+    def _panel(self, name, manifest, end):
+        # Dates and values of the panel after the records before `end`: the
+        # latest checkpoint before it, with the records written since on top
+        checkpoints = [c for c in manifest["checkpoints"] if c["end"] <= end]
+        start = checkpoints[-1]["end"] if checkpoints else 0
+        if start:
+            folder = self._path(name, os.path.join("checkpoints", str(start)))
+            dates = np.load(os.path.join(folder, "dates.npy"))
+            values = np.load(os.path.join(folder, "values.npy"))
+        else:
+            dates, values = np.zeros(0, dtype=np.int64), np.zeros((0, 0))
+        cells = np.array(self._cells(name, end)[start:])
+        if len(cells) == 0:
+            return dates, values
+
+        # Later records of a cell supersede earlier ones
+        keys = _keys(cells["column"], cells["date"])
+        _, last = np.unique(keys[::-1], return_index=True)
+        latest = cells[len(cells) - 1 - last]
+
+        all_dates = np.union1d(dates, latest["date"])
+        n_columns = max(values.shape[1], int(latest["column"].max()) + 1)
+        panel = np.full((len(all_dates), n_columns), np.nan)
+        panel[np.searchsorted(all_dates, dates), : values.shape[1]] = values
+        panel[np.searchsorted(all_dates, latest["date"]), latest["column"]] = latest[
+            "value"
+        ]
+        return all_dates, panel
+
+    def _index(self, name, end):
+        keys = np.load(self._path(name, "keys.npy"), mmap_mode="r")
+        order = np.load(self._path(name, "order.npy"), mmap_mode="r")
+        if len(order) > end:
+            # Drop the records of an append that did not reach the manifest
+            kept = order < end
+            order, keys = order[kept], keys[kept]
+        return order, keys, self._cells(name, end)
+
+    def _latest_values(self, name, end, column_numbers, dates):
+        # Value of each (column, date) cell in the latest vintage, NaN if never reported
+        order, keys, cells = self._index(name, end)
+        wanted = _keys(column_numbers, dates)
+        # The last record of each cell is the one just before the next key
+        last = np.searchsorted(keys, wanted, side="right") - 1
+        found = (last >= 0) & (keys[np.maximum(last, 0)] == wanted)
+        values = np.full(len(wanted), np.nan)
+        values[found] = cells["value"][order[last[found]]]
+        return values
+
+    def as_of(self, name, date):
+        """
+        The panel as it was known on a date, from the latest vintage on or before it.
+
+        Parameters:
+        - name (str): Dataset name.
+        - date (str): Point in time (YYYY-MM-DD).
+
+        Returns:
+        - pd.DataFrame: Panel indexed by date with one column per state, empty
+          if nothing was recorded by then.
+        """
+        manifest = self._manifest(name)
+        vintage_dates = pd.DatetimeIndex([v["date"] for v in manifest["vintages"]])
+        position = vintage_dates.searchsorted(pd.Timestamp(date), side="right")
+        if position == 0:
+            return pd.DataFrame()
+        dates, values = self._panel(
+            name, manifest, manifest["vintages"][position - 1]["end"]
+        )
+        if len(dates) == 0:
+            return pd.DataFrame()
+        return pd.DataFrame(
+            values,
+            index=pd.DatetimeIndex(
+                dates.astype("datetime64[D]").astype("datetime64[ns]")
+            ),
+            columns=manifest["columns"][: values.shape[1]],
+        )
+
+    def history(self, name, column, date):
+        """
+        Every value reported for one state and month, by vintage.
+
+        Parameters:
+        - name (str): Dataset name.
+        - column (str): State code.
+        - date (str): Observation month (YYYY-MM-DD).
+
+        Returns:
+        - pd.Series: Values indexed by the date of the vintage that reported
+          them, one per revision; empty if the cell was never reported.
+        """
+        manifest = self._manifest(name)
+        if not manifest["vintages"] or column not in manifest["columns"]:
+            return pd.Series(dtype="float64", name=column)
+        order, keys, cells = self._index(name, manifest["vintages"][-1]["end"])
+        key = int(_keys(manifest["columns"].index(column), _days([date])[0]))
+        first, last = np.searchsorted(keys, [key, key + 1])
+        records = cells[np.sort(order[first:last])]
+        return pd.Series(
+            records["value"],
+            index=pd.DatetimeIndex(
+                records["vintage"].astype("datetime64[D]").astype("datetime64[ns]")
+            ),
+            name=column,
+        )
+
+    def import_snapshots(self, name, directory, prefix):
+        """
+        Record a pile of dated CSV snapshots, oldest first.
+
+        Parameters:
+        - name (str): Dataset name.
+        - directory (str): Folder of the snapshots.
+        - prefix (str): File name prefix before the date, e.g., 'employment_state_'.
+
+        Returns:
+        - dict: Number of cells recorded from each snapshot, by file name.
+        """
+        from src.data.incremental import load_panel
+
+        pattern = re.compile(rf"^{re.escape(prefix)}(\d{{8}})\.csv$")
+        snapshots = sorted(
+            (match.group(1), file_name)
+            for file_name in os.listdir(directory)
+            if (match := pattern.match(file_name))
+        )
+        recorded = {}
+        latest = self.vintages(name)
+        for snapshot_date, file_name in snapshots:
+            if len(latest) and pd.Timestamp(snapshot_date) <= latest[-1]:
+                continue
+            data = load_panel(os.path.join(directory, file_name))
+            recorded[file_name] = self.record(name, data, snapshot_date)
+        return recorded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the vintage store")
+    parser.add_argument("command", choices=["list", "as-of", "history"])
+    parser.add_argument("arguments", nargs="*", help="DATE, or STATE MONTH")
+    parser.add_argument("--root", default="data/store/vintages")
+    parser.add_argument("--name", default="employment_state")
+    args = parser.parse_args()
+
+    store = VintageStore(args.root)
+    if args.command == "list":
+        for vintage in store._manifest(args.name)["vintages"]:
+            print(f"{vintage['date']}  {vintage['changed']:8d} changed cells")
+    elif args.command == "as-of":
+        print(store.as_of(args.name, *args.arguments).tail(12))
+    else:
+        print(store.history(args.name, *args.arguments))
+
+
+if __name__ == "__main__":
+    main()
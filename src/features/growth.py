@@ -0,0 +1,142 @@
+"""
+Growth metrics for every month and every state of an employment panel.
+
+All metrics are computed on the full (date x state) array at once, so the
+cost does not depend on Python loops over states and any month's map or
+ranking is a slice of the resulting table.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Metric name -> (number of months compared, exponent that annualizes the change)
+GROWTH_HORIZONS = {
+    "mom": (1, 1),  # month-on-month percent change
+    "ann3m": (3, 4),  # 3-month change, annualized
+    "ann6m": (6, 2),  # 6-month change, annualized
+    "yoy": (12, 1),  # year-on-year percent change
+}
+GROWTH_METRICS = sorted([*GROWTH_HORIZONS, "yoy_z"])
+
+# Store dataset holding each metric. Year-on-year growth is the annual percent
+# change the pipeline already stores, so it is read from there, not stored twice
+METRIC_DATASETS = {
+    **{metric: f"employment_state_{metric}" for metric in GROWTH_METRICS},
+    "yoy": "employment_state_apc",
+}
+
+# Metrics the growth stage writes to the store
+STORED_METRICS = [
+    metric
+    for metric in GROWTH_METRICS
+    if METRIC_DATASETS[metric] == f"employment_state_{metric}"
+]
+
+# Descriptions used in map subtitles
+GROWTH_METRIC_LABELS = {
+    "mom": "monthly percent change",
+    "ann3m": "3-month annualized percent change",
+    "ann6m": "6-month annualized percent change",
+    "yoy": "annual percent change",
+    "yoy_z": "annual percent change, z-score",
+}
+
+
+def _growth_rate(values, periods, exponent):
+    """
+    Percent change over `periods` rows of a 2D array, compounded by `exponent`.
+    """
+    rates = np.full_like(values, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates[periods:] = ((values[periods:] / values[:-periods]) ** exponent - 1) * 100
+    return rates
+
+
+def compute_growth_metrics(data):
+    """
+    Compute growth metrics for every date and state in one vectorized pass.
+
+    Parameters:
+    - data (pd.DataFrame): Employment levels indexed by date, one column per state.
+
+    Returns:
+    - pd.DataFrame: One 'value' column indexed by (date, state, metric). Dates,
+      states and metrics are sorted so slices by date and metric are cheap.
+      Metrics: 'mom', 'ann3m', 'ann6m', 'yoy' (percent) and 'yoy_z', the
+      year-on-year change as a z-score against the state's own history.
+    """
+    data = data.sort_index().sort_index(axis=1)
+    values = data.to_numpy(dtype="float64")
+
+    metrics = {
+        name: _growth_rate(values, periods, exponent)
+        for name, (periods, exponent) in GROWTH_HORIZONS.items()
+    }
+
+    # Standardize each state's year-on-year change against its own history
+    yoy = metrics["yoy"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics["yoy_z"] = (yoy - np.nanmean(yoy, axis=0)) / np.nanstd(yoy, axis=0)
+
+    # Stack to (date, state, metric) so the flattened array matches the index order
+    stacked = np.stack([metrics[name] for name in GROWTH_METRICS], axis=2)
+    index = pd.MultiIndex.from_product(
+        [data.index, data.columns, GROWTH_METRICS], names=["date", "state", "metric"]
+    )
+    return pd.DataFrame({"value": stacked.reshape(-1)}, index=index)
+
+
+def _as_cube(growth):
+    """
+    View the table as a (date, state, metric) array, or None if it is not a full product.
+    """
+    dates, states, metrics = growth.index.levels
+    shape = (len(dates), len(states), len(metrics))
+    if len(growth) != shape[0] * shape[1] * shape[2]:
+        return None
+    return growth["value"].to_numpy().reshape(shape)
+
+
+def metric_slice(growth, date, metric):
+    """
+    Select the value of one metric for every state in one month.
+
+    Parameters:
+    - growth (pd.DataFrame): Output of `compute_growth_metrics`.
+    - date (str): Observation date (YYYY-MM-DD).
+    - metric (str): One of GROWTH_METRICS.
+
+    Returns:
+    - pd.Series: Values indexed by state.
+    """
+    cube = _as_cube(growth)
+    if cube is None:
+        return growth["value"].xs(
+            (pd.Timestamp(date), metric), level=["date", "metric"]
+        )
+
+    # Index straight into the array instead of searching the MultiIndex
+    dates, states, metrics = growth.index.levels
+    values = cube[dates.get_loc(pd.Timestamp(date)), :, metrics.get_loc(metric)]
+    return pd.Series(values, index=states, name="value")
+
+
+def metric_ranking(growth, date, metric, ascending=False):
+    """
+    Rank states by one metric in one month, strongest growth first by default.
+    """
+    return metric_slice(growth, date, metric).dropna().sort_values(ascending=ascending)
+
+
+def growth_panel(growth, metric):
+    """
+    Reshape one metric back into a panel indexed by date with one column per state.
+    """
+    cube = _as_cube(growth)
+    if cube is None:
+        return growth["value"].xs(metric, level="metric").unstack("state")
+
+    dates, states, metrics = growth.index.levels
+    return pd.DataFrame(
+        cube[:, :, metrics.get_loc(metric)], index=dates, columns=states
+    )
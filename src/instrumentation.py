@@ -0,0 +1,256 @@
+"""
+Per-stage timing and memory instrumentation for the pipeline scripts.
+
+A RunProfiler wraps each stage of a run in a context manager and records its
+wall time, CPU time, peak RSS and the HTTP requests made while it ran (calls
+and bytes received through urllib, which is what fredapi and the font cache
+use). At the end of the run the stages are written to a JSON report, e.g.,
+next to the processed data, so a slow monthly job can be traced to FRED,
+pandas, geopandas or matplotlib.
+
+Profiling is off unless asked for, with `enabled=True` or the PIPELINE_PROFILE
+environment variable. A disabled profiler hands out one shared no-op context
+and never patches urllib, so the hooks can stay in the scripts for free.
+
+    profiler = RunProfiler("extract")
+    with profiler.stage("fetch"):
+        data = collect_state_data(...)
+    profiler.write_report("data/processed/run_report_extract.json")
+"""
+
+import contextlib
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+PROFILE_ENV = "PIPELINE_PROFILE"
+
+# Shared context handed out by disabled profilers
+_NO_OP = contextlib.nullcontext()
+
+
+def is_enabled():
+    """
+    Whether profiling was switched on through the PIPELINE_PROFILE environment variable.
+    """
+    return os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes")
+
+
+def memory_status(field):
+    """
+    Read a memory counter of this process in kB, e.g., VmRSS or VmHWM (peak RSS).
+
+    Returns None where /proc is not available.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+def reset_peak_rss():
+    """
+    Reset the peak RSS of this process (Linux only); return False if that is not possible.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_kb():
+    """
+    Peak RSS of this process in kB.
+
+    On Linux this is the peak since the last reset_peak_rss(), elsewhere the
+    peak over the life of the process.
+    """
+    peak = memory_status("VmHWM")
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class HttpCounter:
+    """
+    Thread-safe count of the HTTP requests made through urllib and the bytes read back.
+
+    install() swaps urlopen for a counting wrapper in urllib.request and in the
+    modules that imported it by name (fredapi, the font cache). The wrapper is
+    only installed by enabled profilers.
+    """
+
+    # Modules that hold their own reference to urlopen
+    PATCHED_MODULES = ["fredapi.fred", "src.visualization.fonts"]
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.installed = False
+        self.original = None
+
+    def add(self, calls=0, n_bytes=0):
+        with self.lock:
+            self.calls += calls
+            self.bytes += n_bytes
+
+    def snapshot(self):
+        with self.lock:
+            return self.calls, self.bytes
+
+    def install(self):
+        if self.installed:
+            return
+        self.original = urllib.request.urlopen
+        urllib.request.urlopen = self.urlopen
+        for name in self.PATCHED_MODULES:
+            module = sys.modules.get(name)
+            if module is not None and getattr(module, "urlopen", None) is self.original:
+                module.urlopen = self.urlopen
+        self.installed = True
+
+    def uninstall(self):
+        if not self.installed:
+            return
+        urllib.request.urlopen = self.original
+        for name in self.PATCHED_MODULES:
+            module = sys.modules.get(name)
+            if module is not None and getattr(module, "urlopen", None) is self.urlopen:
+                module.urlopen = self.original
+        self.installed = False
+
+    def urlopen(self, *args, **kwargs):
+        self.add(calls=1)
+        try:
+            response = self.original(*args, **kwargs)
+        except urllib.error.HTTPError as error:
+            self._count_reads(error)
+            raise
+        return self._count_reads(response)
+
+    def _count_reads(self, response):
+        # Count the body as it is read, whoever reads it
+        read = response.read
+
+        def counting_read(*args, **kwargs):
+            data = read(*args, **kwargs)
+            self.add(n_bytes=len(data))
+            return data
+
+        response.read = counting_read
+        return response
+
+
+http_counter = HttpCounter()
+
+
+class RunProfiler:
+    """
+    Record the cost of each stage of a pipeline run and write it as a JSON report.
+
+    Parameters:
+    - name (str): Name of the run, e.g., 'extract' or 'render'.
+    - enabled (bool): Whether to record anything. None reads the PIPELINE_PROFILE
+      environment variable.
+    """
+
+    def __init__(self, name, enabled=None):
+        self.name = name
+        self.enabled = is_enabled() if enabled is None else enabled
+        self.stages = []
+        self.started = datetime.now()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        if self.enabled:
+            http_counter.install()
+        self.http_start = http_counter.snapshot()
+
+    def stage(self, name):
+        """
+        Context manager that records one stage of the run.
+        """
+        if not self.enabled:
+            return _NO_OP
+        return self._record(name)
+
+    @contextlib.contextmanager
+    def _record(self, name):
+        rss_before = memory_status("VmRSS")
+        reset_peak_rss()
+        calls_before, bytes_before = http_counter.snapshot()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.process_time() - start_cpu
+            calls, n_bytes = http_counter.snapshot()
+            peak = peak_rss_kb()
+            self.stages.append(
+                {
+                    "name": name,
+                    "wall_seconds": round(wall, 4),
+                    "cpu_seconds": round(cpu, 4),
+                    "peak_rss_mb": None if peak is None else round(peak / 1024, 1),
+                    "rss_before_mb": (
+                        None if rss_before is None else round(rss_before / 1024, 1)
+                    ),
+                    "http_calls": calls - calls_before,
+                    "http_bytes": n_bytes - bytes_before,
+                }
+            )
+
+    def report(self):
+        """
+        The run report as a dict: the run metadata, its totals and one entry per stage.
+        """
+        calls, n_bytes = http_counter.snapshot()
+        peaks = [s["peak_rss_mb"] for s in self.stages if s["peak_rss_mb"] is not None]
+        return {
+            "run": self.name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "total": {
+                "wall_seconds": round(time.perf_counter() - self.start_wall, 4),
+                "cpu_seconds": round(time.process_time() - self.start_cpu, 4),
+                "peak_rss_mb": max(peaks) if peaks else None,
+                "http_calls": calls - self.http_start[0],
+                "http_bytes": n_bytes - self.http_start[1],
+            },
+            "stages": self.stages,
+        }
+
+    def write_report(self, path):
+        """
+        Write the run report to a JSON file; does nothing when profiling is disabled.
+
+        Returns:
+        - str: The path written, or None.
+        """
+        if not self.enabled:
+            return None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        http_counter.uninstall()
+        return path
@@ -0,0 +1,939 @@
+"""
+Pipeline runner that only re-runs the stages whose inputs changed.
+
+The monthly job is modelled as a DAG of stages. Each stage declares the
+artifacts it reads and writes: panels in the store ("store:<name>", hashed
+by the store manifest) or files and folders relative to the repository root
+(hashed by content). Before a stage runs, its key is computed from the
+hashes of its inputs, including the source files that implement it, and
+its parameters. If the key matches the last run and the recorded outputs
+are still on disk unchanged, the stage is skipped and its artifacts are
+reused. The keys are kept in data/store/pipeline_state.json, next to the
+panels they describe, so a fresh checkout knows what is up to date.
+
+FRED itself is the only input that cannot be hashed locally, so the first
+stage probes it with one request for the latest observations of one state
+series. All states are published in the same release, so an unchanged probe
+means there is nothing new to fetch and the rest of the run is skipped:
+
+    python -m src.pipeline                 # data stages and the interactive map
+    python -m src.pipeline quarto          # everything, including the site
+    python -m src.pipeline --force fetch   # re-run one stage and what depends on it
+    python -m src.pipeline county_map      # county data and map, see below
+    python -m src.pipeline --list
+
+The county stages are only run when asked for. They need the TIGER county
+shapefile in data/raw (tl_2023_us_county.zip from
+https://www2.census.gov/geo/tiger/TIGER2023/COUNTY/) and make one request per
+county, about 3,200, for a full refresh; the LAUS county release has its own
+probe, so the usual run is skipped like the state one.
+
+The other state series tracked besides total nonfarm employment (the
+unemployment rate, the labor force and sector payrolls, see
+`src.data.series_panel`) are also only fetched when asked for, as one
+(series, state, date) panel with its annual percent change next to it:
+
+    python -m src.pipeline series_pct_change
+
+Every fetch of the state panel is also recorded in the vintage store in
+data/store/vintages (see `src.data.vintages`), which keeps only the cells
+that changed since the previous pull, so any earlier version of the panel
+and the revisions of any month can be looked up. The dated CSV snapshots in
+data/raw are imported into it on the first run.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import time
+from datetime import datetime
+from graphlib import TopologicalSorter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_DIR = "data/store"
+VINTAGE_DIR = "data/store/vintages"
+STATE_FILE = "pipeline_state.json"
+
+# Series requested to find out whether FRED published anything new
+PROBE_SERIES = "CANA"
+PROBE_OBSERVATIONS = 24
+
+STATE_CODES = [
+    "WV",
+    "FL",
+    "IL",
+    "MN",
+    "MD",
+    "RI",
+    "ID",
+    "NH",
+    "NC",
+    "VT",
+    "CT",
+    "DE",
+    "NM",
+    "CA",
+    "NJ",
+    "WI",
+    "OR",
+    "NE",
+    "PA",
+    "WA",
+    "LA",
+    "GA",
+    "AL",
+    "UT",
+    "OH",
+    "TX",
+    "CO",
+    "SC",
+    "OK",
+    "TN",
+    "WY",
+    "HI",
+    "ND",
+    "KY",
+    "VI",
+    "MP",
+    "GU",
+    "ME",
+    "NY",
+    "NV",
+    "AK",
+    "AS",
+    "MI",
+    "AR",
+    "MS",
+    "MO",
+    "MT",
+    "KS",
+    "IN",
+    "PR",
+    "SD",
+    "MA",
+    "VA",
+    "DC",
+    "IA",
+    "AZ",
+]
+
+# County series requested to find out whether a new LAUS release is out
+COUNTY_PROBE_SERIES = "LAUCN060370000000005"  # Employment, Los Angeles County
+COUNTY_SHAPEFILE = "data/raw/tl_2023_us_county.shp"
+
+# Dataset of the multi-series state panel and the series it holds
+SERIES_DATASET = "state_series"
+SERIES_SUFFIXES = ["NA", "UR", "LF", "MFG", "CONS", "GOVT"]
+
+# Targets of the extract scripts and of a plain `python -m src.pipeline`
+DATA_TARGETS = ["export", "growth_metrics"]
+DEFAULT_TARGETS = [*DATA_TARGETS, "map_artifacts", "interactive_map"]
+
+
+class Stage:
+    """
+    One step of the pipeline and the artifacts it reads and writes.
+
+    Parameters:
+    - name (str): Stage name, used on the command line and in the state file.
+    - run (callable): Function taking the run context that produces the outputs.
+    - inputs (list): Artifacts read by the stage, including its source files.
+    - outputs (list): Artifacts written by the stage.
+    - params (dict): Settings that change the outputs, hashed into the stage key.
+    - always_run (bool): Run even if the key is unchanged, for stages reading external data.
+    """
+
+    def __init__(self, name, run, inputs=(), outputs=(), params=None, always_run=False):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.always_run = always_run
+
+
+def file_hash(path, digest=None):
+    """
+    SHA-256 of a file's bytes, read in chunks.
+    """
+    digest = digest or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest
+
+
+def artifact_hash(artifact, context):
+    """
+    Content hash of an artifact, or None if it does not exist.
+
+    Parameters:
+    - artifact (str): 'store:<name>' for a panel, otherwise a file or folder
+      path relative to the repository root.
+    - context (dict): Run context holding the root folder and the panel store.
+    """
+    if artifact.startswith("store:"):
+        store = context["store"]
+        name = artifact.split(":", 1)[1]
+        return store.info(name)["sha256"] if name in store else None
+
+    path = os.path.join(context["root"], artifact)
+    if os.path.isfile(path):
+        return file_hash(path).hexdigest()
+    if os.path.isdir(path):
+        # Hash the relative paths and the content of every file in a fixed order
+        digest = hashlib.sha256()
+        for folder, dirs, files in sorted(os.walk(path)):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(folder, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                file_hash(file_path, digest)
+        return digest.hexdigest()
+    return None
+
+
+def stage_key(stage, context):
+    """
+    Hash of everything a stage's outputs depend on: its parameters and input hashes.
+    """
+    inputs = {artifact: artifact_hash(artifact, context) for artifact in stage.inputs}
+    payload = json.dumps(
+        {"params": stage.params, "inputs": inputs}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def stage_order(stages, targets):
+    """
+    The stages needed for the targets, each after the stages producing its inputs.
+
+    Returns:
+    - list: Stages in an order that can be run one after another.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    producers = {artifact: stage.name for stage in stages for artifact in stage.outputs}
+    graph = {
+        stage.name: {producers[a] for a in stage.inputs if a in producers}
+        for stage in stages
+    }
+
+    unknown = [target for target in targets if target not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(unknown)}")
+
+    # Walk up from the targets to every stage they depend on
+    needed = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.add(name)
+            pending.extend(graph[name])
+
+    order = TopologicalSorter({name: graph[name] for name in needed}).static_order()
+    return [by_name[name] for name in order]
+
+
+def load_state(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"stages": {}}
+
+
+def save_state(state, path):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def is_up_to_date(stage, key, record, context):
+    """
+    Whether a stage can be skipped: same key as last time and its outputs untouched.
+    """
+    if record is None or record["key"] != key:
+        return False
+    return all(
+        artifact_hash(artifact, context) == digest
+        for artifact, digest in record["outputs"].items()
+    )
+
+
+def run_pipeline(stages, targets, context, force=(), profiler=None):
+    """
+    Run the stages needed for the targets, skipping those that are up to date.
+
+    Parameters:
+    - stages (list): All stages of the pipeline.
+    - targets (list): Names of the stages to bring up to date.
+    - context (dict): Run context passed to every stage; needs 'root' and 'store'.
+    - force (iterable or bool): Stage names to run regardless of their key, or True for all.
+    - profiler (RunProfiler): Optional profiler recording every stage that runs.
+
+    Returns:
+    - dict: Stage name to 'ran' or 'skipped'.
+    """
+    from src.instrumentation import RunProfiler
+
+    profiler = profiler or RunProfiler("pipeline", enabled=False)
+    state_path = os.path.join(context["root"], STORE_DIR, STATE_FILE)
+    state = load_state(state_path)
+
+    status = {}
+    for stage in stage_order(stages, targets):
+        key = stage_key(stage, context)
+        record = state["stages"].get(stage.name)
+        forced = force is True or stage.name in force
+        if (
+            not forced
+            and not stage.always_run
+            and is_up_to_date(stage, key, record, context)
+        ):
+            print(f"{stage.name:<18}up to date, skipped")
+            status[stage.name] = "skipped"
+            continue
+
+        start = time.perf_counter()
+        with profiler.stage(stage.name):
+            stage.run(context)
+        print(f"{stage.name:<18}ran in {time.perf_counter() - start:.2f}s")
+        status[stage.name] = "ran"
+
+        state["stages"][stage.name] = {
+            "key": key,
+            "outputs": {
+                artifact: artifact_hash(artifact, context) for artifact in stage.outputs
+            },
+        }
+        save_state(state, state_path)
+    return status
+
+
+def fred_client(context):
+    """
+    FRED client of the run, created on first use from the FRED_API_KEY environment variable.
+
+    With a 'cache_ttl' in the context, its responses go through the on-disk
+    cache of `src.data.http_cache`, so a rerun within the TTL makes no requests.
+    """
+    if context.get("fred") is None:
+        from dotenv import load_dotenv
+        from fredapi import Fred
+
+        # Load environment variables from .env file
+        load_dotenv()
+        api_key = os.getenv("FRED_API_KEY")
+        if api_key is None:
+            raise ValueError("FRED_API_KEY environment variable not set")
+        context["fred"] = Fred(api_key=api_key)
+        if context.get("cache_ttl") is not None:
+            from src.data.http_cache import HTTP_CACHE_DIR, ResponseCache
+
+            context["http_cache"] = ResponseCache(
+                os.path.join(context["root"], HTTP_CACHE_DIR), ttl=context["cache_ttl"]
+            )
+            context["http_cache"].attach(context["fred"])
+    return context["fred"]
+
+
+def probe_series(context, series_id, file_name):
+    """
+    Record the latest observations of a series, which change with every release.
+    """
+    from src.data.fetch_fred import fetch_series
+
+    data = fetch_series(
+        fred_client(context),
+        series_id,
+        sort_order="desc",
+        limit=PROBE_OBSERVATIONS,
+    ).sort_index()
+    probe = {
+        "series": series_id,
+        "observations": {f"{date:%Y-%m-%d}": value for date, value in data.items()},
+    }
+    with open(os.path.join(context["root"], STORE_DIR, file_name), "w") as f:
+        json.dump(probe, f, indent=2)
+
+
+def probe_release(context):
+    probe_series(context, PROBE_SERIES, "release_probe.json")
+
+
+def probe_county_release(context):
+    probe_series(context, COUNTY_PROBE_SERIES, "county_release_probe.json")
+
+
+def fetch_panel(context):
+    """
+    Update the employment panel in the store, incrementally when a stored panel exists.
+    """
+    from src.data.fetch_fred import collect_state_data
+    from src.data.incremental import (
+        incremental_start_dates,
+        latest_snapshot,
+        merge_panel,
+    )
+
+    store, root = context["store"], context["root"]
+
+    # Seed the store from the latest CSV snapshots the first time it is used
+    for name, directory, prefix in [
+        ("employment_state", "data/raw", "employment_state_"),
+        ("employment_state_apc", "data/processed", "employment_state_apc_"),
+    ]:
+        if name not in store:
+            snapshot_path = latest_snapshot(os.path.join(root, directory), prefix)
+            if snapshot_path is not None:
+                store.import_csv(name, snapshot_path)
+
+    if not context["full_refresh"] and "employment_state" in store:
+        # Only request a trailing window per state, long enough to pick up revisions
+        stored_data = store.read("employment_state")
+        fresh_data = collect_state_data(
+            api_key=None,
+            state_codes=STATE_CODES,
+            series_suffix="NA",
+            observation_start=incremental_start_dates(stored_data, STATE_CODES),
+            max_workers=8,
+            fred=fred_client(context),
+        )
+        data, changed_from = merge_panel(stored_data, fresh_data)
+        context.setdefault("changed_from", {})["employment_state"] = changed_from
+        print(f"Incremental update of the stored panel, changes from {changed_from}")
+    else:
+        data = collect_state_data(
+            api_key=None,
+            state_codes=STATE_CODES,
+            series_suffix="NA",
+            observation_start="1984-01-01",
+            max_workers=8,
+            fred=fred_client(context),
+        )
+
+    # The store skips the write if nothing changed
+    store.write("employment_state", data, snapshot_date=context["today"])
+    record_vintage(context, "employment_state", data)
+
+
+def record_vintage(context, name, data):
+    """
+    Append the cells of a pull that changed since the previous one to the vintage store.
+
+    The first time, the dated CSV snapshots in data/raw are recorded before it.
+    """
+    from src.data.vintages import VintageStore
+
+    vintages = VintageStore(os.path.join(context["root"], VINTAGE_DIR))
+    if not len(vintages.vintages(name)):
+        vintages.import_snapshots(
+            name, os.path.join(context["root"], "data/raw"), f"{name}_"
+        )
+    changed = vintages.record(name, data, context["today"])
+    print(f"Recorded vintage {context['today']} of {name}: {changed} changed cells")
+
+
+def update_pct_change(context, name):
+    """
+    Store the percent change from the same month a year earlier of a panel as '<name>_apc'.
+
+    After an incremental fetch only the rows affected by new or revised data
+    are recomputed; otherwise the full panel is.
+    """
+    from src.data.incremental import update_annual_pct_change
+
+    store = context["store"]
+    data = store.read(name)
+    changed = context.get("changed_from", {})
+    if name in changed and f"{name}_apc" in store:
+        apc = update_annual_pct_change(store.read(f"{name}_apc"), data, changed[name])
+    else:
+        apc = data.pct_change(periods=12) * 100
+    store.write(f"{name}_apc", apc, snapshot_date=context["today"])
+
+
+def annual_pct_change(context):
+    """
+    Percent change from the same month a year earlier.
+    """
+    update_pct_change(context, "employment_state")
+
+
+def growth_metrics(context):
+    """
+    Compute every growth metric for every month and store one panel per metric.
+
+    Year-on-year growth is the stored annual percent change, so it is not written again.
+    """
+    from src.features.growth import (
+        METRIC_DATASETS,
+        STORED_METRICS,
+        compute_growth_metrics,
+        growth_panel,
+    )
+
+    store = context["store"]
+    growth = compute_growth_metrics(store.read("employment_state"))
+    for metric in STORED_METRICS:
+        store.write(
+            METRIC_DATASETS[metric],
+            growth_panel(growth, metric),
+            snapshot_date=context["today"],
+        )
+
+
+def export_latest(context):
+    """
+    Write the latest month as the State/value CSV read by the Quarto page.
+    """
+    store, root, today = context["store"], context["root"], context["today"]
+
+    # Pivot the last row so states are in the first column and values in the second
+    selected_row = store.read_row("employment_state_apc")
+    pivoted_df = selected_row.reset_index()
+    pivoted_df.columns = ["State", f"apc_{selected_row.name:%Y%m%d}"]
+
+    # Export the dated CSV snapshots only when asked for
+    if context["export_csv"]:
+        store.export_csv(
+            "employment_state",
+            os.path.join(root, f"data/raw/employment_state_{today}.csv"),
+        )
+        store.export_csv(
+            "employment_state_apc",
+            os.path.join(root, f"data/processed/employment_state_apc_{today}.csv"),
+        )
+        pivoted_df.to_csv(
+            os.path.join(
+                root, f"data/processed/employment_state_apc_pivoted_{today}.csv"
+            ),
+            index=False,
+        )
+
+    # Overwrite the file read by the Quarto page
+    pivoted_df.to_csv(
+        os.path.join(root, "data/processed/employment_state_apc_pivoted_quarto.csv"),
+        index=False,
+    )
+
+
+def map_artifacts(context):
+    from src.visualization.artifacts import OUTPUT_DIR, build_map_artifacts
+    from src.visualization.fonts import FONT_CACHE_DIR
+    from src.visualization.geometry import CACHE_DIR, SHAPEFILE_PATH
+
+    root = context["root"]
+    build_map_artifacts(
+        output_dir=os.path.join(root, OUTPUT_DIR),
+        store_dir=os.path.join(root, STORE_DIR),
+        shapefile_path=os.path.join(root, SHAPEFILE_PATH),
+        geometry_cache_dir=os.path.join(root, CACHE_DIR),
+        font_cache_dir=os.path.join(root, FONT_CACHE_DIR),
+    )
+
+
+def interactive_map(context):
+    from src.visualization.interactive import OUTPUT_PATH, build_interactive_map
+
+    root = context["root"]
+    build_interactive_map(
+        output=os.path.join(root, OUTPUT_PATH),
+        geojson_path=os.path.join(root, "data/raw/us-states.json"),
+        store_dir=os.path.join(root, STORE_DIR),
+    )
+
+
+def fetch_county_panel(context):
+    """
+    Update the county employment panel in the store, incrementally when one is stored.
+    """
+    from src.data.counties import collect_county_data, county_fips
+    from src.data.incremental import incremental_start_dates, merge_panel
+
+    store, root = context["store"], context["root"]
+    shapefile_path = os.path.join(root, COUNTY_SHAPEFILE)
+    if not os.path.exists(shapefile_path):
+        raise FileNotFoundError(
+            f"{COUNTY_SHAPEFILE} not found. Download tl_2023_us_county.zip from "
+            "https://www2.census.gov/geo/tiger/TIGER2023/COUNTY/ and unzip it into data/raw"
+        )
+    fips_codes = county_fips(shapefile_path)
+
+    if not context["full_refresh"] and "employment_county" in store:
+        stored_data = store.read("employment_county")
+        fresh_data = collect_county_data(
+            api_key=None,
+            fips_codes=fips_codes,
+            observation_start=incremental_start_dates(
+                stored_data, fips_codes, default_start="1990-01-01"
+            ),
+            fred=fred_client(context),
+        )
+        data, changed_from = merge_panel(stored_data, fresh_data)
+        context.setdefault("changed_from", {})["employment_county"] = changed_from
+        print(f"Incremental update of the county panel, changes from {changed_from}")
+    else:
+        data = collect_county_data(
+            api_key=None, fips_codes=fips_codes, fred=fred_client(context)
+        )
+
+    store.write("employment_county", data, snapshot_date=context["today"])
+
+
+def county_annual_pct_change(context):
+    update_pct_change(context, "employment_county")
+
+
+def county_map(context):
+    from src.visualization.county_map import OUTPUT_PATH, build_county_map
+    from src.visualization.fonts import FONT_CACHE_DIR
+    from src.visualization.geometry import CACHE_DIR, SHAPEFILE_PATH
+
+    root = context["root"]
+    build_county_map(
+        output=os.path.join(root, OUTPUT_PATH),
+        store_dir=os.path.join(root, STORE_DIR),
+        shapefile_path=os.path.join(root, COUNTY_SHAPEFILE),
+        state_shapefile_path=os.path.join(root, SHAPEFILE_PATH),
+        geometry_cache_dir=os.path.join(root, CACHE_DIR),
+        font_cache_dir=os.path.join(root, FONT_CACHE_DIR),
+    )
+
+
+def fetch_series_panel(context):
+    """
+    Update the panel of every tracked series for every state in one batch,
+    incrementally when a stored panel exists.
+    """
+    from src.data.incremental import merge_panel
+    from src.data.series_panel import (
+        SeriesPanel,
+        collect_series_panel,
+        series_start_dates,
+    )
+
+    store = context["store"]
+    options = dict(
+        api_key=None,
+        state_codes=STATE_CODES,
+        suffixes=SERIES_SUFFIXES,
+        fred=fred_client(context),
+    )
+    if not context["full_refresh"] and SERIES_DATASET in store:
+        # Only request the revision window of each series
+        stored = SeriesPanel.read(store, SERIES_DATASET)
+        fresh = collect_series_panel(
+            observation_start=series_start_dates(stored, STATE_CODES, SERIES_SUFFIXES),
+            **options,
+        )
+        data, changed_from = merge_panel(stored.to_frame(), fresh.to_frame())
+        panel = SeriesPanel.from_frame(data)
+        print(f"Incremental update of the series panel, changes from {changed_from}")
+    else:
+        panel = collect_series_panel(observation_start="1990-01-01", **options)
+    print(
+        f"{len(panel.series_names)} series x {len(panel.states)} states x "
+        f"{len(panel.dates)} months, {panel.nbytes / 1e6:.1f} MB"
+    )
+    panel.write(store, SERIES_DATASET, snapshot_date=context["today"])
+
+
+def series_annual_pct_change(context):
+    """
+    Percent change from the same month a year earlier of every series at once.
+    """
+    from src.data.series_panel import SeriesPanel
+
+    store = context["store"]
+    frame = SeriesPanel.read(store, SERIES_DATASET).to_frame()
+    apc = SeriesPanel.from_frame(frame.pct_change(periods=12) * 100)
+    apc.write(store, f"{SERIES_DATASET}_apc", snapshot_date=context["today"])
+
+
+def render_quarto(context):
+    try:
+        subprocess.run(["quarto", "render"], cwd=context["root"], check=True)
+    except FileNotFoundError:
+        raise RuntimeError("Quarto is not installed, see https://quarto.org") from None
+
+
+def pipeline_stages(export_csv=False):
+    """
+    The stages of the monthly job, from the FRED probe to the rendered site.
+    """
+    from src.features.growth import METRIC_DATASETS, STORED_METRICS
+
+    dated_exports = []
+    if export_csv:
+        today = datetime.today().strftime("%Y%m%d")
+        dated_exports = [
+            f"data/raw/employment_state_{today}.csv",
+            f"data/processed/employment_state_apc_{today}.csv",
+            f"data/processed/employment_state_apc_pivoted_{today}.csv",
+        ]
+    return [
+        Stage(
+            "probe",
+            probe_release,
+            outputs=["data/store/release_probe.json"],
+            params={"series": PROBE_SERIES, "observations": PROBE_OBSERVATIONS},
+            always_run=True,
+        ),
+        Stage(
+            "fetch",
+            fetch_panel,
+            inputs=[
+                "data/store/release_probe.json",
+                "src/pipeline.py",
+                "src/data/fetch_fred.py",
+                "src/data/incremental.py",
+                "src/data/vintages.py",
+            ],
+            outputs=["store:employment_state"],
+            params={"states": STATE_CODES, "suffix": "NA"},
+        ),
+        Stage(
+            "annual_pct_change",
+            annual_pct_change,
+            inputs=[
+                "store:employment_state",
+                "src/pipeline.py",
+                "src/data/incremental.py",
+            ],
+            outputs=["store:employment_state_apc"],
+        ),
+        Stage(
+            "growth_metrics",
+            growth_metrics,
+            inputs=[
+                "store:employment_state",
+                "src/pipeline.py",
+                "src/features/growth.py",
+            ],
+            outputs=[f"store:{METRIC_DATASETS[metric]}" for metric in STORED_METRICS],
+        ),
+        Stage(
+            "export",
+            export_latest,
+            inputs=["store:employment_state_apc", "src/pipeline.py"],
+            outputs=[
+                "data/processed/employment_state_apc_pivoted_quarto.csv",
+                *dated_exports,
+            ],
+            params={"export_csv": export_csv},
+        ),
+        Stage(
+            "map_artifacts",
+            map_artifacts,
+            inputs=[
+                "store:employment_state_apc",
+                "data/raw/tl_2023_us_state.shp",
+                "data/raw/tl_2023_us_state.dbf",
+                "src/pipeline.py",
+                "src/visualization/artifacts.py",
+                "src/visualization/choropleth.py",
+                "src/visualization/classification.py",
+                "src/visualization/export.py",
+                "src/visualization/geometry.py",
+                "src/visualization/labels.py",
+                "src/visualization/topology.py",
+                "src/visualization/fonts.py",
+            ],
+            outputs=["reports/figures/latest"],
+        ),
+        Stage(
+            "interactive_map",
+            interactive_map,
+            inputs=[
+                "store:employment_state_apc",
+                "data/raw/us-states.json",
+                "src/pipeline.py",
+                "src/features/growth.py",
+                "src/visualization/interactive.py",
+                "src/visualization/choropleth.py",
+                "src/visualization/classification.py",
+                "src/visualization/topology.py",
+                "src/visualization/templates",
+            ],
+            outputs=["reports/figures/employment_map_interactive.html"],
+        ),
+        Stage(
+            "probe_county",
+            probe_county_release,
+            outputs=["data/store/county_release_probe.json"],
+            params={"series": COUNTY_PROBE_SERIES, "observations": PROBE_OBSERVATIONS},
+            always_run=True,
+        ),
+        Stage(
+            "fetch_counties",
+            fetch_county_panel,
+            inputs=[
+                "data/store/county_release_probe.json",
+                COUNTY_SHAPEFILE.replace(".shp", ".dbf"),
+                "src/pipeline.py",
+                "src/data/counties.py",
+                "src/data/fetch_fred.py",
+                "src/data/incremental.py",
+            ],
+            outputs=["store:employment_county"],
+            params={"measure": "employment"},
+        ),
+        Stage(
+            "county_pct_change",
+            county_annual_pct_change,
+            inputs=[
+                "store:employment_county",
+                "src/pipeline.py",
+                "src/data/incremental.py",
+            ],
+            outputs=["store:employment_county_apc"],
+        ),
+        Stage(
+            "county_map",
+            county_map,
+            inputs=[
+                "store:employment_county_apc",
+                COUNTY_SHAPEFILE,
+                "data/raw/tl_2023_us_state.shp",
+                "src/pipeline.py",
+                "src/visualization/county_map.py",
+                "src/visualization/choropleth.py",
+                "src/visualization/classification.py",
+                "src/visualization/geometry.py",
+                "src/visualization/labels.py",
+                "src/visualization/topology.py",
+                "src/visualization/fonts.py",
+            ],
+            outputs=["reports/figures/county"],
+        ),
+        Stage(
+            "fetch_series",
+            fetch_series_panel,
+            inputs=[
+                "data/store/release_probe.json",
+                "src/pipeline.py",
+                "src/data/fetch_fred.py",
+                "src/data/incremental.py",
+                "src/data/series_panel.py",
+            ],
+            outputs=[f"store:{SERIES_DATASET}"],
+            params={"states": STATE_CODES, "suffixes": SERIES_SUFFIXES},
+        ),
+        Stage(
+            "series_pct_change",
+            series_annual_pct_change,
+            inputs=[
+                f"store:{SERIES_DATASET}",
+                "src/pipeline.py",
+                "src/data/series_panel.py",
+            ],
+            outputs=[f"store:{SERIES_DATASET}_apc"],
+        ),
+        Stage(
+            "quarto",
+            render_quarto,
+            inputs=[
+                "employment_growth_map.qmd",
+                "_quarto.yml",
+                "style.css",
+                "reports/figures/latest",
+                "reports/figures/employment_map_interactive.html",
+            ],
+            outputs=["docs"],
+        ),
+    ]
+
+
+def main(argv=None, default_targets=DEFAULT_TARGETS):
+    parser = argparse.ArgumentParser(
+        description="Run the employment map pipeline, skipping unchanged stages"
+    )
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        help=f"Stages to bring up to date (default: {' '.join(default_targets)})",
+    )
+    parser.add_argument(
+        "--force",
+        nargs="*",
+        metavar="STAGE",
+        help="Re-run these stages even if up to date, or every stage if none are named",
+    )
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Re-download the full history instead of updating the stored panel",
+    )
+    parser.add_argument(
+        "--export-csv",
+        action="store_true",
+        help="Also write the dated CSV snapshots of the raw and processed panels",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write a JSON report of the time, memory and HTTP traffic of every stage "
+        "(also enabled by PIPELINE_PROFILE=1)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        metavar="SECONDS",
+        help="Serve FRED responses younger than this from the on-disk cache, for "
+        "development reruns; the release probe is then cached too",
+    )
+    parser.add_argument("--list", action="store_true", help="List the stages and exit")
+    args = parser.parse_args(argv)
+
+    from src.data.storage import PanelStore
+    from src.instrumentation import RunProfiler
+
+    stages = pipeline_stages(export_csv=args.export_csv)
+    if args.list:
+        for stage in stages:
+            print(f"{stage.name:<18}{', '.join(stage.outputs)}")
+        return
+
+    force = set(args.force or [])
+    if args.force == []:
+        force = True
+    if args.full_refresh and force is not True:
+        force.add("fetch")
+
+    today = datetime.today().strftime("%Y%m%d")
+    context = {
+        "root": ROOT,
+        "store": PanelStore(os.path.join(ROOT, STORE_DIR)),
+        "today": today,
+        "full_refresh": args.full_refresh,
+        "export_csv": args.export_csv,
+        "cache_ttl": args.cache_ttl,
+    }
+    os.makedirs(os.path.join(ROOT, STORE_DIR), exist_ok=True)
+
+    # Per-stage instrumentation, a no-op unless profiling is enabled
+    profiler = RunProfiler("pipeline", enabled=args.profile or None)
+    run_pipeline(
+        stages, args.targets or default_targets, context, force, profiler=profiler
+    )
+
+    # Write the run report next to the processed data when profiling is enabled
+    report_path = profiler.write_report(
+        os.path.join(ROOT, f"data/processed/run_report_pipeline_{today}.json")
+    )
+    if report_path is not None:
+        print(f"Run report written to {report_path}")
+    if context.get("http_cache") is not None:
+        stats = context["http_cache"].stats()
+        print(
+            f"FRED cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['revalidated']} revalidated, {stats['evictions']} evicted"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Animated employment map over a range of months, written as GIF, MP4 or WebP.
+
+Every month is drawn by updating one MapTemplate, so the geometries are only
+plotted once, and each frame is passed to the encoder as soon as it is
+rendered. Only the current frame is kept in memory, so peak memory does not
+grow with the number of frames. GIFs are written with Pillow; MP4 and WebP
+are piped to ffmpeg, which has to be on the PATH. With `--scheme` the
+colors are classes computed over the whole history of the metric (see
+`classification.py`) rather than the fixed bins, so every frame shares one
+legend and animations of different periods can be compared.
+
+Run from the repository root, e.g.:
+
+    python -m src.visualization.animate --start 2007-01-01 --end 2012-12-01 \\
+        --output reports/figures/employment_map_yoy_2007_2012.gif
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+from PIL import GifImagePlugin, Image
+
+from src.data.storage import PanelStore
+from src.features.growth import GROWTH_METRIC_LABELS, METRIC_DATASETS
+from src.visualization.choropleth import MapTemplate, color_scale
+from src.visualization.classification import SCHEMES
+from src.visualization.fonts import load_fonts
+from src.visualization.geometry import detail_level, load_geometry_asset
+
+STORE_DIR = "data/store"
+
+# ffmpeg output options for each container
+FFMPEG_CODECS = {
+    ".mp4": [
+        "-c:v",
+        "libx264",
+        "-pix_fmt",
+        "yuv420p",
+        # yuv420p needs even frame sizes
+        "-vf",
+        "pad=ceil(iw/2)*2:ceil(ih/2)*2:color=white",
+    ],
+    ".webp": ["-c:v", "libwebp_anim", "-loop", "0"],
+}
+
+
+class GifWriter:
+    """
+    Write a looping GIF one frame at a time.
+
+    Pillow's own multi-frame GIF writer holds every frame until the end, so the
+    header and frames are written with its per-frame helpers instead. Each frame
+    gets its own palette.
+    """
+
+    def __init__(self, path, fps):
+        self.file = open(path, "wb")
+        self.duration = round(1000 / fps)
+        self.frame_count = 0
+
+    def write(self, frame):
+        image = Image.fromarray(frame).convert("RGB").quantize(256)
+        if self.frame_count == 0:
+            header, _ = GifImagePlugin.getheader(
+                image, info={"loop": 0, "duration": self.duration}
+            )
+            self.file.write(b"".join(header))
+        for data in GifImagePlugin.getdata(
+            image, duration=self.duration, include_color_table=True
+        ):
+            self.file.write(data)
+        self.frame_count += 1
+
+    def close(self):
+        self.file.write(b";")  # GIF trailer
+        self.file.close()
+
+
+class FFmpegWriter:
+    """
+    Pipe raw RGBA frames to ffmpeg, which encodes them as they arrive.
+    """
+
+    def __init__(self, path, fps, size):
+        ffmpeg = shutil.which(matplotlib.rcParams["animation.ffmpeg_path"])
+        if ffmpeg is None:
+            raise FileNotFoundError(
+                "ffmpeg was not found on the PATH, it is needed for MP4 and WebP output"
+            )
+        width, height = size
+        # fmt: off
+        command = [
+            ffmpeg, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}",
+            "-r", str(fps), "-i", "-",
+            *FFMPEG_CODECS[os.path.splitext(path)[1].lower()],
+            path,
+        ]
+        # fmt: on
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self.process.stdin.write(np.ascontiguousarray(frame).tobytes())
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with code {self.process.returncode}")
+
+
+def frame_crop(fig, pad_inches=0.1):
+    """
+    Pixel bounds (rows, columns) of the figure's tight bounding box, like `bbox_inches="tight"`.
+    """
+    fig.canvas.draw()
+    bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(pad_inches)
+    x0, y0, x1, y1 = (bbox.extents * fig.dpi).round().astype(int)
+    width, height = fig.canvas.get_width_height()
+    # Image rows start at the top, figure coordinates at the bottom
+    rows = slice(max(height - y1, 0), min(height - y0, height))
+    columns = slice(max(x0, 0), min(x1, width))
+    return rows, columns
+
+
+def render_frames(template, panel, metric, dpi):
+    """
+    Yield the map of every month in the panel as an RGBA array, all cropped to the same box.
+    """
+    template.fig.set_dpi(dpi)
+    crop = None
+    for date, state_values in panel.iterrows():
+        fig = template.render(
+            state_values,
+            subtitle=f"Total nonfarm employment, {GROWTH_METRIC_LABELS[metric]} ({date:%b %Y})",
+        )
+        if crop is None:
+            crop = frame_crop(fig)
+        fig.canvas.draw()
+        yield np.asarray(fig.canvas.buffer_rgba())[crop]
+
+
+def animate_map(
+    output,
+    start=None,
+    end=None,
+    metric="yoy",
+    fps=4,
+    dpi=150,
+    store_dir=STORE_DIR,
+    fonts=None,
+    scheme="fixed",
+):
+    """
+    Render the map of a metric for every month in a date range into one animation.
+
+    Parameters:
+    - output (str): Path of the animation; the extension (.gif, .mp4 or .webp) picks the format.
+    - start (str): First month (YYYY-MM-DD). Defaults to the first month with data.
+    - end (str): Last month (YYYY-MM-DD). Defaults to the latest month.
+    - metric (str): Metric to map, see GROWTH_METRICS.
+    - fps (float): Frames (months) per second.
+    - dpi (int): Resolution of the frames.
+    - store_dir (str): Folder of the panel store holding the metric panels.
+    - fonts (dict): Fonts returned by `load_fonts`. Loaded from the font cache if not given.
+    - scheme (str): 'fixed' bins or a classification computed over the whole
+      history of the metric, see `color_scale`.
+
+    Returns:
+    - int: Number of frames written.
+    """
+    extension = os.path.splitext(output)[1].lower()
+    if extension != ".gif" and extension not in FFMPEG_CODECS:
+        raise ValueError(f"Unsupported animation format '{extension}'")
+
+    store = PanelStore(store_dir)
+    panel = store.read(METRIC_DATASETS[metric], start=start, end=end)
+    panel = panel[panel.notna().any(axis=1)]
+    if panel.empty:
+        raise ValueError(f"No {metric} values between {start} and {end}")
+
+    scale = color_scale(
+        (None if scheme == "fixed" else store.read_values(METRIC_DATASETS[metric])[0]),
+        scheme,
+    )
+    template = MapTemplate(
+        load_geometry_asset(level=detail_level(dpi)),
+        panel.columns,
+        fonts or load_fonts(),
+        scale,
+        values=panel.to_numpy(),
+    )
+
+    frames = render_frames(template, panel, metric, dpi)
+    first = next(frames)
+    if extension == ".gif":
+        writer = GifWriter(output, fps)
+    else:
+        writer = FFmpegWriter(output, fps, size=(first.shape[1], first.shape[0]))
+    try:
+        writer.write(first)
+        for frame in frames:
+            writer.write(frame)
+    finally:
+        writer.close()
+    return len(panel)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Animate the employment map over time")
+    parser.add_argument(
+        "--output", required=True, help="Path ending in .gif, .mp4 or .webp"
+    )
+    parser.add_argument("--start", help="First month (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last month (YYYY-MM-DD)")
+    parser.add_argument("--metric", default="yoy", choices=sorted(GROWTH_METRIC_LABELS))
+    parser.add_argument("--fps", type=float, default=4)
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--scheme", default="fixed", choices=["fixed", *SCHEMES])
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    n_frames = animate_map(
+        args.output,
+        start=args.start,
+        end=args.end,
+        metric=args.metric,
+        fps=args.fps,
+        dpi=args.dpi,
+        scheme=args.scheme,
+    )
+    elapsed = time.perf_counter() - start_time
+
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Wrote {n_frames} frames to {args.output} in {elapsed:.1f}s")
+    print(f"{elapsed / n_frames * 1e3:.0f} ms/frame, peak RSS {peak_rss:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Pre-rendered map artifacts for the Quarto page.
+
+The page used to run the whole map pipeline in a Jupyter kernel on every
+`quarto render`: imports, fonts, shapefile and drawing. The pipeline now
+builds the artifacts once, when the data changes, and the page only
+templates them:
+
+    <output_dir>/employment_map.png     the map, as drawn by `draw_employment_map`
+    <output_dir>/employment_map.json    month, values per state and the image name
+    <output_dir>/employment_map.yml     the same month and update date as Quarto
+                                        metadata, for {{< meta map.* >}} shortcodes
+    <output_dir>/employment_map_<size>.png/.webp, employment_map.svg/.pdf
+                                        the export set for the site, the newsletter
+                                        and social media, see `export.py`
+
+The map is drawn once and every image, the page's included, is written from
+that one render by `export_figure`.
+
+Everything in the artifacts is derived from the stored panel, not the clock,
+so rebuilding from unchanged data gives identical files.
+
+Build them from the repository root with:
+
+    python -m src.visualization.artifacts
+"""
+
+import argparse
+import json
+import os
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+
+from src.data.storage import PanelStore
+from src.visualization.choropleth import draw_employment_map, merge_map_data
+from src.visualization.export import export_figure, export_files
+from src.visualization.fonts import FONT_CACHE_DIR, load_fonts
+from src.visualization.geometry import (
+    CACHE_DIR,
+    SHAPEFILE_PATH,
+    detail_level,
+    load_geometry_asset,
+)
+
+OUTPUT_DIR = "reports/figures/latest"
+STORE_DIR = "data/store"
+DATASET = "employment_state_apc"
+IMAGE_NAME = "employment_map.png"
+
+
+def map_metadata(selected_row, updated):
+    """
+    Describe the mapped month for the page.
+
+    Parameters:
+    - selected_row (pd.Series): Values indexed by state code, named by the observation date.
+    - updated (str): Date the stored data last changed (YYYYMMDD).
+
+    Returns:
+    - dict: Month, update date, image name and the value of every state (None if missing).
+    """
+    return {
+        "date": f"{selected_row.name:%Y-%m-%d}",
+        "month": f"{selected_row.name:%B %Y}",
+        "updated": f"{updated[6:8]}-{updated[4:6]}-{updated[:4]}",
+        "metric": "annual percent change",
+        "image": IMAGE_NAME,
+        "values": {
+            state: None if value != value else round(float(value), 2)
+            for state, value in selected_row.items()
+        },
+    }
+
+
+def write_quarto_metadata(metadata, path):
+    """
+    Write the scalar fields as a Quarto metadata file under the 'map' key.
+    """
+    lines = ["map:"]
+    for key in ("date", "month", "updated", "metric", "image"):
+        lines.append(f'  {key}: "{metadata[key]}"')
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def build_map_artifacts(
+    output_dir=OUTPUT_DIR,
+    store_dir=STORE_DIR,
+    shapefile_path=SHAPEFILE_PATH,
+    geometry_cache_dir=CACHE_DIR,
+    font_cache_dir=FONT_CACHE_DIR,
+    dpi=300,
+    exports=True,
+):
+    """
+    Draw the map of the latest month and write it with its metadata.
+
+    Parameters:
+    - output_dir (str): Folder for the image and the metadata files.
+    - store_dir (str): Folder of the panel store.
+    - shapefile_path (str): Path to the state shapefile.
+    - geometry_cache_dir (str): Folder of the cached geometry asset.
+    - font_cache_dir (str): Folder of the font cache.
+    - dpi (int): Resolution of the image.
+    - exports (bool): Also write the export set (EXPORT_SIZES as PNG and
+      WebP, SVG and PDF) from the same render.
+
+    Returns:
+    - dict: The metadata written to the JSON file.
+    """
+    store = PanelStore(store_dir)
+    selected_row = store.read_row(DATASET)
+    updated = store.info(DATASET)["snapshots"][-1]["date"]
+    column_to_plot = f"apc_{selected_row.name:%Y%m%d}"
+
+    gdf = load_geometry_asset(shapefile_path, geometry_cache_dir, detail_level(dpi))
+    data = merge_map_data(gdf, selected_row, column_to_plot)
+    fig = draw_employment_map(
+        data,
+        column_to_plot,
+        subtitle=f"Total nonfarm employemnt, annual percent change ({selected_row.name:%B %Y})",
+        fonts=load_fonts(cache_dir=font_cache_dir),
+    )
+
+    bitmaps, vectors = export_files("employment_map") if exports else ([], [])
+    export_figure(fig, output_dir, [(IMAGE_NAME, None), *bitmaps], vectors, dpi=dpi)
+    plt.close(fig)
+
+    metadata = map_metadata(selected_row, updated)
+    metadata["exports"] = [file_name for file_name, _ in bitmaps] + vectors
+    with open(os.path.join(output_dir, "employment_map.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+    write_quarto_metadata(metadata, os.path.join(output_dir, "employment_map.yml"))
+    return metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the map artifacts for Quarto")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument(
+        "--no-exports", action="store_true", help="Only write the page's image"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    metadata = build_map_artifacts(
+        args.output_dir, dpi=args.dpi, exports=not args.no_exports
+    )
+    print(
+        f"Wrote the map of {metadata['month']} to {args.output_dir} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
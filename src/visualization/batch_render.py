@@ -0,0 +1,226 @@
+"""
+Render the employment map for many months and metrics across a process pool.
+
+Each worker loads the metric panels and builds one MapTemplate from the
+geometry asset and the fonts, then renders its share of the maps by updating
+the template's colors and labels. Files are named
+`employment_map_<metric>_<YYYYMM>.png`, so reruns overwrite the same files.
+
+With `--scheme` each metric is colored by classes computed over its whole
+history (see `classification.py`) instead of the fixed bins, so the maps of
+a month like April 2020 are not one solid color and every frame of a
+metric uses the same legend.
+
+Run from the repository root, e.g.:
+
+    python -m src.visualization.batch_render --start 1990-01-01 --metrics yoy mom
+    python -m src.visualization.batch_render --metrics yoy --scheme quantile
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+
+from src.data.storage import PanelStore
+from src.features.growth import GROWTH_METRIC_LABELS, METRIC_DATASETS
+from src.visualization.choropleth import MapTemplate, color_scale
+from src.visualization.classification import SCHEMES
+from src.visualization.fonts import FONT_CACHE_DIR, load_fonts
+from src.visualization.geometry import (
+    CACHE_DIR,
+    SHAPEFILE_PATH,
+    detail_level,
+    load_geometry_asset,
+)
+
+STORE_DIR = "data/store"
+OUTPUT_DIR = "reports/figures/archive"
+
+# State loaded once per worker process by `init_worker`
+worker_state = {}
+
+
+def map_file_name(metric, date):
+    return f"employment_map_{metric}_{date:%Y%m}.png"
+
+
+def init_worker(
+    store_dir,
+    metrics,
+    shapefile_path,
+    cache_dir,
+    font_cache_dir,
+    level,
+    scheme="fixed",
+):
+    """
+    Load everything the renders share once per worker process.
+    """
+    store = PanelStore(store_dir)
+    worker_state["panels"] = {
+        metric: store.read(METRIC_DATASETS[metric]) for metric in metrics
+    }
+    state_codes = worker_state["panels"][metrics[0]].columns
+    geometry = load_geometry_asset(shapefile_path, cache_dir, level)
+    # The parent has warmed the font cache, so workers never go to the network
+    fonts = load_fonts(font_cache_dir, offline=True)
+    if scheme == "fixed":
+        # Every metric shares the fixed bins, so one template serves them all
+        values = [panel.to_numpy() for panel in worker_state["panels"].values()]
+        template = MapTemplate(
+            geometry, state_codes, fonts, values=np.concatenate(values, axis=None)
+        )
+        worker_state["templates"] = {metric: template for metric in metrics}
+    else:
+        # The scale of each metric holds for all of its months
+        worker_state["templates"] = {
+            metric: MapTemplate(
+                geometry,
+                state_codes,
+                fonts,
+                color_scale(worker_state["panels"][metric].to_numpy(), scheme),
+                values=worker_state["panels"][metric].to_numpy(),
+            )
+            for metric in metrics
+        }
+
+
+def render_map(metric, date, output_dir, dpi=300):
+    """
+    Render and save the map of one metric in one month using the worker's shared state.
+
+    Returns:
+    - str: Path of the saved image.
+    """
+    fig = worker_state["templates"][metric].render(
+        worker_state["panels"][metric].loc[date],
+        subtitle=f"Total nonfarm employment, {GROWTH_METRIC_LABELS[metric]} ({date:%b %Y})",
+    )
+    path = os.path.join(output_dir, map_file_name(metric, date))
+    fig.savefig(path, dpi=dpi, bbox_inches="tight")
+    return path
+
+
+def render_chunk(tasks, output_dir, dpi):
+    return [render_map(metric, date, output_dir, dpi) for metric, date in tasks]
+
+
+def batch_render(
+    start=None,
+    end=None,
+    metrics=("yoy",),
+    workers=None,
+    output_dir=OUTPUT_DIR,
+    dpi=300,
+    store_dir=STORE_DIR,
+    shapefile_path=SHAPEFILE_PATH,
+    cache_dir=CACHE_DIR,
+    font_cache_dir=FONT_CACHE_DIR,
+    scheme="fixed",
+):
+    """
+    Render the map of every requested metric for every month in a date range.
+
+    Parameters:
+    - start (str): First month to render (YYYY-MM-DD). Defaults to the first month with data.
+    - end (str): Last month to render (YYYY-MM-DD). Defaults to the latest month.
+    - metrics (list): Metrics to render, see GROWTH_METRICS.
+    - workers (int): Number of worker processes. Defaults to the number of CPUs.
+    - output_dir (str): Folder for the rendered images.
+    - dpi (int): Resolution of the saved images.
+    - store_dir (str): Folder of the panel store holding the metric panels.
+    - shapefile_path (str): Path to the state shapefile.
+    - cache_dir (str): Folder for the cached geometry asset.
+    - font_cache_dir (str): Folder of the font cache.
+    - scheme (str): 'fixed' bins or a classification computed over the whole
+      history of each metric, see `color_scale`.
+
+    Returns:
+    - list: Paths of the rendered images, in (metric, date) order.
+    """
+    workers = workers or os.cpu_count()
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Build the geometry asset at the level of detail the resolution needs and
+    # fetch the fonts up front so the workers only have to load them
+    level = detail_level(dpi)
+    load_geometry_asset(shapefile_path, cache_dir, level)
+    load_fonts(font_cache_dir)
+
+    # List the (metric, month) pairs that have at least one value to map
+    store = PanelStore(store_dir)
+    tasks = []
+    for metric in metrics:
+        panel = store.read(METRIC_DATASETS[metric], start=start, end=end)
+        dates = panel.index[panel.notna().any(axis=1)]
+        tasks.extend((metric, date) for date in dates)
+
+    # Deal tasks out round-robin in several chunks per worker to balance the load
+    n_chunks = min(len(tasks), workers * 4)
+    chunks = [tasks[i::n_chunks] for i in range(n_chunks)]
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(
+            store_dir,
+            list(metrics),
+            shapefile_path,
+            cache_dir,
+            font_cache_dir,
+            level,
+            scheme,
+        ),
+    ) as executor:
+        results = executor.map(
+            render_chunk, chunks, [output_dir] * n_chunks, [dpi] * n_chunks
+        )
+        paths = {}
+        for chunk, chunk_paths in zip(chunks, results):
+            paths.update(zip(chunk, chunk_paths))
+
+    return [paths[task] for task in tasks]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render historical employment maps")
+    parser.add_argument("--start", help="First month to render (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last month to render (YYYY-MM-DD)")
+    parser.add_argument(
+        "--metrics", nargs="+", default=["yoy"], choices=sorted(GROWTH_METRIC_LABELS)
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--scheme", default="fixed", choices=["fixed", *SCHEMES])
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    paths = batch_render(
+        start=args.start,
+        end=args.end,
+        metrics=args.metrics,
+        workers=args.workers,
+        output_dir=args.output_dir,
+        dpi=args.dpi,
+        scheme=args.scheme,
+    )
+    elapsed = time.perf_counter() - start_time
+
+    maps_per_second = len(paths) / elapsed
+    print(f"Rendered {len(paths)} maps to {args.output_dir} in {elapsed:.1f}s")
+    print(
+        f"{maps_per_second:.2f} maps/s with {args.workers} workers, "
+        f"{maps_per_second / args.workers:.2f} maps/s per core"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,614 @@
+"""
+Drawing functions for the employment growth choropleth.
+
+`draw_employment_map` builds the full figure (contiguous US, Alaska and
+Hawaii insets, labels, arrows, legend and text) from a GeoDataFrame that
+holds the prepared state geometries and one column of values.
+
+The regions are colored by a `ColorScale`: the fixed bins below by default,
+or classes computed over the whole history of a panel by `color_scale`
+(see `classification.py`), which also fill the legend.
+
+matplotlib, highlight_text and drawarrow are imported by the functions that
+draw, so the colors and bins can be imported without loading them.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.visualization.classification import ColorScale
+
+text_color = "black"
+
+# Define custom colors for each bin
+color_mapping = {
+    "<0%": "#FDDBC7FF",  # Orange
+    "0-1%": "#66F0FAFF",  # Light blue
+    "1-2%": "#66CCFFFF",  # Slightly darker blue
+    "2-3%": "#33B2FFFF",  # Darker blue
+    "3+%": "#035AA6FF",  # Darkest blue
+}
+
+# Edges of the bins in color_mapping; the first and last bins are open, so
+# every value gets a color
+bins = [float("-inf"), 0, 1, 2, 3, float("inf")]
+
+# Color for states without a value
+missing_color = "#D9D9D9FF"  # Light grey
+
+# Scale of the fixed bins, used unless a map is given another
+default_scale = ColorScale(
+    bins[1:-1], list(color_mapping.values()), list(color_mapping), missing_color
+)
+
+# Axis limits (longitude, latitude) of the panel of each region
+panel_limits = {
+    "contiguous": ((-130, -65), (24, 55)),
+    "alaska": ((-200, -100), (50, 73)),
+    "hawaii": ((-162, -152), (18, 24)),
+}
+
+# Size in points of the labels inside the states and of the callouts
+label_fontsize = 4.25  # Reduced from 8.5 (scaled for 2x smaller)
+callout_fontsize = 4.5  # Reduced from 9 (scaled for 2x smaller)
+
+# Most callouts drawn, largest states first. The small eastern states need
+# about ten; a map of many more regions, e.g., counties, would spend its time
+# searching for spots outside regions that are not there
+max_callouts = 16
+
+# Space between the two lines of a label, in points (highlight_text's default)
+label_vsep = 4
+
+# Value the labels are sized for when no values are given
+value_placeholder = "-0.00"
+
+# Text between the state code and the value for each layout chosen by
+# `place_labels`: two lines, one line, and callouts (-1)
+value_separators = {0: "\n", 1: ":", -1: ": "}
+
+
+def add_text_artist(text):
+    """
+    Add a HighlightText created with `add_artist=False` to its axes.
+
+    When highlight_text adds the artist itself it redraws the whole figure for
+    every text, which makes labelling quadratic in the number of labels.
+    """
+    text.ax.add_artist(text.annotation_bbox)
+    return text
+
+
+def format_value(value):
+    """
+    Text of a value in the state labels.
+    """
+    return f"{value:.2f}"
+
+
+def widest_value(values, fonts):
+    """
+    The formatted value that takes the most room in a label, among `values`.
+
+    A template sizes its labels with it, so that the labels placed once fit
+    every month it renders, April 2020 included.
+
+    Parameters:
+    - values (array-like): Every value to be shown, e.g., a whole panel.
+    - fonts: dict of FontProperties returned by `load_fonts`.
+
+    Returns:
+    - str: The widest text, `value_placeholder` if no value is finite.
+    """
+    from src.visualization.labels import text_size
+
+    values = np.asarray(values, dtype="float64").ravel()
+    texts = {format_value(value) for value in np.unique(values[np.isfinite(values)])}
+    if not texts:
+        return value_placeholder
+    # Only the longest texts can be the widest, give or take a narrow digit
+    longest = max(len(text) for text in texts)
+    candidates = sorted(text for text in texts if len(text) >= longest - 1)
+    return max(
+        candidates, key=lambda text: text_size(text, fonts["light"], label_fontsize)[0]
+    )
+
+
+def label_sizes(codes, fonts, value_texts=value_placeholder):
+    """
+    Size in points of the state labels in each layout tried by `place_labels`.
+
+    Parameters:
+    - codes: list of state codes.
+    - fonts: dict of FontProperties returned by `load_fonts`.
+    - value_texts: The value text of each state, as drawn, or one text every
+      label is sized for, such as the `widest_value` of a template's panels.
+
+    Returns:
+    - tuple: The (width, height) arrays of the two-line and one-line labels,
+      and the (width, height) arrays of the callouts.
+    """
+    from src.visualization.labels import text_size
+
+    texts = np.broadcast_to(np.asarray(value_texts, dtype=str), (len(codes),))
+
+    def measure(separator, fontsize):
+        code_sizes = np.array(
+            [text_size(code, fonts["medium"], fontsize) for code in codes]
+        ).reshape(-1, 2)
+        # The value of a two-line label is on a line of its own
+        prefix = "" if separator == "\n" else separator
+        sizes = {
+            text: text_size(prefix + text, fonts["light"], fontsize)
+            for text in set(texts)
+        }
+        value_width, value_height = (
+            np.array([sizes[text] for text in texts]).reshape(-1, 2).T
+        )
+        if separator == "\n":
+            return (
+                np.maximum(code_sizes[:, 0], value_width),
+                code_sizes[:, 1] + value_height + label_vsep,
+            )
+        return (
+            code_sizes[:, 0] + value_width,
+            np.maximum(code_sizes[:, 1], value_height),
+        )
+
+    layouts = [measure(value_separators[k], label_fontsize) for k in (0, 1)]
+    return layouts, measure(value_separators[-1], callout_fontsize)
+
+
+def annotate_states(
+    geo_df, ax, value_col, fonts, limits=None, scale=default_scale, sized_text=None
+):
+    """
+    Annotates states on a geographic plot with their respective values.
+
+    Labels are placed by `place_labels`: on two lines inside the state when
+    they fit, else on one line, else outside the state with an arrow pointing
+    at it. The axis limits must be final, since the labels are sized in points.
+
+    Parameters:
+    - geo_df: GeoDataFrame containing the geometries and state codes.
+    - ax: Matplotlib axis on which the annotations will be plotted.
+    - value_col: Column name containing the values to be displayed for each state.
+    - fonts: dict of FontProperties returned by `load_fonts`.
+    - limits: Area (xmin, xmax, ymin, ymax) in data coordinates the labels must
+      stay in; defaults to the axis limits.
+    - scale: ColorScale of the map; labels in its darkest class are white.
+    - sized_text: Value text every label is sized for, when the labels will be
+      updated with other values; by default each is sized for its own value.
+
+    Returns:
+    - dict: The HighlightText label of each state and its layout (see
+      `value_separators`), keyed by state code.
+    """
+    from drawarrow import ax_arrow
+    from highlight_text import ax_text
+
+    from src.visualization.labels import axis_scale, place_labels
+
+    geo_df = geo_df.drop_duplicates("STUSPS")
+    states = geo_df["STUSPS"].to_numpy(dtype=str)
+    rates = geo_df[value_col].to_numpy(dtype=float)
+
+    texts = [format_value(rate) for rate in rates]
+    layouts, callout_size = label_sizes(
+        states, fonts, texts if sized_text is None else sized_text
+    )
+    placement = place_labels(
+        geo_df.geometry.values,
+        layouts,
+        axis_scale(ax),
+        limits or (*ax.get_xlim(), *ax.get_ylim()),
+        callout_size=callout_size,
+        max_callouts=max_callouts,
+    )
+
+    # Determine text color based on rate value; callouts are outside the map
+    callout = placement["callout"].to_numpy()
+    colors = np.where(scale.is_darkest(rates) & ~callout, "white", text_color)
+
+    labels = {}
+    for i in np.flatnonzero(placement["placed"].to_numpy()):
+        row = placement.iloc[i]
+        if callout[i]:
+            ax_arrow(
+                tail_position=(row["tail_x"], row["tail_y"]),
+                head_position=(row["anchor_x"], row["anchor_y"]),
+                ax=ax,
+                width=0.25,
+                head_width=1,
+                head_length=2,
+                color="black",
+            )
+        separator = value_separators[row["layout"]]
+        labels[states[i]] = (
+            add_text_artist(
+                ax_text(
+                    x=row["x"],
+                    y=row["y"],
+                    s=f"<{states[i]}>{separator}{texts[i]}",
+                    fontsize=callout_fontsize if callout[i] else label_fontsize,
+                    ha="center",
+                    va="center",
+                    font=fonts["light"],
+                    color=colors[i],
+                    ax=ax,
+                    vsep=label_vsep,
+                    highlight_textprops=[{"font": fonts["medium"]}],
+                    add_artist=False,
+                )
+            ),
+            row["layout"],
+        )
+    return labels
+
+
+def color_scale(values=None, scheme="fixed", k=5):
+    """
+    Color scale of a map: the fixed bins, or classes computed over every value of a panel.
+
+    Parameters:
+    - values (array-like): Every (date, region) value the scale must hold for,
+      e.g., the whole history of a panel; not needed for the fixed bins.
+    - scheme (str): 'fixed' or one of SCHEMES in `classification.py`.
+    - k (int): Number of classes of a computed scheme.
+
+    Returns:
+    - ColorScale: Colors along those of `color_mapping`, labelled from the breaks.
+    """
+    if scheme == "fixed":
+        return default_scale
+    return ColorScale.from_values(
+        values, list(color_mapping.values()), scheme, k, missing_color
+    )
+
+
+def bin_values(values, scale=default_scale):
+    """
+    Assign each value to its class in the scale, NaN for missing values.
+    """
+    return pd.Series(
+        pd.Categorical.from_codes(scale.classify(values), categories=scale.labels),
+        index=getattr(values, "index", None),
+    )
+
+
+def value_colors(values, scale=default_scale):
+    """
+    Look up the color of every value at once, `missing_color` for NaN.
+
+    Matches `bin_values`: bins include their upper edge.
+
+    Returns:
+    - np.ndarray: One color string per value.
+    """
+    return scale.value_colors(values)
+
+
+def plot_with_legend(data, ax, xlim, ylim, scale=default_scale):
+    """
+    Plots the data on the provided axis with optional legend.
+
+    Parameters:
+    - data: GeoDataFrame to plot.
+    - ax: Matplotlib axis to plot on.
+    - xlim: Tuple for x-axis limits.
+    - ylim: Tuple for y-axis limits.
+    - scale: ColorScale that colored the 'binned' column.
+    """
+    # Plot data with custom color mapping
+    data.plot(
+        ax=ax,
+        color=data["binned"]
+        .map(scale.color_mapping)
+        .astype(object)
+        .fillna(scale.missing_color),
+        edgecolor="white",
+        linewidth=0.5,
+        legend=False,  # Disable automatic legend
+    )
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+
+
+def merge_map_data(geometry, state_values, column_to_plot):
+    """
+    Join one value per state onto the prepared geometries.
+
+    Parameters:
+    - geometry: GeoDataFrame returned by `load_geometry_asset`.
+    - state_values: Series of values indexed by state code.
+    - column_to_plot: str, name of the value column in the result.
+
+    Returns:
+    - GeoDataFrame: The states present in both inputs, with the value column added.
+    """
+    employment_data = state_values.rename_axis("State").reset_index(name=column_to_plot)
+    return geometry.merge(
+        employment_data, how="inner", left_on="STUSPS", right_on="State"
+    )
+
+
+def add_legend_and_titles(fig, title, subtitle, fonts, scale=default_scale):
+    """
+    Hide the axes and add the legend of the color scale, title, subtitle and
+    credits shared by the maps.
+
+    Returns:
+    - HighlightText: The subtitle, so templates can update it.
+    """
+    import matplotlib.patches as mpatches
+    from highlight_text import fig_text
+
+    for ax in fig.axes:
+        ax.set_axis_off()
+
+    legend_handles = [
+        mpatches.Patch(color=color, label=label)
+        for label, color in scale.color_mapping.items()
+    ]
+
+    fig.legend(
+        handles=legend_handles,
+        loc="lower center",
+        bbox_to_anchor=(
+            0.5,
+            0.02,
+        ),  # Position the legend at the bottom center of the figure
+        ncol=len(scale.colors),  # Arrange items in a single row
+        frameon=False,
+        fontsize=6,  # Adjusted for 2x smaller
+        prop={"size": 6},  # Adjusted for 2x smaller
+    )
+
+    # title - adjusted font size
+    add_text_artist(
+        fig_text(
+            s=title,
+            x=0.15,
+            y=0.9,
+            color=text_color,
+            fontsize=12,  # Adjusted for 2x smaller
+            font=fonts["title"],
+            ha="left",
+            va="top",
+            ax=fig.axes[-1],
+            add_artist=False,
+        )
+    )
+
+    # subtitle - adjusted font size
+    subtitle_text = add_text_artist(
+        fig_text(
+            s=subtitle,
+            x=0.15,
+            y=0.85,
+            color=text_color,
+            fontsize=6,  # Adjusted for 2x smaller
+            font=fonts["light"],
+            ha="left",
+            va="top",
+            ax=fig.axes[-1],
+            add_artist=False,
+        )
+    )
+
+    # credit - adjusted font size
+    add_text_artist(
+        fig_text(
+            s="Source: U.S. Bureau of Labour Statistics",
+            x=0.93,
+            y=0.01,
+            color=text_color,
+            fontsize=4,  # Adjusted for 2x smaller
+            font=fonts["light"],
+            ha="right",
+            va="top",
+            ax=fig.axes[-1],
+            add_artist=False,
+        )
+    )
+
+    # credit - adjusted font size
+    add_text_artist(
+        fig_text(
+            s="autonomousecon.substack.com",
+            x=0.93,
+            y=0.03,
+            color=text_color,
+            fontsize=4,  # Adjusted for 2x smaller
+            font=fonts["light"],
+            ha="right",
+            va="top",
+            ax=fig.axes[-1],
+            add_artist=False,
+        )
+    )
+
+    return subtitle_text
+
+
+def draw_employment_map(
+    data, column_to_plot, subtitle, fonts, scale=default_scale, sized_text=None
+):
+    """
+    Draw the employment growth choropleth.
+
+    Parameters:
+    - data: GeoDataFrame returned by `merge_map_data`.
+    - column_to_plot: str, the column containing the values to plot.
+    - subtitle: str, text shown below the title.
+    - fonts: dict of FontProperties returned by `load_fonts`.
+    - scale: ColorScale of the regions and the legend, from `color_scale`.
+    - sized_text: Value text every label is sized for, e.g., the `widest_value`
+      of a series of maps that should share one layout; by default each label
+      is sized for its own value.
+
+    Returns:
+    - matplotlib.figure.Figure: The finished figure, ready to be saved.
+    """
+    return _draw_map(data, column_to_plot, subtitle, fonts, scale, sized_text)[0]
+
+
+def _draw_map(
+    data, column_to_plot, subtitle, fonts, scale=default_scale, sized_text=None
+):
+    """
+    Draw the choropleth and return the figure with the artists that depend on the data.
+
+    `sized_text` is passed on to `annotate_states`.
+
+    Returns:
+    - tuple: The figure and a dict with 'patches' (list of the polygon collection of each
+      axis and the state code of each of its polygons), 'state_labels' (state code to
+      HighlightText and layout, from `annotate_states`) and 'subtitle'.
+    """
+    import matplotlib.pyplot as plt
+    import shapely
+
+    data = data.copy()
+
+    # Add a binned column based on specified ranges
+    data["binned"] = bin_values(data[column_to_plot], scale)
+
+    # Separate Alaska, Hawaii, and the contiguous U.S. using the precomputed regions
+    alaska = data[data["region"] == "alaska"]
+    hawaii = data[data["region"] == "hawaii"]
+    contiguous_us = data[data["region"] == "contiguous"]
+
+    # Set up a 2x2 grid layout with custom size ratios
+    new_width = 20 * 0.25  # Reduced from 0.5 to 0.25 (2x smaller)
+    new_height = 15 * 0.25  # Reduced from 0.5 to 0.25 (2x smaller)
+    fig, ax = plt.subplots(
+        2,
+        2,
+        figsize=(new_width, new_height),
+        dpi=300,
+        gridspec_kw={"height_ratios": [4, 1], "width_ratios": [1, 1]},
+    )
+
+    # Plot contiguous U.S. on the main subplot (spanning both columns in the first row)
+    ax_main = plt.subplot2grid((2, 2), (0, 0), colspan=2, fig=fig)
+    plot_with_legend(contiguous_us, ax_main, *panel_limits["contiguous"], scale)
+
+    # Alaska plot in the second row, first column
+    ax_alaska = plt.subplot2grid((2, 2), (1, 0), fig=fig)
+    plot_with_legend(alaska, ax_alaska, *panel_limits["alaska"], scale)
+
+    # Hawaii plot in the second row, second column
+    ax_hawaii = plt.subplot2grid((2, 2), (1, 1), fig=fig)
+    plot_with_legend(hawaii, ax_hawaii, *panel_limits["hawaii"], scale)
+
+    # geopandas draws every part of a multi-polygon as its own patch, in order
+    patches = []
+    for region, region_ax in (
+        (contiguous_us, ax_main),
+        (alaska, ax_alaska),
+        (hawaii, ax_hawaii),
+    ):
+        part_index = shapely.get_parts(region.geometry.values, return_index=True)[1]
+        patches.append(
+            (region_ax.collections[-1], region["STUSPS"].to_numpy()[part_index])
+        )
+
+    # Labels are sized from the final scale of the axes, so the layout is fixed first
+    fig.subplots_adjust(hspace=0.04)
+
+    # Annotate the states; callouts may use the margins left and right of the map
+    (left, _), (right, _) = ax_main.transData.inverted().transform(
+        fig.transFigure.transform([(0, 0), (1, 0)])
+    )
+    state_labels = annotate_states(
+        contiguous_us,
+        ax_main,
+        value_col=column_to_plot,
+        fonts=fonts,
+        limits=(left, right, *ax_main.get_ylim()),
+        scale=scale,
+        sized_text=sized_text,
+    )
+    for region, region_ax in ((alaska, ax_alaska), (hawaii, ax_hawaii)):
+        state_labels.update(
+            annotate_states(
+                region,
+                region_ax,
+                value_col=column_to_plot,
+                fonts=fonts,
+                scale=scale,
+                sized_text=sized_text,
+            )
+        )
+
+    subtitle_text = add_legend_and_titles(
+        fig, "Employment growth by State", subtitle, fonts, scale
+    )
+
+    artists = {
+        "patches": patches,
+        "state_labels": state_labels,
+        "subtitle": subtitle_text,
+    }
+    return fig, artists
+
+
+class MapTemplate:
+    """
+    Employment map whose layout, geometries, legend and static text are built once.
+
+    `render` only updates the polygon face colors, the value labels and the
+    subtitle, so drawing many months or metrics does not rebuild the figure.
+
+    Parameters:
+    - geometry: GeoDataFrame returned by `load_geometry_asset`.
+    - state_codes: list of the states whose values will be mapped.
+    - fonts: dict of FontProperties returned by `load_fonts`.
+    - scale: ColorScale of every map rendered, from `color_scale`.
+    - values (array-like): Every value the template will show, e.g., the
+      panels it renders; the labels are placed once, sized for the widest.
+      Without them they are sized for `value_placeholder`.
+    """
+
+    def __init__(self, geometry, state_codes, fonts, scale=default_scale, values=None):
+        # Build the figure once with placeholder values
+        placeholder = pd.Series(np.nan, index=state_codes)
+        data = merge_map_data(geometry, placeholder, "value")
+        self.scale = scale
+        sized_text = (
+            value_placeholder if values is None else widest_value(values, fonts)
+        )
+        self.fig, artists = _draw_map(data, "value", " ", fonts, scale, sized_text)
+        self.patches = artists["patches"]
+        self.state_labels = artists["state_labels"]
+        self.subtitle = artists["subtitle"]
+
+    def render(self, state_values, subtitle):
+        """
+        Show a new set of values on the map.
+
+        Parameters:
+        - state_values: Series of the values to plot, indexed by state code.
+        - subtitle: str, text shown below the title.
+
+        Returns:
+        - matplotlib.figure.Figure: The updated figure, ready to be saved.
+        """
+        for collection, states in self.patches:
+            collection.set_facecolor(
+                self.scale.value_colors(state_values.reindex(states).to_numpy())
+            )
+
+        # Match the label text and colors used by `annotate_states`; the value
+        # of a two-line label is a text area of its own, without the line break
+        for state, (label, layout) in self.state_labels.items():
+            rate = state_values.get(state, np.nan)
+            separator = value_separators[layout].replace("\n", "")
+            label.text_areas[-1].set_text(f"{separator}{format_value(rate)}")
+            white = self.scale.is_darkest(rate) and layout >= 0
+            for text_area in label.text_areas:
+                text_area.get_children()[0].set_color("white" if white else text_color)
+
+        self.subtitle.text_areas[0].set_text(subtitle)
+        return self.fig
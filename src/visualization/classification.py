@@ -0,0 +1,246 @@
+"""
+Data-driven classes for the choropleths, computed once over the whole history.
+
+The fixed bins of `choropleth.py` suit ordinary months but put most states
+in one class in a month like April 2020. A scheme computed over every
+(date, region) value of a panel gives one set of classes that holds for
+every month, so colors stay comparable across the history:
+
+    quantile        the same number of values in every class
+    equal_interval  classes of the same width between the minimum and maximum
+    jenks           natural breaks: the classes that minimise the squared
+                    deviation from their means (Fisher's exact algorithm)
+
+Jenks' algorithm is quadratic in the number of distinct values, so millions
+of county values are first collapsed into a weighted histogram of at most
+`JENKS_BINS` bins (exact when there are fewer distinct values than that) and
+the breaks fall on bin edges. The dynamic program then runs on the bins with
+whole-array numpy operations, so millions of values take well under a second,
+most of it spent sorting them.
+
+A `ColorScale` holds the resulting breaks with a color and a label per
+class, and is what the drawing functions take to color the regions and
+build the legend. Only numpy is imported.
+"""
+
+import numpy as np
+
+SCHEMES = ["quantile", "equal_interval", "jenks"]
+
+# Largest number of histogram bins Jenks' algorithm runs on
+JENKS_BINS = 1024
+
+
+def _finite(values):
+    values = np.asarray(values, dtype="float64").ravel()
+    return values[np.isfinite(values)]
+
+
+def quantile_breaks(values, k=5):
+    """
+    Breaks that put the same number of values in each of k classes.
+
+    Returns:
+    - np.ndarray: The k + 1 class bounds, from the minimum to the maximum;
+      fewer if ties merge classes.
+    """
+    return np.unique(np.quantile(_finite(values), np.linspace(0, 1, k + 1)))
+
+
+def equal_interval_breaks(values, k=5):
+    """
+    Breaks that split the range of the values into k classes of the same width.
+    """
+    values = _finite(values)
+    return np.linspace(values.min(), values.max(), k + 1)
+
+
+def jenks_breaks(values, k=5, max_bins=JENKS_BINS):
+    """
+    Natural breaks: the k classes with the smallest total squared deviation from their means.
+
+    Parameters:
+    - values (array-like): Values of any shape; NaN and infinite values are ignored.
+    - k (int): Number of classes.
+    - max_bins (int): Number of histogram bins the values are collapsed into
+      when they have more distinct values than that.
+
+    Returns:
+    - np.ndarray: The k + 1 class bounds, from the minimum to the maximum;
+      fewer if there are fewer than k distinct values.
+    """
+    values = _finite(values)
+    points, weights = np.unique(values, return_counts=True)
+    if len(points) > max_bins:
+        # Each bin stands for its values through their count and mean, and
+        # its upper edge is where a class ending with it stops
+        edges = np.linspace(points[0], points[-1], max_bins + 1)
+        index = np.clip(np.searchsorted(edges, values, side="left") - 1, 0, None)
+        counts = np.bincount(index, minlength=max_bins)
+        sums = np.bincount(index, weights=values, minlength=max_bins)
+        occupied = counts > 0
+        weights, points = counts[occupied], sums[occupied] / counts[occupied]
+        uppers = edges[1:][occupied]
+    else:
+        uppers = points
+    lowest = values.min()
+    if len(points) <= k:
+        return np.concatenate([[lowest], uppers[uppers > lowest]])
+
+    # Squared deviation of every run of points i..j, from prefix sums of
+    # values centered on their mean to keep the subtraction accurate
+    centered = points - np.average(points, weights=weights)
+    w = np.concatenate([[0], np.cumsum(weights)])
+    s1 = np.concatenate([[0], np.cumsum(weights * centered)])
+    s2 = np.concatenate([[0], np.cumsum(weights * centered**2)])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        count = w[None, 1:] - w[:-1, None]
+        total = s1[None, 1:] - s1[:-1, None]
+        deviation = s2[None, 1:] - s2[:-1, None] - total**2 / count
+    n = len(points)
+    deviation[np.tril_indices(n, -1)] = np.inf
+
+    # cost[j]: smallest deviation of points 0..j split into the classes so far;
+    # the next class starts at some i and adds the deviation of i..j
+    cost = deviation[0]
+    starts = []
+    for _ in range(k - 1):
+        candidates = cost[:-1, None] + deviation[1:]
+        start = np.argmin(candidates, axis=0)
+        cost = np.concatenate([[np.inf], candidates[start, np.arange(n)][1:]])
+        starts.append(start + 1)
+
+    # Walk back from the last point through the first point of each class
+    breaks = []
+    last = n - 1
+    for start in reversed(starts):
+        first = start[last]
+        breaks.append(uppers[first - 1])
+        last = first - 1
+    return np.concatenate([[lowest], breaks[::-1], [uppers[-1]]])
+
+
+def class_breaks(values, scheme="jenks", k=5):
+    """
+    Class bounds of one of SCHEMES over every value of a panel.
+
+    Parameters:
+    - values (array-like): Values of any shape, e.g., a date x region panel.
+    - scheme (str): One of SCHEMES.
+    - k (int): Number of classes.
+
+    Returns:
+    - np.ndarray: The class bounds, from the minimum to the maximum.
+    """
+    functions = {
+        "quantile": quantile_breaks,
+        "equal_interval": equal_interval_breaks,
+        "jenks": jenks_breaks,
+    }
+    if scheme not in functions:
+        raise ValueError(
+            f"Unknown classification scheme '{scheme}', use one of {SCHEMES}"
+        )
+    return functions[scheme](values, k)
+
+
+def interpolate_colors(colors, k):
+    """
+    k colors spread evenly along a list of '#RRGGBB' or '#RRGGBBAA' colors.
+    """
+    if k == len(colors):
+        return list(colors)
+    rgba = np.array(
+        [
+            [int(c[i : i + 2], 16) for i in range(1, 9, 2)]
+            for c in (c.ljust(9, "F") for c in colors)
+        ],
+        dtype=float,
+    )
+    positions = np.linspace(0, len(colors) - 1, k)
+    mixed = np.column_stack(
+        [np.interp(positions, np.arange(len(colors)), channel) for channel in rgba.T]
+    )
+    return ["#" + "".join(f"{round(v):02X}" for v in row) for row in mixed]
+
+
+def break_labels(edges, unit="%", decimals=1):
+    """
+    Legend labels of the classes set apart by the inner breaks, e.g., '<0.0%', '0.0 to 1.5%', '1.5+%'.
+    """
+    edges = [f"{edge:.{decimals}f}" for edge in edges]
+    if not edges:
+        return [f"All{unit}"]
+    middle = [f"{low} to {high}{unit}" for low, high in zip(edges[:-1], edges[1:])]
+    return [f"<{edges[0]}{unit}", *middle, f"{edges[-1]}+{unit}"]
+
+
+class ColorScale:
+    """
+    Classes of values with a color and a legend label each.
+
+    A value v is in class i when edges[i - 1] < v <= edges[i]; the first
+    class has no lower bound and the last no upper bound, so every value
+    that is not NaN gets a color.
+
+    Parameters:
+    - edges (list): The k - 1 inner breaks, increasing.
+    - colors (list): k colors, from the lowest class to the highest.
+    - labels (list): k legend labels; made from the breaks by default.
+    - missing_color (str): Color of NaN values.
+    """
+
+    def __init__(self, edges, colors, labels=None, missing_color="#D9D9D9FF"):
+        self.edges = np.asarray(edges, dtype="float64")
+        if len(colors) != len(self.edges) + 1:
+            raise ValueError(
+                f"{len(self.edges)} breaks make {len(self.edges) + 1} classes, "
+                f"got {len(colors)} colors"
+            )
+        self.colors = list(colors)
+        self.labels = list(labels) if labels is not None else break_labels(self.edges)
+        self.missing_color = missing_color
+
+    @classmethod
+    def from_values(
+        cls, values, colors, scheme="jenks", k=5, missing_color="#D9D9D9FF"
+    ):
+        """
+        Scale of one of SCHEMES over every value of a panel, colored along `colors`.
+        """
+        breaks = class_breaks(values, scheme, k)
+        edges = breaks[1:-1]
+        return cls(
+            edges, interpolate_colors(colors, len(edges) + 1), None, missing_color
+        )
+
+    @property
+    def color_mapping(self):
+        """
+        Legend label to color, in class order.
+        """
+        return dict(zip(self.labels, self.colors))
+
+    def classify(self, values):
+        """
+        Class of every value, -1 for NaN.
+
+        Returns:
+        - np.ndarray: One int per value, with the shape of `values`.
+        """
+        values = np.asarray(values, dtype="float64")
+        classes = np.searchsorted(self.edges, values, side="left")
+        return np.where(np.isnan(values), -1, classes)
+
+    def value_colors(self, values):
+        """
+        Color of every value, `missing_color` for NaN.
+        """
+        palette = np.array([*self.colors, self.missing_color], dtype=object)
+        return palette[self.classify(values)]
+
+    def is_darkest(self, values):
+        """
+        Whether each value is in the last, darkest class, where labels are written in white.
+        """
+        return self.classify(values) == len(self.colors) - 1
@@ -0,0 +1,280 @@
+"""
+County-level employment growth choropleth.
+
+The state map places a label or an arrow by hand for each of its ~50
+regions, which does not scale to the ~3,200 US counties. Everything here
+works on whole arrays instead:
+
+- values are joined to the geometries on the five-digit FIPS code (GEOID)
+  with one reindex, keeping counties without data so they are drawn grey;
+- bins and colors are looked up for every county at once by `value_colors`
+  and each panel is drawn as a single collection; with `--scheme` the bins
+  are classes computed over the whole county history (see
+  `classification.py`), so maps of different months share one scale;
+- labels are placed by `place_labels`: counties with room for their label
+  are visited from the largest down and a label is kept only if it does not
+  overlap one already placed, found with a grid index of the placed labels.
+
+State borders are drawn on top from the state geometry asset. Draw the latest
+month from the repository root with:
+
+    python -m src.visualization.county_map
+    python -m src.visualization.county_map --scheme jenks
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from src.visualization.choropleth import (
+    add_legend_and_titles,
+    color_scale,
+    default_scale,
+    panel_limits,
+    text_color,
+    value_colors,
+)
+from src.visualization.classification import SCHEMES
+
+COUNTY_DATASET = "employment_county_apc"
+OUTPUT_PATH = "reports/figures/county/employment_map_county.png"
+
+# Size of the county value labels in points
+LABEL_FONTSIZE = 2
+
+# Space added around each label, in points
+LABEL_PADDING = 0.2
+
+# Share of a label that must lie inside its county
+MIN_INSIDE = 0.8
+
+
+def merge_county_data(geometry, county_values, column_to_plot):
+    """
+    Join one value per county onto the prepared county geometries by FIPS code.
+
+    Parameters:
+    - geometry: GeoDataFrame returned by `load_geometry_asset` for the county shapefile.
+    - county_values: Series of values indexed by FIPS code, as strings or numbers.
+    - column_to_plot: str, name of the value column in the result.
+
+    Returns:
+    - GeoDataFrame: Every county, with the value column added (NaN where there is no value).
+    """
+    from src.data.counties import normalize_fips
+
+    values = county_values.set_axis(normalize_fips(county_values.index))
+    data = geometry.copy()
+    data[column_to_plot] = values.reindex(data["GEOID"]).to_numpy()
+    return data
+
+
+def annotate_counties(
+    data, ax, value_col, fonts, fontsize=LABEL_FONTSIZE, scale=default_scale
+):
+    """
+    Label the counties that have room for their value, without overlaps.
+
+    Labels are placed by `place_labels` with the largest counties first, and
+    counties without room keep no label rather than get a callout.
+
+    Parameters:
+    - data: GeoDataFrame of the counties drawn on the axis.
+    - ax: Matplotlib axis with its final limits set.
+    - value_col: Column name containing the values to be displayed.
+    - fonts: dict of FontProperties returned by `load_fonts`.
+    - fontsize: Label size in points.
+    - scale: ColorScale of the map; labels in its darkest class are white.
+
+    Returns:
+    - list: The matplotlib Text of every label.
+    """
+    import shapely
+
+    from src.visualization.labels import axis_scale, place_labels, text_size
+
+    values = data[value_col].to_numpy(dtype=float)
+    texts = np.char.mod("%.1f", values)
+
+    # Labels are measured once per distinct text
+    sizes = {text: text_size(text, fonts["light"], fontsize) for text in set(texts)}
+    width, height = np.array([sizes[text] for text in texts]).reshape(-1, 2).T
+
+    has_value = ~np.isnan(values)
+    placement = place_labels(
+        data.geometry.values[has_value],
+        [(width[has_value] + LABEL_PADDING, height[has_value] + LABEL_PADDING)],
+        axis_scale(ax),
+        (*ax.get_xlim(), *ax.get_ylim()),
+        priority=shapely.area(data.geometry.values[has_value]),
+        min_inside=MIN_INSIDE,
+    )
+    kept = np.flatnonzero(has_value)[placement["placed"].to_numpy()]
+    placement = placement[placement["placed"]]
+
+    colors = np.where(scale.is_darkest(values), "white", text_color)
+    return [
+        ax.text(
+            x,
+            y,
+            texts[i],
+            fontsize=fontsize,
+            ha="center",
+            va="center",
+            font=fonts["light"],
+            color=colors[i],
+        )
+        for i, x, y in zip(kept, placement["x"], placement["y"])
+    ]
+
+
+def draw_county_map(
+    data, column_to_plot, subtitle, fonts, state_outlines=None, scale=default_scale
+):
+    """
+    Draw the county employment growth choropleth.
+
+    Parameters:
+    - data: GeoDataFrame returned by `merge_county_data`.
+    - column_to_plot: str, the column containing the values to plot.
+    - subtitle: str, text shown below the title.
+    - fonts: dict of FontProperties returned by `load_fonts`.
+    - state_outlines: Optional GeoDataFrame of the states, drawn as borders on top.
+    - scale: ColorScale of the counties and the legend, from `color_scale`.
+
+    Returns:
+    - matplotlib.figure.Figure: The finished figure, ready to be saved.
+    """
+    import matplotlib.pyplot as plt
+
+    # Same layout as the state map: contiguous US on top, Alaska and Hawaii below
+    fig = plt.figure(figsize=(20 * 0.25, 15 * 0.25), dpi=300)
+    grid = fig.add_gridspec(2, 2, height_ratios=[4, 1])
+    fig.subplots_adjust(hspace=0.04)
+    panels = {"contiguous": grid[0, :], "alaska": grid[1, 0], "hawaii": grid[1, 1]}
+    colors = value_colors(data[column_to_plot], scale)
+
+    for region, subplot_spec in panels.items():
+        ax = fig.add_subplot(subplot_spec)
+        in_region = (data["region"] == region).to_numpy()
+        counties = data[in_region]
+        counties.plot(ax=ax, color=colors[in_region], edgecolor="white", linewidth=0.05)
+        if state_outlines is not None:
+            states = state_outlines[state_outlines["region"] == region]
+            states.boundary.plot(ax=ax, color="white", linewidth=0.3)
+
+        xlim, ylim = panel_limits[region]
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+        # Labels are sized from the final scale, so the layout is fixed first
+        annotate_counties(counties, ax, column_to_plot, fonts, scale=scale)
+
+    add_legend_and_titles(fig, "Employment growth by County", subtitle, fonts, scale)
+    return fig
+
+
+def build_county_map(
+    output=OUTPUT_PATH,
+    store_dir="data/store",
+    shapefile_path=None,
+    state_shapefile_path=None,
+    geometry_cache_dir=None,
+    font_cache_dir=None,
+    dataset=COUNTY_DATASET,
+    date=None,
+    dpi=300,
+    scheme="fixed",
+):
+    """
+    Draw one month of a county panel from the store and save it.
+
+    Parameters:
+    - output (str): Path of the image.
+    - store_dir (str): Folder of the panel store.
+    - shapefile_path (str): County shapefile; defaults to COUNTY_SHAPEFILE_PATH.
+    - state_shapefile_path (str): State shapefile for the borders; defaults to SHAPEFILE_PATH.
+    - geometry_cache_dir (str): Folder of the cached geometry assets.
+    - font_cache_dir (str): Folder of the font cache.
+    - dataset (str): Name of the county panel in the store.
+    - date (str): Month to draw (YYYY-MM-DD); defaults to the latest.
+    - dpi (int): Resolution of the image.
+    - scheme (str): 'fixed' bins or a classification computed over every
+      month of the panel, see `color_scale`.
+
+    Returns:
+    - pd.Timestamp: The month drawn.
+    """
+    import matplotlib.pyplot as plt
+
+    from src.data.storage import PanelStore
+    from src.visualization.fonts import FONT_CACHE_DIR, load_fonts
+    from src.visualization.geometry import (
+        CACHE_DIR,
+        COUNTY_SHAPEFILE_PATH,
+        SHAPEFILE_PATH,
+        detail_level,
+        load_geometry_asset,
+    )
+
+    geometry_cache_dir = geometry_cache_dir or CACHE_DIR
+    level = detail_level(dpi)
+    counties = load_geometry_asset(
+        shapefile_path or COUNTY_SHAPEFILE_PATH, geometry_cache_dir, level
+    )
+    states = load_geometry_asset(
+        state_shapefile_path or SHAPEFILE_PATH, geometry_cache_dir, level
+    )
+
+    store = PanelStore(store_dir)
+    selected_row = store.read_row(dataset, date)
+    # Every month of every county, memory-mapped, so the scale fits the history
+    scale = color_scale(
+        None if scheme == "fixed" else store.read_values(dataset)[0], scheme
+    )
+    data = merge_county_data(counties, selected_row, "apc")
+    fig = draw_county_map(
+        data,
+        "apc",
+        subtitle=f"Employment, annual percent change ({selected_row.name:%B %Y})",
+        fonts=load_fonts(cache_dir=font_cache_dir or FONT_CACHE_DIR),
+        state_outlines=states,
+        scale=scale,
+    )
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    fig.savefig(output, dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+    return selected_row.name
+
+
+def main():
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    parser = argparse.ArgumentParser(description="Draw the county employment map")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--date", help="Month to draw (YYYY-MM-DD), default latest")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument(
+        "--scheme",
+        default="fixed",
+        choices=["fixed", *SCHEMES],
+        help="Fixed bins, or classes computed over the whole history",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    month = build_county_map(
+        args.output, date=args.date, dpi=args.dpi, scheme=args.scheme
+    )
+    print(
+        f"Wrote the county map of {month:%B %Y} to {args.output} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
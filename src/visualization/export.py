@@ -0,0 +1,211 @@
+"""
+Export a drawn figure to every format and size needed, rendering it only once.
+
+The site, the newsletter and social media each need the map as PNG and WebP
+at their own width, plus thumbnails, and as SVG or PDF. Saving each of them
+with `savefig` rasterizes the whole figure again every time. Instead:
+
+- the figure is drawn once with Agg, at the resolution the widest bitmap
+  needs, into raw pixels of the area `bbox_inches="tight"` keeps;
+- every bitmap is resized from that one buffer and encoded by Pillow, in a
+  pool of threads (Pillow releases the GIL while it resizes and encodes);
+- SVG and PDF still go through matplotlib's vector backends, one after the
+  other in a thread of their own, since a figure is not safe to save from
+  two threads at once. They run alongside the bitmaps.
+
+Files are named `<name>_<size>.<format>` for the bitmaps (see EXPORT_SIZES)
+and `<name>.<format>` for the vector formats. The date metadata of SVG and
+PDF is left out, so unchanged figures give identical files.
+"""
+
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Width in pixels of each exported bitmap size
+EXPORT_SIZES = {
+    "large": 2400,  # site, high-density screens
+    "medium": 1200,  # newsletter and social media cards
+    "small": 600,
+    "thumbnail": 240,
+}
+
+RASTER_FORMATS = ["png", "webp"]
+VECTOR_FORMATS = ["svg", "pdf"]
+
+# Space kept around the tight bounding box, in inches, as savefig's pad_inches
+PAD_INCHES = 0.1
+
+# Encoder options by format
+SAVE_OPTIONS = {
+    "png": {},
+    "webp": {"quality": 90, "method": 4},
+    "jpg": {"quality": 90},
+}
+
+# Date metadata left out of the vector files, so they only change with the figure
+VECTOR_METADATA = {"svg": {"Date": None}, "pdf": {"CreationDate": None}}
+
+
+def tight_bbox(fig, pad_inches=PAD_INCHES):
+    """
+    Bounding box of the figure in inches, as `bbox_inches="tight"` finds it, without drawing it.
+    """
+    return fig.get_tightbbox(fig.canvas.get_renderer()).padded(pad_inches)
+
+
+def rasterize(fig, width, bbox, pad_inches=PAD_INCHES):
+    """
+    Draw the figure once with Agg so that its bounding box is `width` pixels wide.
+
+    The raw RGBA pixels are saved the way `bbox_inches="tight"` saves a PNG,
+    so the canvas also covers artists beyond the figure's edges, but nothing
+    is encoded.
+
+    Parameters:
+    - fig: matplotlib Figure.
+    - width (int): Width of the image in pixels.
+    - bbox: Bounding box of the figure in inches, from `tight_bbox`.
+
+    Returns:
+    - np.ndarray: RGBA pixels, (rows, columns, 4) uint8.
+    """
+    buffer = io.BytesIO()
+    dpi = width / bbox.width
+    fig.savefig(
+        buffer, format="rgba", dpi=dpi, bbox_inches="tight", pad_inches=pad_inches
+    )
+    # Agg truncates the size of the canvas in pixels
+    columns = int(bbox.width * dpi)
+    pixels = np.frombuffer(buffer.getbuffer(), dtype=np.uint8)
+    return pixels.reshape(-1, columns, 4)
+
+
+def export_files(
+    name,
+    sizes=EXPORT_SIZES,
+    raster_formats=RASTER_FORMATS,
+    vector_formats=VECTOR_FORMATS,
+):
+    """
+    File names and widths of the usual export set of a figure.
+
+    Returns:
+    - tuple: The bitmaps, as a list of (file name, width in pixels), and the
+      file names of the vector formats.
+    """
+    bitmaps = [
+        (f"{name}_{size}.{extension}", width)
+        for size, width in sizes.items()
+        for extension in raster_formats
+    ]
+    vectors = [f"{name}.{extension}" for extension in vector_formats]
+    return bitmaps, vectors
+
+
+def write_bitmaps(image, paths, width):
+    """
+    Resize the shared image to a width once, keeping its aspect ratio, and save
+    it to every path; the extension of each picks its format.
+
+    Returns:
+    - dict: Seconds spent on each file, by path; the resize counts toward the first.
+    """
+    from PIL import Image
+
+    seconds = {}
+    start = time.perf_counter()
+    if width != image.width:
+        height = max(1, round(image.height * width / image.width))
+        # reducing_gap first shrinks by whole factors, much faster for thumbnails
+        image = image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+    for path in paths:
+        extension = os.path.splitext(path)[1].lower().lstrip(".")
+        converted = image.convert("RGB") if extension in ("jpg", "jpeg") else image
+        converted.save(path, **SAVE_OPTIONS.get(extension, {}))
+        seconds[path] = time.perf_counter() - start
+        start = time.perf_counter()
+    return seconds
+
+
+def write_vectors(fig, paths, pad_inches=PAD_INCHES):
+    """
+    Save the figure to each vector file, one after the other.
+
+    Returns:
+    - dict: Seconds spent on each file, by path.
+    """
+    import matplotlib
+
+    seconds = {}
+    # A fixed salt gives the SVG elements the same ids on every save
+    with matplotlib.rc_context({"svg.hashsalt": "export"}):
+        for path in paths:
+            start = time.perf_counter()
+            extension = os.path.splitext(path)[1].lower().lstrip(".")
+            fig.savefig(
+                path,
+                bbox_inches="tight",
+                pad_inches=pad_inches,
+                metadata=VECTOR_METADATA.get(extension),
+            )
+            seconds[path] = time.perf_counter() - start
+    return seconds
+
+
+def export_figure(fig, output_dir, bitmaps, vectors=(), dpi=300, max_workers=None):
+    """
+    Write a figure to several bitmap sizes and vector formats from a single render.
+
+    Parameters:
+    - fig: matplotlib Figure, fully drawn.
+    - output_dir (str): Folder of the files, created if needed.
+    - bitmaps (list): (file name, width in pixels) pairs; a width of None is the
+      width `savefig(dpi=dpi, bbox_inches="tight")` would give. The extension
+      picks the format, e.g., .png or .webp.
+    - vectors (list): File names of the vector formats, e.g., .svg or .pdf.
+    - dpi (int): Resolution that bitmaps without a width are saved at.
+    - max_workers (int): Number of threads writing files; defaults to one per CPU.
+
+    Returns:
+    - dict: Seconds spent on the 'render', writing each file ('files', by
+      path, measured in its thread) and in total ('total').
+    """
+    from PIL import Image
+
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    bbox = tight_bbox(fig)
+    widths = [width or round(bbox.width * dpi) for _, width in bitmaps]
+
+    # One render, at the resolution of the widest bitmap
+    image = None
+    if bitmaps:
+        image = Image.fromarray(rasterize(fig, max(widths), bbox), "RGBA")
+    render_seconds = time.perf_counter() - start
+
+    # One job per width, so each size is resized once for all of its formats
+    by_width = {}
+    for (file_name, _), width in zip(bitmaps, widths):
+        by_width.setdefault(width, []).append(os.path.join(output_dir, file_name))
+    vector_paths = [os.path.join(output_dir, file_name) for file_name in vectors]
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        # The vector files only need the figure, so they start first and overlap the bitmaps
+        vector_job = executor.submit(write_vectors, fig, vector_paths)
+        jobs = [
+            executor.submit(write_bitmaps, image, paths, width)
+            for width, paths in by_width.items()
+        ]
+        files = {}
+        for job in jobs:
+            files.update(job.result())
+        files.update(vector_job.result())
+
+    return {
+        "render": render_seconds,
+        "files": files,
+        "total": time.perf_counter() - start,
+    }
@@ -0,0 +1,190 @@
+"""
+Local cache for the fonts used by the maps.
+
+`pyfonts.load_font` downloads the font from GitHub every time it is called,
+which adds network latency to every render and fails on machines without
+internet access. `resolve_font` keeps each font on disk instead:
+
+    <cache_dir>/index.json          URL -> sha256 of the downloaded file
+    <cache_dir>/<sha256>.ttf        font files, named by their content hash
+
+A font is downloaded once and then loaded from disk. In offline mode
+(`offline=True` or FONTS_OFFLINE=1) nothing is downloaded and a missing
+font raises straight away instead of waiting on the network.
+
+Warm the cache, or compare startup times, from the repository root with:
+
+    python -m src.visualization.fonts warm
+    python -m src.visualization.fonts benchmark
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from urllib.request import urlopen
+
+# Fonts used by the map: Bebas Neue for the title, Fira Sans for the labels
+FONT_URLS = {
+    "title": "https://github.com/dharmatype/Bebas-Neue/blob/master/fonts/BebasNeue(2018)ByDhamraType/ttf/BebasNeue-Regular.ttf?raw=true",
+    "light": "https://github.com/bBoxType/FiraSans/blob/master/Fira_Sans_4_3/Fonts/Fira_Sans_TTF_4301/Normal/Roman/FiraSans-Light.ttf?raw=true",
+    "medium": "https://github.com/bBoxType/FiraSans/blob/master/Fira_Sans_4_3/Fonts/Fira_Sans_TTF_4301/Normal/Roman/FiraSans-Medium.ttf?raw=true",
+}
+
+FONT_CACHE_DIR = "data/interim/fonts"
+INDEX = "index.json"
+
+# Set to 1 to never download fonts, e.g., on air-gapped render workers
+OFFLINE_ENV = "FONTS_OFFLINE"
+
+
+def is_offline(offline=None):
+    if offline is not None:
+        return offline
+    return os.environ.get(OFFLINE_ENV, "").lower() in ("1", "true", "yes")
+
+
+def _read_index(cache_dir):
+    path = os.path.join(cache_dir, INDEX)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_index(cache_dir, index):
+    path = os.path.join(cache_dir, INDEX)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def cached_font_path(url, cache_dir=FONT_CACHE_DIR):
+    """
+    Return the path of the cached font file for a URL, or None if it is not cached.
+    """
+    sha256 = _read_index(cache_dir).get(url)
+    if sha256 is None:
+        return None
+    path = os.path.join(cache_dir, f"{sha256}.ttf")
+    return path if os.path.exists(path) else None
+
+
+def download_font(url, cache_dir=FONT_CACHE_DIR, timeout=30):
+    """
+    Download a font into the cache and record it in the index.
+
+    Returns:
+    - str: Path of the cached font file.
+    """
+    with urlopen(url, timeout=timeout) as response:
+        content = response.read()
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{sha256}.ttf")
+    if not os.path.exists(path):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+    index = _read_index(cache_dir)
+    index[url] = sha256
+    _write_index(cache_dir, index)
+    return path
+
+
+def resolve_font(url, cache_dir=FONT_CACHE_DIR, offline=None):
+    """
+    Load a font from the local cache, downloading it first if needed.
+
+    Parameters:
+    - url (str): GitHub URL of the font file, as passed to `pyfonts.load_font`.
+    - cache_dir (str): Folder of the font cache.
+    - offline (bool): Never download; defaults to the FONTS_OFFLINE environment variable.
+
+    Returns:
+    - matplotlib.font_manager.FontProperties: The loaded font.
+    """
+    path = cached_font_path(url, cache_dir)
+    if path is None:
+        if is_offline(offline):
+            raise FileNotFoundError(
+                f"Font {url} is not in the cache at {cache_dir} and offline mode is on. "
+                "Run `python -m src.visualization.fonts warm` with network access first."
+            )
+        path = download_font(url, cache_dir)
+
+    # pyfonts loads matplotlib, so it is only imported once a font is needed
+    from pyfonts import load_font
+
+    return load_font(font_path=path)
+
+
+def warm_font_cache(urls, cache_dir=FONT_CACHE_DIR, refresh=False):
+    """
+    Download every font that is not cached yet.
+
+    Parameters:
+    - urls (iterable): Font URLs to cache.
+    - cache_dir (str): Folder of the font cache.
+    - refresh (bool): Download again even if the font is already cached.
+
+    Returns:
+    - dict: Mapping of URL to cached file path.
+    """
+    paths = {}
+    for url in urls:
+        path = None if refresh else cached_font_path(url, cache_dir)
+        paths[url] = path or download_font(url, cache_dir)
+    return paths
+
+
+def load_fonts(cache_dir=FONT_CACHE_DIR, offline=None):
+    """
+    Load the fonts used by the map from the local cache.
+
+    Returns:
+    - dict: FontProperties for the 'title', 'light' and 'medium' fonts.
+    """
+    return {
+        name: resolve_font(url, cache_dir, offline) for name, url in FONT_URLS.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local font cache")
+    parser.add_argument("command", choices=["warm", "benchmark"])
+    parser.add_argument("--cache-dir", default=FONT_CACHE_DIR)
+    parser.add_argument("--refresh", action="store_true", help="Download again")
+    args = parser.parse_args()
+
+    if args.command == "warm":
+        for url, path in warm_font_cache(
+            FONT_URLS.values(), args.cache_dir, args.refresh
+        ).items():
+            print(f"{path}  {url}")
+        return
+
+    from pyfonts import load_font
+
+    # Startup cost of the fonts: one download per font, as before, against the warm cache
+    start = time.perf_counter()
+    for url in FONT_URLS.values():
+        load_font(url)
+    download_time = time.perf_counter() - start
+
+    warm_font_cache(FONT_URLS.values(), args.cache_dir)
+    start = time.perf_counter()
+    load_fonts(cache_dir=args.cache_dir, offline=True)
+    cached_time = time.perf_counter() - start
+
+    print(f"pyfonts.load_font from URLs: {download_time * 1e3:8.1f} ms")
+    print(f"Warm local cache:            {cached_time * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
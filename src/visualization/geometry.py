@@ -0,0 +1,218 @@
+"""
+Cached geometry assets for the state and county choropleths.
+
+Reading the TIGER shapefile, projecting it to EPSG:5070 for centroids and
+splitting out Alaska, Hawaii and the contiguous US gives the same result
+every month. The build step does it once and pickles the result, keyed by
+the hash of the shapefile, so renders only load a small binary file. The
+county shapefile goes through the same steps and gets its own asset.
+
+Small maps do not need every vertex of the shapefile. Levels of detail above
+0 replace the outlines with ones simplified by `simplify_geometries`, which
+keeps shared borders watertight, and are cached next to the full asset.
+`detail_level` picks the coarsest level whose error stays under half a
+pixel for a given figure width and DPI; centroids, and so label positions,
+always come from the full outlines.
+
+Build the asset and report the timings from the repository root with:
+
+    python -m src.visualization.geometry
+"""
+
+import hashlib
+import os
+import pickle
+import time
+
+SHAPEFILE_PATH = "data/raw/tl_2023_us_state.shp"
+COUNTY_SHAPEFILE_PATH = "data/raw/tl_2023_us_county.shp"
+CACHE_DIR = "data/interim/geometry"
+
+# Equal-area projection used to compute centroids
+PROJECTED_CRS = 5070
+
+# Insets by state FIPS code; every other state or county is drawn in the main panel
+REGIONS = {"02": "alaska", "15": "hawaii"}
+
+# Simplification tolerance of each level of detail in degrees; 0 is the full shapefile
+DETAIL_LEVELS = [0, 0.002, 0.01, 0.05]
+
+# Width in inches and longitude span of the contiguous US panel of the map
+# drawn by `draw_employment_map`
+MAP_WIDTH_INCHES = 5
+MAP_SPAN_DEGREES = 65
+
+
+def shapefile_hash(shapefile_path):
+    """
+    Hash the files that make up a shapefile, so any change to them gives a new key.
+    """
+    digest = hashlib.sha256()
+    base = os.path.splitext(shapefile_path)[0]
+    for extension in (".shp", ".shx", ".dbf", ".prj"):
+        path = base + extension
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def asset_path(shapefile_path, cache_dir, level=0):
+    name = os.path.splitext(os.path.basename(shapefile_path))[0]
+    suffix = f"_lod{level}" if level else ""
+    return os.path.join(
+        cache_dir, f"{name}_{shapefile_hash(shapefile_path)[:16]}{suffix}.pkl"
+    )
+
+
+def detail_level(dpi, width_inches=MAP_WIDTH_INCHES, span_degrees=MAP_SPAN_DEGREES):
+    """
+    Pick the coarsest level of detail that is indistinguishable at a given output size.
+
+    Parameters:
+    - dpi (float): Resolution the map is saved at.
+    - width_inches (float): Width of the map panel in inches.
+    - span_degrees (float): Longitude span shown across that width.
+
+    Returns:
+    - int: Index into DETAIL_LEVELS whose tolerance is at most half a pixel.
+    """
+    half_pixel = span_degrees / (width_inches * dpi) / 2
+    return max(
+        level
+        for level, tolerance in enumerate(DETAIL_LEVELS)
+        if tolerance <= half_pixel
+    )
+
+
+def prepare_geometry(gdf):
+    """
+    Add centroids in both CRSs and the region split to the state or county geometries.
+
+    Parameters:
+    - gdf: GeoDataFrame of state or county geometries as read from a TIGER
+      shapefile, which has a STATEFP column in both cases.
+
+    Returns:
+    - GeoDataFrame: The geometries with 'centroid' (original CRS), 'centroid_x' and
+      'centroid_y' (EPSG:5070) and 'region' ('alaska', 'hawaii' or 'contiguous') columns.
+    """
+    # Project the data to EPSG:5070 and calculate centroids.
+    # A projection is a way to represent the 3D surface of the Earth on a 2D map.
+    # A centroid is the geometric center or "average" point of a shape.
+    centroids_projected = gdf.geometry.to_crs(epsg=PROJECTED_CRS).centroid
+
+    geometry = gdf.copy()
+    geometry["centroid_x"] = centroids_projected.x
+    geometry["centroid_y"] = centroids_projected.y
+
+    # Project centroids back to original CRS
+    geometry["centroid"] = centroids_projected.to_crs(gdf.crs)
+
+    # Separate Alaska, Hawaii, and the contiguous U.S. by state, which works for counties too
+    geometry["region"] = geometry["STATEFP"].map(REGIONS).fillna("contiguous")
+    return geometry
+
+
+def simplify_asset(geometry, tolerance):
+    """
+    Replace the outlines of the prepared geometries with simplified ones.
+
+    Parameters:
+    - geometry: GeoDataFrame returned by `prepare_geometry`.
+    - tolerance (float): Largest distance a border may move, in degrees.
+
+    Returns:
+    - GeoDataFrame: A copy with simplified outlines and the original centroids.
+    """
+    from src.visualization.topology import simplify_geometries
+
+    simplified = simplify_geometries(dict(enumerate(geometry.geometry)), tolerance)
+    geometry = geometry.copy()
+    geometry[geometry.geometry.name] = [simplified[i] for i in range(len(geometry))]
+    return geometry
+
+
+def build_geometry_asset(shapefile_path=SHAPEFILE_PATH, cache_dir=CACHE_DIR, level=0):
+    """
+    Read and prepare the shapefile once and save it as a binary asset.
+
+    Parameters:
+    - shapefile_path (str): Path to the state or county shapefile.
+    - cache_dir (str): Folder for the cached assets.
+    - level (int): Level of detail, see DETAIL_LEVELS. Levels above 0 are
+      simplified from the full asset.
+
+    Returns:
+    - str: Path of the written asset.
+    """
+    if level:
+        geometry = simplify_asset(
+            load_geometry_asset(shapefile_path, cache_dir), DETAIL_LEVELS[level]
+        )
+    else:
+        import geopandas as gpd
+
+        geometry = prepare_geometry(gpd.read_file(shapefile_path))
+
+    path = asset_path(shapefile_path, cache_dir, level)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write under a unique name first so concurrent builds never clash
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        pickle.dump(geometry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+    return path
+
+
+def load_geometry_asset(shapefile_path=SHAPEFILE_PATH, cache_dir=CACHE_DIR, level=0):
+    """
+    Load the prepared geometries, building the asset first if it is missing or stale.
+
+    Parameters:
+    - shapefile_path (str): Path to the state or county shapefile.
+    - cache_dir (str): Folder for the cached assets.
+    - level (int): Level of detail, e.g., `detail_level(dpi)`. 0 is the full shapefile.
+
+    Returns:
+    - GeoDataFrame: See `prepare_geometry`.
+    """
+    path = asset_path(shapefile_path, cache_dir, level)
+    if not os.path.exists(path):
+        path = build_geometry_asset(shapefile_path, cache_dir, level)
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def main():
+    import geopandas as gpd
+
+    # Time the steps every render used to repeat
+    start = time.perf_counter()
+    prepare_geometry(gpd.read_file(SHAPEFILE_PATH))
+    uncached_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    path = build_geometry_asset()
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_geometry_asset()
+    cached_time = time.perf_counter() - start
+
+    print(f"Geometry asset written to {path} in {build_time:.2f}s")
+    print(f"Read and project shapefile: {uncached_time * 1e3:8.1f} ms")
+    print(f"Load cached asset:          {cached_time * 1e3:8.1f} ms")
+
+    # Build the simplified levels, see `python -m src.benchmarks.bench_detail_levels`
+    for level in range(1, len(DETAIL_LEVELS)):
+        start = time.perf_counter()
+        build_geometry_asset(level=level)
+        print(
+            f"Level of detail {level} (tolerance {DETAIL_LEVELS[level]} degrees) "
+            f"built in {time.perf_counter() - start:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Interactive HTML version of the employment map.
+
+The state outlines in `data/raw/us-states.json` are projected once (Albers
+equal-area, with Alaska and Hawaii moved into insets), turned into a
+quantized topology (see `topology.py`) and written into a single HTML file
+together with every month of the chosen metric. The values are stored as a
+base64 int16 array in hundredths of a percent, so the browser decodes the
+whole history once and switching months only recolors the existing paths.
+
+Build the page from the repository root with:
+
+    python -m src.visualization.interactive
+"""
+
+import argparse
+import base64
+import json
+import os
+
+import numpy as np
+from shapely import affinity
+
+from src.data.storage import PanelStore
+from src.features.growth import GROWTH_METRIC_LABELS, METRIC_DATASETS
+from src.visualization.choropleth import color_scale, default_scale
+from src.visualization.classification import SCHEMES
+from src.visualization.topology import build_topology
+
+GEOJSON_PATH = "data/raw/us-states.json"
+STORE_DIR = "data/store"
+OUTPUT_PATH = "reports/figures/employment_map_interactive.html"
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
+# Equal-area conic projections for the three map panels, as in d3.geoAlbersUsa
+CONTIGUOUS_CRS = "EPSG:5070"
+ALASKA_CRS = "+proj=aea +lat_1=55 +lat_2=65 +lat_0=50 +lon_0=-154 +datum=NAD83"
+HAWAII_CRS = "+proj=aea +lat_1=8 +lat_2=18 +lat_0=3 +lon_0=-157 +datum=NAD83"
+
+# Inset width as a share of the contiguous US width, and left edge of the inset
+INSETS = {"AK": (0.22, 0.0), "HI": (0.12, 0.24)}
+
+# Values are stored as int16 hundredths; this code marks a missing value
+MISSING_CODE = -32768
+
+
+def project_states(states):
+    """
+    Project the state outlines onto one plane, with Alaska and Hawaii as insets.
+
+    Parameters:
+    - states: GeoDataFrame in EPSG:4326 with an 'id' column of state codes.
+
+    Returns:
+    - dict: Mapping of state code to projected shapely geometry.
+    """
+    contiguous = states[~states["id"].isin(list(INSETS))].to_crs(CONTIGUOUS_CRS)
+    min_x, min_y, max_x, _ = contiguous.total_bounds
+    width = max_x - min_x
+
+    geometries = dict(zip(contiguous["id"], contiguous.geometry))
+    for state_code, crs in (("AK", ALASKA_CRS), ("HI", HAWAII_CRS)):
+        geometry = states.loc[states["id"] == state_code].to_crs(crs).geometry.iloc[0]
+        inset_width, inset_left = INSETS[state_code]
+        x0, y0, x1, _ = geometry.bounds
+        factor = inset_width * width / (x1 - x0)
+        geometry = affinity.scale(geometry, factor, factor, origin=(x0, y0))
+        geometry = affinity.translate(
+            geometry, min_x + inset_left * width - x0, min_y - y0
+        )
+        geometries[state_code] = geometry
+    return geometries
+
+
+def encode_values(panel, state_codes):
+    """
+    Pack a date-indexed panel as base64 int16 hundredths, one row of states per month.
+    """
+    values = panel.reindex(columns=state_codes).to_numpy(dtype=float)
+    codes = np.clip(np.round(values * 100), MISSING_CODE + 1, 32767)
+    codes = np.where(np.isnan(values), MISSING_CODE, codes).astype("<i2")
+    return base64.b64encode(codes.tobytes()).decode("ascii")
+
+
+def page_payload(topology, panel, metric, scale=default_scale):
+    """
+    Everything the page script needs, as one JSON-serializable dict.
+    """
+    state_codes = [
+        geometry["id"] for geometry in topology["objects"]["states"]["geometries"]
+    ]
+    return {
+        "topology": topology,
+        "metric": GROWTH_METRIC_LABELS[metric],
+        "start": f"{panel.index[0]:%Y-%m}",
+        "months": len(panel),
+        "values": encode_values(panel, state_codes),
+        "missingCode": MISSING_CODE,
+        "scale": 100,
+        # Inner breaks of the scale; classes are closed on the right and the
+        # first and last are open
+        "bins": scale.edges.tolist(),
+        "labels": scale.labels,
+        "colors": scale.colors,
+        "missingColor": scale.missing_color,
+    }
+
+
+def render_page(payload):
+    """
+    Fill the HTML template with the page script and the payload.
+    """
+    with open(os.path.join(TEMPLATE_DIR, "interactive_map.html")) as f:
+        page = f.read()
+    with open(os.path.join(TEMPLATE_DIR, "interactive_map.js")) as f:
+        script = f.read()
+    data = json.dumps(payload, separators=(",", ":"))
+    return page.replace("/* SCRIPT */", script).replace("/* DATA */", data)
+
+
+def build_interactive_map(
+    output=OUTPUT_PATH,
+    metric="yoy",
+    start=None,
+    geojson_path=GEOJSON_PATH,
+    store_dir=STORE_DIR,
+    quantization=10_000,
+    scheme="fixed",
+):
+    """
+    Write the interactive map of one metric as a self-contained HTML file.
+
+    Parameters:
+    - output (str): Path of the HTML file.
+    - metric (str): Metric to map, see GROWTH_METRICS.
+    - start (str): First month to include (YYYY-MM-DD). Defaults to the first month with data.
+    - geojson_path (str): State outlines in GeoJSON.
+    - store_dir (str): Folder of the panel store holding the metric panels.
+    - quantization (int): Grid steps along the longer side of the map.
+    - scheme (str): 'fixed' bins or a classification computed over every month
+      on the page, so the colors mean the same thing whichever month is shown.
+
+    Returns:
+    - int: Size of the written file in bytes.
+    """
+    import geopandas as gpd
+
+    geometries = project_states(gpd.read_file(geojson_path))
+    topology = build_topology(geometries, quantization=quantization)
+
+    panel = PanelStore(store_dir).read(METRIC_DATASETS[metric], start=start)
+    panel = panel.loc[panel.notna().any(axis=1).idxmax() :]
+
+    scale = color_scale(panel.to_numpy(), scheme)
+    page = render_page(page_payload(topology, panel, metric, scale))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        f.write(page)
+    return len(page.encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the interactive HTML map")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--metric", default="yoy", choices=sorted(GROWTH_METRIC_LABELS))
+    parser.add_argument("--start", help="First month (YYYY-MM-DD)")
+    parser.add_argument("--quantization", type=int, default=10_000)
+    parser.add_argument("--scheme", default="fixed", choices=["fixed", *SCHEMES])
+    args = parser.parse_args()
+
+    size = build_interactive_map(
+        args.output,
+        args.metric,
+        args.start,
+        quantization=args.quantization,
+        scheme=args.scheme,
+    )
+    print(f"Wrote {args.output} ({size / 1e3:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,851 @@
+"""
+Automatic placement of map labels and leader-line callouts.
+
+`place_labels` lays out one label per region. Everything is computed in
+points on the page, so the result holds for any projection, figure size or
+geography:
+
+1. Anchor: the point of the region's largest polygon farthest from its
+   border, an approximation of polylabel's pole of inaccessibility found by
+   `interior_anchors` for all regions at once.
+2. In place: regions are visited from the hardest to fit, and each takes
+   the first candidate layout (e.g., two lines, then one line) with a box
+   position near its anchor that lies mostly inside the region and does not
+   collide with a label already placed. Collisions are found with a grid
+   index of the placed boxes (`LabelIndex`), so each check only looks at
+   the labels nearby.
+3. Callouts: labels that do not fit are moved out of their region to a free
+   spot on rings of candidate positions around the anchor, and joined to it
+   by a leader line. A spot is free if its box touches no other label and
+   its leader line crosses no label, other leader line or other callout's
+   anchor. Short leaders pointing away from the map are preferred, and
+   spots over other regions or leaders crossing them cost extra. The
+   callouts are placed in a few orders and the best kept; if every order
+   leaves some out, a bounded backtracking search looks for a layout of
+   them all. Each is then moved to its best spot among the others for a
+   few passes. A callout whose anchor is still fenced in by the labels
+   around it points at the nearest other spot of its region that a leader
+   line can leave from (`spare_anchors`).
+
+The placement depends on the geometries and the label sizes, not on the
+values, so a template can place its labels once and reuse them every month.
+"""
+
+import functools
+
+import numpy as np
+import pandas as pd
+import shapely
+
+# Gap kept between labels and around callout boxes, in points
+LABEL_GAP = 0.5
+
+# Shortest leader line of a callout, in points, so its arrow head stays visible
+MIN_LEADER = 10.0
+
+# Share of a label's box that must lie inside its region to be placed there
+MIN_INSIDE = 0.6
+
+# Sample points across and along a label's box used to measure how much of it
+# lies inside its region
+SAMPLES = (8, 4)
+
+# Largest number of passes moving each callout to its best spot among the others
+CALLOUT_PASSES = 3
+
+# Directions around the anchor in which callout positions are tried
+CALLOUT_DIRECTIONS = 36
+
+# Largest number of spots `_search_callouts` tries before giving up
+SEARCH_BUDGET = 2000
+
+# Points per side of the grid of spare anchors tried for fenced-in callouts
+SPARE_GRID = 8
+
+# Largest number of (point, border segment) pairs measured at once
+PAIR_CHUNK = 1_000_000
+
+
+@functools.lru_cache(maxsize=4096)
+def text_size(text, font, fontsize):
+    """
+    Width and height of a line of text in points, as laid out by matplotlib.
+
+    Parameters:
+    - text (str): The text, without line breaks.
+    - font (FontProperties): Font of the text.
+    - fontsize (float): Size in points.
+
+    Returns:
+    - tuple: (width, height) in points.
+    """
+    from matplotlib.textpath import text_to_path
+
+    prop = font.copy()
+    prop.set_size(fontsize)
+    width, height, _ = text_to_path.get_text_width_height_descent(
+        text, prop, ismath=False
+    )
+    return width, height
+
+
+def axis_scale(ax):
+    """
+    Points per data unit along x and y of an axis, after its limits and aspect are final.
+    """
+    ax.apply_aspect()
+    origin, unit = ax.transData.transform([(0, 0), (1, 1)])
+    return np.abs(unit - origin) * 72 / ax.figure.dpi
+
+
+def largest_parts(geometries):
+    """
+    The largest polygon of each (multi-)polygon.
+    """
+    parts, owners = shapely.get_parts(geometries, return_index=True)
+    order = np.lexsort((-shapely.area(parts), owners))
+    first = np.unique(owners[order], return_index=True)[1]
+    return parts[order[first]]
+
+
+def _segments(polygons):
+    """
+    Border segments of polygons, as arrays of their start (x, y), direction
+    (dx, dy), inverse squared length, x shift per unit of y, end y and polygon.
+    """
+    rings, owners = shapely.get_rings(polygons, return_index=True)
+    coords, ring_index = shapely.get_coordinates(rings, return_index=True)
+    same = ring_index[1:] == ring_index[:-1]
+    start, end = coords[:-1][same], coords[1:][same]
+    dx, dy = (end - start).T
+    length = dx * dx + dy * dy
+    return (
+        *start.T,
+        dx,
+        dy,
+        1 / np.where(length > 0, length, 1),
+        dx / np.where(dy != 0, dy, 1),
+        end[:, 1],
+        owners[ring_index[1:][same]],
+    )
+
+
+def _border_distance(segments, owners, x, y):
+    """
+    Distance from each point to the border of its polygon, negative outside it.
+
+    Each point is measured against every border segment of its polygon, in
+    chunks of at most PAIR_CHUNK pairs: its distance is that of the nearest
+    segment, and it is inside if a ray from it crosses an odd number of them.
+    This needs no point geometries, which would cost more than the arithmetic.
+
+    Parameters:
+    - segments (tuple): Border segments from `_segments`.
+    - owners (np.ndarray): Polygon of each point.
+    - x, y (np.ndarray): Point coordinates.
+    """
+    *columns, segment_owners = segments
+    counts = np.bincount(segment_owners, minlength=owners.max(initial=-1) + 1)
+    first = np.cumsum(counts) - counts
+    pairs = counts[owners]
+    splits = np.searchsorted(
+        np.cumsum(pairs), np.arange(PAIR_CHUNK, pairs.sum(), PAIR_CHUNK)
+    )
+    distance = np.full(len(x), -np.inf)
+    for chunk in np.split(np.arange(len(x)), np.unique(splits)):
+        chunk = chunk[pairs[chunk] > 0]
+        if not len(chunk):
+            continue
+        k = pairs[chunk]
+        offsets = np.cumsum(k) - k
+        segment = np.repeat(first[owners[chunk]] - offsets, k) + np.arange(k.sum())
+        ax, ay, dx, dy, inverse, shift, by = (column[segment] for column in columns)
+        px, py = np.repeat(x[chunk], k), np.repeat(y[chunk], k)
+
+        rx, ry = px - ax, py - ay
+        t = np.clip((rx * dx + ry * dy) * inverse, 0, 1)
+        nearest = np.minimum.reduceat((rx - t * dx) ** 2 + (ry - t * dy) ** 2, offsets)
+        crosses = ((ay > py) != (by > py)) & (rx < ry * shift)
+        inside = np.add.reduceat(crosses, offsets) % 2 == 1
+        distance[chunk] = np.where(inside, 1, -1) * np.sqrt(nearest)
+    return distance
+
+
+def interior_anchors(polygons, grid=5, rounds=4):
+    """
+    Find the interior point of each polygon farthest from its border.
+
+    Every round evaluates a grid of points over a window of each polygon, all
+    polygons at once, and shrinks the window around the best point, so the
+    cost is a few hundred point-to-border distances per polygon, computed
+    with `_border_distance`.
+
+    Parameters:
+    - polygons (np.ndarray): Shapely polygons.
+    - grid (int): Points per side of the grid evaluated each round.
+    - rounds (int): Number of refinements; the precision is the polygon size
+      divided by about (grid / 2) ** rounds.
+
+    Returns:
+    - tuple: Anchor coordinates (n, 2) and their distance to the border (n,).
+    """
+    n = len(polygons)
+    if n == 0:
+        return np.empty((0, 2)), np.empty(0)
+    bounds = shapely.bounds(polygons)
+    low, size = bounds[:, :2], bounds[:, 2:] - bounds[:, :2]
+    segments = _segments(polygons)
+
+    # Start from a point that is always inside
+    best = shapely.get_coordinates(shapely.point_on_surface(polygons))
+    best_distance = np.abs(_border_distance(segments, np.arange(n), *best.T))
+
+    steps = (np.arange(grid) + 0.5) / grid
+    owners = np.repeat(np.arange(n), grid * grid)
+    for _ in range(rounds):
+        x = (low[:, 0, None] + size[:, 0, None] * steps).repeat(grid, axis=1)
+        y = np.tile(low[:, 1, None] + size[:, 1, None] * steps, grid)
+        x, y = x.ravel(), y.ravel()
+
+        distance = _border_distance(segments, owners, x, y)
+        candidate = distance.reshape(n, -1).argmax(axis=1)
+        candidate_distance = distance.reshape(n, -1)[np.arange(n), candidate]
+        better = candidate_distance > best_distance
+        flat = np.arange(n) * grid * grid + candidate
+        best[better] = np.column_stack([x[flat], y[flat]])[better]
+        best_distance[better] = candidate_distance[better]
+
+        # Zoom in on the best point, to a window two grid cells wide
+        size = size * 2 / grid
+        low = best - size / 2
+    return best, best_distance
+
+
+def spare_anchors(polygon, anchor, grid=SPARE_GRID):
+    """
+    Points of a grid over a polygon that lie inside it, nearest to its anchor first.
+
+    The points closer to the border than the gap kept around labels are left
+    out, so an arrow head pointing at them stays on the polygon.
+
+    Returns:
+    - np.ndarray: Coordinates (m, 2), without the anchor itself.
+    """
+    xmin, ymin, xmax, ymax = polygon.bounds
+    steps = (np.arange(grid) + 0.5) / grid
+    x, y = np.meshgrid(xmin + (xmax - xmin) * steps, ymin + (ymax - ymin) * steps)
+    points = np.column_stack([x.ravel(), y.ravel()])
+    inside = shapely.contains_xy(polygon, points[:, 0], points[:, 1])
+    points = points[inside]
+    clear = shapely.distance(polygon.boundary, shapely.points(points)) > LABEL_GAP * 2
+    points = points[clear]
+    return points[np.argsort(np.hypot(*(points - anchor).T), kind="stable")]
+
+
+class LabelIndex:
+    """
+    Grid index of the boxes and leader lines placed so far, in points.
+
+    Parameters:
+    - cell (float): Side of the grid cells, about the size of a label.
+    """
+
+    def __init__(self, cell):
+        self.cell = cell
+        self.cells = {}
+        self.bounds = []
+        self.geometries = []
+
+    def _keys(self, bounds):
+        low = np.floor(np.asarray(bounds[:2]) / self.cell).astype(int)
+        high = np.floor(np.asarray(bounds[2:]) / self.cell).astype(int)
+        return [
+            (column, row)
+            for column in range(low[0], high[0] + 1)
+            for row in range(low[1], high[1] + 1)
+        ]
+
+    def add(self, geometry):
+        i = len(self.geometries)
+        bounds = shapely.bounds(geometry)
+        self.bounds.append(bounds)
+        self.geometries.append(geometry)
+        for key in self._keys(bounds):
+            self.cells.setdefault(key, []).append(i)
+
+    def copy(self):
+        """
+        An independent index holding the same geometries.
+        """
+        other = LabelIndex(self.cell)
+        other.cells = {key: list(items) for key, items in self.cells.items()}
+        other.bounds = list(self.bounds)
+        other.geometries = list(self.geometries)
+        return other
+
+    def near(self, bounds):
+        """
+        The geometries whose cells overlap an area given as (xmin, ymin, xmax, ymax).
+        """
+        found = {i for key in self._keys(bounds) for i in self.cells.get(key, ())}
+        return np.array([self.geometries[i] for i in sorted(found)], dtype=object)
+
+
+def _boxes(x, y, width, height):
+    return shapely.box(x - width / 2, y - height / 2, x + width / 2, y + height / 2)
+
+
+def _inside_positions(regions, anchors, clearance, width, height, min_inside, shifts):
+    """
+    Positions around the anchors where a label of the given size fits its region.
+
+    The share of each box inside its region is estimated from a small grid of
+    sample points, which is an order of magnitude faster than intersecting
+    the polygons, and only regions with room for `min_inside` of the label are
+    measured, since most of the small regions of a detailed map cannot hold
+    a label at all. Boxes within the clearance of their anchor, the radius of
+    a disk around it that lies inside the region, are wholly inside and are
+    not sampled, which spares most positions of labels much smaller than
+    their regions.
+
+    Returns:
+    - tuple: Candidate centers x and y, shaped (regions, positions), and the
+      share of each candidate's box inside its region.
+    """
+    steps = np.linspace(-0.5, 0.5, shifts)
+    # Offsets ordered by distance, so positions near the anchor are tried first
+    offsets = np.array([(dx, dy) for dx in steps for dy in steps])
+    offsets = offsets[np.argsort(np.hypot(*offsets.T), kind="stable")]
+
+    x = anchors[:, 0, None] + offsets[:, 0] * width[:, None]
+    y = anchors[:, 1, None] + offsets[:, 1] * height[:, None]
+    share = np.zeros(x.shape)
+
+    # Distance from the anchor to the farthest corner of each box
+    reach = np.hypot(
+        (np.abs(offsets[:, 0]) + 0.5) * width[:, None],
+        (np.abs(offsets[:, 1]) + 0.5) * height[:, None],
+    )
+    whole = reach < clearance[:, None]
+    share[whole] = 1
+
+    roomy = shapely.area(regions) >= min_inside * width * height
+    rows, positions = np.nonzero(roomy[:, None] & ~whole)
+    # Sample points at the centers of a grid of cells over each box
+    sample_x, sample_y = [(np.arange(count) + 0.5) / count - 0.5 for count in SAMPLES]
+    sample_x, sample_y = [a.ravel() for a in np.meshgrid(sample_x, sample_y)]
+    points_x = x[rows, positions, None] + sample_x * width[rows, None]
+    points_y = y[rows, positions, None] + sample_y * height[rows, None]
+    inside = shapely.contains_xy(regions[rows, None], points_x, points_y)
+    share[rows, positions] = inside.mean(axis=1)
+    return x, y, share
+
+
+def _place_in_regions(
+    regions,
+    anchors,
+    clearance,
+    sizes,
+    priority,
+    visible,
+    index,
+    min_inside,
+    callouts,
+    shifts=5,
+):
+    """
+    Place the labels that fit inside their regions without overlapping.
+
+    Each layout is tried at a small grid of positions around the anchor, up to
+    half the label's size away, since a label too wide for a region at its
+    anchor often fits a little above or below it, or next to a neighbor's
+    label. Visible regions are visited from the highest priority down, or by
+    default from the fewest fitting positions up, so the regions with the
+    least room choose first. Each takes the free position of its most
+    preferred layout that lies furthest inside it, which leaves the most room
+    to its neighbors. With `callouts`, the anchors of the regions that cannot
+    hold any label are kept clear for the arrow heads of their callouts. The
+    placed boxes are added to `index`.
+
+    Returns:
+    - tuple: Layout of each region (-1 where no label fits) and the label centers.
+    """
+    n = len(regions)
+    layout = np.full(n, -1)
+    centers = anchors.copy()
+    candidates = [
+        _inside_positions(
+            regions, anchors, clearance, width, height, min_inside, shifts
+        )
+        for width, height in sizes
+    ]
+
+    room = sum((share >= min_inside).sum(axis=1) for _, _, share in candidates)
+    # Room for the arrow heads of the callouts
+    arrow_heads = anchors[visible & (room == 0)] if callouts else np.empty((0, 2))
+    clear = shapely.STRtree(_boxes(*arrow_heads.T, 2 * LABEL_GAP, 2 * LABEL_GAP))
+    if priority is None:
+        order = np.lexsort((-shapely.area(regions), room))
+    else:
+        order = np.argsort(-priority, kind="stable")
+    for i in order[visible[order]]:
+        for k, (x, y, share) in enumerate(candidates):
+            spots = np.flatnonzero(share[i] >= min_inside)
+            if not len(spots):
+                continue
+            # Furthest inside first, then nearest to the anchor
+            spots = spots[np.argsort(-share[i, spots].round(1), kind="stable")]
+            width, height = sizes[k][0][i] + LABEL_GAP, sizes[k][1][i] + LABEL_GAP
+            boxes = _boxes(x[i, spots], y[i, spots], width, height)
+            placed = index.near(
+                (
+                    x[i, spots].min() - width,
+                    y[i, spots].min() - height,
+                    x[i, spots].max() + width,
+                    y[i, spots].max() + height,
+                )
+            )
+            free = np.ones(len(spots), dtype=bool)
+            if len(arrow_heads):
+                free[clear.query(boxes, predicate="intersects")[0]] = False
+            if len(placed):
+                free &= ~shapely.intersects(boxes[:, None], placed[None, :]).any(axis=1)
+            if free.any():
+                best = np.argmax(free)
+                layout[i] = k
+                centers[i] = x[i, spots[best]], y[i, spots[best]]
+                index.add(boxes[best])
+                break
+    return layout, centers
+
+
+def _callout_candidates(
+    anchor, width, height, obstacles, limits, directions, radii, outward, avoid
+):
+    """
+    Candidate positions for one callout and the cost of each.
+
+    Candidate boxes lie on rings around the anchor. Their cost only depends on
+    the map, not on the other labels, so it is computed once per callout:
+    short leaders pointing away from the middle of the map are preferred, and
+    leaders crossing other regions and boxes covering them cost extra. `avoid`
+    holds the anchors of the other callouts, which leader lines keep clear of
+    so that every arrow head stays on its own region.
+
+    Returns:
+    - tuple: Box centers (x, y), leader ends (tail_x, tail_y), the boxes and
+      leader lines, the usable candidates, their cost and the area to search
+      for placed labels, (xmin, ymin, xmax, ymax).
+    """
+    ring = np.repeat(radii, len(directions))
+    unit = np.tile(directions, (len(radii), 1))
+    x = anchor[0] + unit[:, 0] * (ring + width / 2)
+    y = anchor[1] + unit[:, 1] * (ring + height / 2)
+    boxes = _boxes(x, y, width + 2 * LABEL_GAP, height + 2 * LABEL_GAP)
+
+    # Leader lines end on the box, at its point nearest to the anchor
+    tail_x = np.clip(anchor[0], x - width / 2, x + width / 2)
+    tail_y = np.clip(anchor[1], y - height / 2, y + height / 2)
+    leaders = shapely.linestrings(
+        np.stack(
+            [np.broadcast_to(anchor, (len(x), 2)), np.column_stack([tail_x, tail_y])],
+            axis=1,
+        )
+    )
+
+    xmin, xmax, ymin, ymax = limits
+    valid = (
+        (x - width / 2 >= xmin)
+        & (x + width / 2 <= xmax)
+        & (y - height / 2 >= ymin)
+        & (y + height / 2 <= ymax)
+    )
+    if len(avoid):
+        # Distance of every anchor to every leader, from its nearest point
+        dx, dy = tail_x - anchor[0], tail_y - anchor[1]
+        px, py = avoid[:, :1] - anchor[0], avoid[:, 1:] - anchor[1]
+        t = np.clip((px * dx + py * dy) / np.maximum(dx**2 + dy**2, 1e-12), 0, 1)
+        clearance = np.hypot(px - t * dx, py - t * dy)
+        valid &= clearance.min(axis=0) > LABEL_GAP * 2
+
+    over_regions = np.zeros(len(x), dtype=bool)
+    over_regions[obstacles.query(boxes, predicate="intersects")[0]] = True
+    # Regions crossed by each leader line, besides the one it points at
+    crossed = np.bincount(
+        obstacles.query(leaders, predicate="intersects")[0], minlength=len(x)
+    )
+    crossed = np.maximum(crossed - 1, 0)
+    score = (
+        ring * (1.5 - 0.5 * unit @ outward)
+        + crossed * radii[-1] / 4
+        + over_regions * 2 * radii[-1]
+    )
+
+    search = (
+        anchor[0] - radii[-1] - width,
+        anchor[1] - radii[-1] - height,
+        anchor[0] + radii[-1] + width,
+        anchor[1] + radii[-1] + height,
+    )
+    return (x, y), (tail_x, tail_y), boxes, leaders, valid, score, search
+
+
+def _clear_candidates(candidates, index):
+    """
+    Which candidates of one callout are clear of the placed labels.
+
+    A candidate is clear if its box touches no placed label or leader line, and
+    its leader line crosses none of them.
+    """
+    _, _, boxes, leaders, valid, _, search = candidates
+    placed = index.near(search)
+    if len(placed):
+        valid = valid.copy()
+        tree = shapely.STRtree(placed)
+        valid[tree.query(boxes, predicate="intersects")[0]] = False
+        valid[tree.query(leaders, predicate="intersects")[0]] = False
+    return valid
+
+
+def _callout_spot(candidates, index):
+    """
+    The cheapest candidate of one callout that is clear of the placed labels, or None.
+
+    Returns:
+    - tuple: Box center (x, y), the end of the leader line on the box and the
+      cost of the spot.
+    """
+    (x, y), (tail_x, tail_y), _, _, _, score, _ = candidates
+    clear = _clear_candidates(candidates, index)
+    if not clear.any():
+        return None
+    best = np.flatnonzero(clear)[np.argmin(score[clear])]
+    return (x[best], y[best]), (tail_x[best], tail_y[best]), score[best]
+
+
+def _search_callouts(pending, candidates, clear, widths, heights, budget):
+    """
+    Search for a spot for every callout at once, backtracking.
+
+    The callout with the fewest clear spots left is placed next, in each of
+    its directions in turn from its cheapest spot, and the spots its box and
+    leader block are struck from those of the others (forward checking). A
+    branch stops as soon as some callout has no spot left.
+
+    Parameters:
+    - clear (dict): Mask of the candidates of each callout that are clear of
+      the labels inside the regions.
+    - budget (int): Largest number of spots tried before giving up.
+
+    Returns:
+    - dict: Candidate index of each callout, or None if none was found.
+    """
+    trees = {
+        i: (shapely.STRtree(candidates[i][2]), shapely.STRtree(candidates[i][3]))
+        for i in pending
+    }
+    tried = 0
+
+    def search(domains, chosen):
+        nonlocal tried
+        if not domains:
+            return chosen
+        i = min(domains, key=lambda j: domains[j].sum())
+        (x, y), _, _, leaders, _, score, _ = candidates[i]
+        options = np.flatnonzero(domains[i])
+        options = options[np.argsort(score[options], kind="stable")]
+        # The cheapest spot of each direction, as the rings of a direction
+        # mostly block the same spots of the others
+        _, first = np.unique(options % CALLOUT_DIRECTIONS, return_index=True)
+        for k in options[np.sort(first)]:
+            tried += 1
+            if tried > budget:
+                return None
+            shapes = [
+                _boxes(x[k], y[k], widths[i], heights[i]),
+                leaders[k],
+            ]
+            rest = {}
+            for j, domain in domains.items():
+                if j == i:
+                    continue
+                boxes, lines = trees[j]
+                domain = domain.copy()
+                domain[boxes.query(shapes, predicate="intersects")[1]] = False
+                domain[lines.query(shapes, predicate="intersects")[1]] = False
+                if not domain.any():
+                    break
+                rest[j] = domain
+            else:
+                found = search(rest, {**chosen, i: k})
+                if found is not None:
+                    return found
+            if tried > budget:
+                return None
+        return None
+
+    return search({i: clear[i] for i in pending}, {})
+
+
+def _place_callouts(
+    pending,
+    anchors,
+    polygons,
+    widths,
+    heights,
+    obstacles,
+    index,
+    limits,
+    middle,
+    max_radius,
+):
+    """
+    Place the callouts one at a time, then move each to its best spot among the others.
+
+    A callout placed early can fence in a later one with its box or leader, so
+    the callouts are laid out in order of priority, from top to bottom and
+    from bottom to top, and the layout that places the most, at the lowest
+    total cost (mostly leader length), is kept. If every order leaves some
+    out, as in crowded corners with wide values, `_search_callouts` looks for
+    a layout of them all. Each callout is then placed again with all the
+    others fixed, which can only lower its cost, for up to CALLOUT_PASSES
+    passes. Callouts still without a spot then try the `spare_anchors` of
+    their region, and the anchor of those placed that way is moved in
+    `anchors`.
+
+    Returns:
+    - dict: Label center and leader end of each placed callout, by region.
+    """
+    angles = np.linspace(0, 2 * np.pi, CALLOUT_DIRECTIONS, endpoint=False)
+    directions = np.column_stack([np.cos(angles), np.sin(angles)])
+    radii = np.arange(MIN_LEADER, max_radius, heights[pending].min() / 2)
+    if not len(radii):
+        # No room for rings up to max_radius, e.g., on a small figure: try the
+        # shortest leader that still shows its arrow head
+        radii = np.array([MIN_LEADER])
+
+    # Only the anchors a leader line can reach are kept clear of, and those
+    # moved to a spare anchor, which the tree does not know about
+    anchor_tree = shapely.STRtree(shapely.points(anchors[pending]))
+    shifted = []
+
+    def candidates_from(i, anchor):
+        outward = anchor - middle
+        outward /= max(np.hypot(*outward), 1e-9)
+        reach = radii[-1] + np.hypot(widths[i], heights[i]) + LABEL_GAP * 2
+        near = np.union1d(
+            pending[
+                anchor_tree.query(
+                    shapely.points(anchor), predicate="dwithin", distance=reach
+                )
+            ],
+            shifted,
+        ).astype(int)
+        return _callout_candidates(
+            anchor,
+            widths[i],
+            heights[i],
+            obstacles,
+            limits,
+            directions,
+            radii,
+            outward,
+            anchors[near[near != i]],
+        )
+
+    candidates = {i: candidates_from(i, anchors[i]) for i in pending}
+
+    def add(placed_index, i, spot):
+        placed_index.add(_boxes(*spot[0], widths[i], heights[i]))
+        placed_index.add(shapely.linestrings([anchors[i], spot[1]]))
+
+    def attempt(order):
+        placed_index = index.copy()
+        spots = {}
+        for i in order:
+            spot = _callout_spot(candidates[i], placed_index)
+            if spot is not None:
+                spots[i] = spot
+                add(placed_index, i, spot)
+        return spots
+
+    def cost(spots):
+        return len(pending) - len(spots), sum(spot[2] for spot in spots.values())
+
+    top_down = pending[np.argsort(-anchors[pending, 1], kind="stable")]
+    spots = min(
+        (attempt(order) for order in (pending, top_down, top_down[::-1])), key=cost
+    )
+
+    if len(spots) < len(pending):
+        clear = {i: _clear_candidates(candidates[i], index) for i in pending}
+        found = _search_callouts(
+            pending, candidates, clear, widths, heights, SEARCH_BUDGET
+        )
+        if found is not None:
+            spots = {}
+            for i, k in found.items():
+                (x, y), (tail_x, tail_y), _, _, _, score, _ = candidates[i]
+                spots[i] = (x[k], y[k]), (tail_x[k], tail_y[k]), score[k]
+
+    for _ in range(CALLOUT_PASSES):
+        moved = False
+        for i in pending:
+            others = index.copy()
+            for j, spot in spots.items():
+                if j != i:
+                    add(others, j, spot)
+            spot = _callout_spot(candidates[i], others)
+            if spot is not None and (i not in spots or spot[2] < spots[i][2] - 1e-9):
+                spots[i] = spot
+                moved = True
+        if not moved:
+            break
+
+    for i in pending:
+        if i in spots:
+            continue
+        others = index.copy()
+        for j, spot in spots.items():
+            add(others, j, spot)
+        for anchor in spare_anchors(polygons[i], anchors[i]):
+            spot = _callout_spot(candidates_from(i, anchor), others)
+            if spot is not None:
+                anchors[i] = anchor
+                shifted.append(i)
+                spots[i] = spot
+                break
+    return {i: spot[:2] for i, spot in spots.items()}
+
+
+def place_labels(
+    geometries,
+    sizes,
+    scale,
+    limits,
+    callout_size=None,
+    priority=None,
+    max_callouts=None,
+    max_radius=60.0,
+    min_inside=MIN_INSIDE,
+):
+    """
+    Place one label per region, inside it when it fits and as a callout otherwise.
+
+    Parameters:
+    - geometries (array-like): Shapely (multi-)polygons in data coordinates.
+    - sizes (list): Candidate layouts, most preferred first, each a (width, height)
+      pair of arrays (or scalars) in points.
+    - scale (tuple): Points per data unit along x and y, e.g., from `axis_scale`.
+    - limits (tuple): Visible area (xmin, xmax, ymin, ymax) in data coordinates.
+    - callout_size (tuple): (width, height) arrays (or scalars) of the callout
+      labels in points. None disables callouts
+      and labels that do not fit are dropped.
+    - priority (array-like): Labels with higher values are placed first; defaults
+      to the area of the regions.
+    - max_callouts (int): Largest number of callouts, highest priority first.
+    - max_radius (float): Longest leader line searched, in points.
+    - min_inside (float): Share of an in-place label's box that must be inside its region.
+
+    Returns:
+    - pd.DataFrame: One row per region with the label center ('x', 'y'), the
+      anchor ('anchor_x', 'anchor_y') and the end of the leader line on the label
+      ('tail_x', 'tail_y'), all in data coordinates, the layout used ('layout',
+      an index into `sizes`, -1 for callouts) and 'callout' and 'placed' flags.
+    """
+    scale = np.asarray(scale, dtype=float)
+    geometries = np.asarray(geometries, dtype=object)
+    n = len(geometries)
+    sizes = [
+        (
+            np.broadcast_to(np.asarray(w, float), n),
+            np.broadcast_to(np.asarray(h, float), n),
+        )
+        for w, h in sizes
+    ]
+
+    if callout_size is not None:
+        callout_size = [np.broadcast_to(np.asarray(v, float), n) for v in callout_size]
+
+    # Work in points, where distances are the same in every direction
+    regions = shapely.transform(geometries, lambda coords: coords * scale)
+    polygons = largest_parts(regions)
+    shapely.prepare(regions)
+    # Only regions that can hold a label, or point a callout at it, need the
+    # best anchor; the others keep a point that is merely inside
+    anchors = shapely.get_coordinates(shapely.point_on_surface(polygons))
+    if callout_size is None:
+        smallest = min((w * h).min(initial=np.inf) for w, h in sizes)
+        roomy = np.flatnonzero(shapely.area(regions) >= min_inside * smallest)
+    else:
+        roomy = np.arange(n)
+    clearance = np.zeros(n)
+    anchors[roomy], clearance[roomy] = interior_anchors(polygons[roomy])
+    priority = None if priority is None else np.asarray(priority, dtype=float)
+
+    # Regions whose anchor is off the map, e.g., territories, get no label
+    xmin, xmax, ymin, ymax = limits
+    box_limits = (xmin * scale[0], xmax * scale[0], ymin * scale[1], ymax * scale[1])
+    visible = (
+        (anchors[:, 0] >= box_limits[0])
+        & (anchors[:, 0] <= box_limits[1])
+        & (anchors[:, 1] >= box_limits[2])
+        & (anchors[:, 1] <= box_limits[3])
+    )
+
+    index = LabelIndex(
+        cell=max(max(w.max(initial=1), h.max(initial=1)) for w, h in sizes)
+    )
+    layout, center = _place_in_regions(
+        regions,
+        anchors,
+        clearance,
+        sizes,
+        priority,
+        visible,
+        index,
+        min_inside,
+        callouts=callout_size is not None,
+    )
+    inside = layout >= 0
+    center[~inside] = anchors[~inside]
+    tail = np.full((n, 2), np.nan)
+    callout = np.zeros(n, dtype=bool)
+
+    pending = np.flatnonzero(~inside & visible)
+    if callout_size is not None and len(pending):
+        if priority is None:
+            priority = shapely.area(regions)
+        pending = pending[np.argsort(-priority[pending], kind="stable")]
+        if max_callouts is not None:
+            pending = pending[:max_callouts]
+
+        obstacles = shapely.STRtree(regions)
+        spots = _place_callouts(
+            pending,
+            anchors,
+            polygons,
+            *callout_size,
+            obstacles,
+            index,
+            box_limits,
+            anchors[visible].mean(axis=0),
+            max_radius,
+        )
+        for i, (spot_center, spot_tail) in spots.items():
+            center[i], tail[i] = spot_center, spot_tail
+            callout[i] = True
+
+    return pd.DataFrame(
+        {
+            "x": center[:, 0] / scale[0],
+            "y": center[:, 1] / scale[1],
+            "anchor_x": anchors[:, 0] / scale[0],
+            "anchor_y": anchors[:, 1] / scale[1],
+            "tail_x": tail[:, 0] / scale[0],
+            "tail_y": tail[:, 1] / scale[1],
+            "layout": layout,
+            "callout": callout,
+            "placed": inside | callout,
+        }
+    )
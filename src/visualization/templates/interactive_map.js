@@ -0,0 +1,133 @@
+// Decoding and drawing for the interactive employment map, see interactive.py.
+// The functions at the top do not touch the DOM, so they can also be timed in Node.
+
+// Undo the delta encoding of the quantized arcs
+function decodeArcs(arcs) {
+  return arcs.map(function (arc) {
+    var x = 0, y = 0;
+    return arc.map(function (point) {
+      x += point[0];
+      y += point[1];
+      return [x, y];
+    });
+  });
+}
+
+// Format every arc once, forwards and backwards, without its first point.
+// Shared borders are formatted once and reused by both states.
+function arcStrings(arcs) {
+  return arcs.map(function (arc) {
+    var reversed = arc.slice().reverse();
+    return {
+      start: arc[0].join(","),
+      end: reversed[0].join(","),
+      forward: arc.slice(1).join("L"),
+      backward: reversed.slice(1).join("L")
+    };
+  });
+}
+
+// Join the arcs of one ring into an SVG subpath; ~i walks arc i backwards
+function ringPath(ring, arcs) {
+  var first = ring[0] < 0 ? arcs[~ring[0]].end : arcs[ring[0]].start;
+  var parts = ring.map(function (index) {
+    return index < 0 ? arcs[~index].backward : arcs[index].forward;
+  });
+  return "M" + first + "L" + parts.join("L") + "Z";
+}
+
+function geometryPath(geometry, arcs) {
+  var polygons = geometry.type === "Polygon" ? [geometry.arcs] : geometry.arcs;
+  return polygons.map(function (polygon) {
+    return polygon.map(function (ring) { return ringPath(ring, arcs); }).join("");
+  }).join("");
+}
+
+// SVG path data for every state in the topology
+function topologyPaths(topology) {
+  var arcs = arcStrings(decodeArcs(topology.arcs));
+  return topology.objects.states.geometries.map(function (geometry) {
+    return { id: geometry.id, d: geometryPath(geometry, arcs) };
+  });
+}
+
+// Int16 hundredths packed in base64, one row of states per month
+function decodeValues(data) {
+  var binary = atob(data.values);
+  var bytes = new Uint8Array(binary.length);
+  for (var j = 0; j < binary.length; j++) bytes[j] = binary.charCodeAt(j);
+  var codes = new Int16Array(bytes.buffer);
+  var values = new Float32Array(codes.length);
+  for (var i = 0; i < codes.length; i++) {
+    values[i] = codes[i] === data.missingCode ? NaN : codes[i] / data.scale;
+  }
+  return values;
+}
+
+// Same classes as ColorScale in classification.py: (bins[i - 1], bins[i]],
+// with the first and last open
+function valueColor(value, data) {
+  if (isNaN(value)) return data.missingColor;
+  for (var i = 0; i < data.bins.length; i++) {
+    if (value <= data.bins[i]) return data.colors[i];
+  }
+  return data.colors[data.colors.length - 1];
+}
+
+function monthLabel(data, month) {
+  var parts = data.start.split("-").map(Number);
+  var date = new Date(Date.UTC(parts[0], parts[1] - 1 + month, 1));
+  return date.toLocaleString("en-US", { month: "short", year: "numeric", timeZone: "UTC" });
+}
+
+if (typeof module !== "undefined") {
+  module.exports = { decodeArcs: decodeArcs, topologyPaths: topologyPaths, decodeValues: decodeValues };
+}
+
+if (typeof document !== "undefined") {
+  (function () {
+    var started = performance.now();
+    var data = JSON.parse(document.getElementById("map-data").textContent);
+    var values = decodeValues(data);
+    var states = topologyPaths(data.topology);
+    var svgNS = "http://www.w3.org/2000/svg";
+
+    var svg = document.getElementById("map");
+    var bbox = data.topology.bbox;
+    svg.setAttribute("viewBox", bbox.join(" "));
+    var paths = states.map(function (state) {
+      var path = document.createElementNS(svgNS, "path");
+      path.setAttribute("d", state.d);
+      path.appendChild(document.createElementNS(svgNS, "title"));
+      svg.appendChild(path);
+      return path;
+    });
+
+    var legend = document.getElementById("legend");
+    data.labels.forEach(function (label, i) {
+      var item = document.createElement("span");
+      item.innerHTML = '<i style="background:' + data.colors[i] + '"></i>' + label;
+      legend.appendChild(item);
+    });
+
+    var slider = document.getElementById("month");
+    var subtitle = document.getElementById("subtitle");
+    slider.max = data.months - 1;
+    slider.value = data.months - 1;
+
+    function showMonth(month) {
+      var row = month * states.length;
+      states.forEach(function (state, i) {
+        var value = values[row + i];
+        paths[i].setAttribute("fill", valueColor(value, data));
+        paths[i].firstChild.textContent = state.id + ": " + (isNaN(value) ? "n/a" : value.toFixed(2));
+      });
+      subtitle.textContent = "Total nonfarm employment, " + data.metric + " (" + monthLabel(data, month) + ")";
+    }
+
+    slider.addEventListener("input", function () { showMonth(Number(slider.value)); });
+    showMonth(data.months - 1);
+    document.getElementById("timing").textContent =
+      "Decoded and drawn in " + (performance.now() - started).toFixed(1) + " ms";
+  })();
+}
@@ -0,0 +1,316 @@
+"""
+TopoJSON-style topology for the state polygons.
+
+Coordinates are snapped to an integer grid and the polygon rings are cut into
+arcs wherever rings meet, so every border between two states is stored once
+and referenced by both. Arcs are delta-encoded like TopoJSON's quantized
+arcs, which keeps the numbers small and the JSON compact.
+
+A polygon references its rings as lists of arc indices; a negative index ~i
+means arc i is traversed backwards.
+
+The same arcs drive `simplify_geometries`: simplifying each shared border
+once, with its end points fixed, keeps neighboring states watertight at any
+level of detail.
+"""
+
+import numpy as np
+import shapely
+
+
+def polygon_rings(geometry):
+    """
+    List the polygons of a (multi-)polygon, each as a list of closed coordinate rings.
+    """
+    polygons = shapely.get_parts(geometry)
+    return [
+        [np.asarray(polygon.exterior.coords)]
+        + [np.asarray(ring.coords) for ring in polygon.interiors]
+        for polygon in polygons
+    ]
+
+
+def quantize_ring(ring, translate, scale):
+    """
+    Snap a ring to the integer grid, dropping points that fall on the previous point.
+    """
+    points = np.round((ring - translate) / scale).astype(np.int64)
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = (points[1:] != points[:-1]).any(axis=1)
+    return [tuple(point) for point in points[keep]]
+
+
+def find_junctions(rings):
+    """
+    Find the points where rings stop sharing a border.
+
+    A point is a junction if it is reached from different neighbors in different
+    rings (or twice in the same ring). Points in the middle of a shared border have
+    the same two neighbors in both rings, only in the opposite order.
+    """
+    neighbors = {}
+    junctions = set()
+    for ring in rings:
+        # Closed rings repeat the first point at the end
+        points = ring[:-1]
+        n = len(points)
+        for i, point in enumerate(points):
+            pair = frozenset((points[i - 1], points[(i + 1) % n]))
+            seen = neighbors.setdefault(point, pair)
+            if seen != pair:
+                junctions.add(point)
+    return junctions
+
+
+def _canonical_ring(points):
+    # Rotate a ring without junctions to start at its smallest point, so the same
+    # ring found in two polygons gets the same arc
+    start = points.index(min(points))
+    rotated = points[start:] + points[:start]
+    return rotated + [rotated[0]]
+
+
+def cut_ring(ring, junctions):
+    """
+    Cut a closed ring into arcs that start and end at junctions.
+
+    Returns:
+    - list: The arcs, each a list of points, in the order they make up the ring.
+    """
+    points = ring[:-1]
+    cuts = [i for i, point in enumerate(points) if point in junctions]
+    if not cuts:
+        return [_canonical_ring(points)]
+
+    # Start the ring at the first junction so no arc wraps around the end
+    rotated = points[cuts[0] :] + points[: cuts[0]] + [points[cuts[0]]]
+    cuts = [i - cuts[0] for i in cuts] + [len(points)]
+    return [rotated[a : b + 1] for a, b in zip(cuts[:-1], cuts[1:])]
+
+
+class ArcIndex:
+    """
+    Deduplicated arcs; an arc seen backwards reuses the index of the forward one.
+    """
+
+    def __init__(self):
+        self.arcs = []
+        self.index = {}
+
+    def add(self, arc):
+        key = tuple(arc)
+        if key in self.index:
+            return self.index[key]
+        reversed_key = key[::-1]
+        if reversed_key in self.index:
+            return ~self.index[reversed_key]
+        # Rings without junctions may be stored with a different rotation
+        if key[0] == key[-1]:
+            reversed_key = tuple(_canonical_ring(list(reversed_key[:-1])))
+            if reversed_key in self.index:
+                return ~self.index[reversed_key]
+        self.index[key] = len(self.arcs)
+        self.arcs.append(arc)
+        return self.index[key]
+
+
+def delta_encode(arc):
+    points = np.asarray(arc, dtype=np.int64)
+    points[1:] = np.diff(points, axis=0)
+    return points.tolist()
+
+
+def quantized_arcs(geometries, quantization=10_000, flip_y=True):
+    """
+    Snap a set of named (multi-)polygons to a grid and cut their rings into shared arcs.
+
+    Parameters:
+    - geometries (dict): Mapping of id (e.g., state code) to shapely (multi-)polygon.
+    - quantization (int): Number of grid steps along the longer side of the bounding box.
+    - flip_y (bool): Make y grow downwards, as in SVG.
+
+    Returns:
+    - tuple: The arcs (lists of grid points), the arc indices of every geometry
+      (id -> polygons -> rings -> arc indices), the translate and scale of the
+      grid, and the bounding box.
+    """
+    polygons = {
+        state_id: polygon_rings(geometry) for state_id, geometry in geometries.items()
+    }
+
+    bounds = shapely.total_bounds(list(geometries.values()))
+    x0, y0, x1, y1 = bounds
+    step = max(x1 - x0, y1 - y0) / (quantization - 1)
+    translate = np.array([x0, y1 if flip_y else y0])
+    scale = np.array([step, -step if flip_y else step])
+
+    quantized = {
+        state_id: [
+            [quantize_ring(ring, translate, scale) for ring in polygon]
+            for polygon in state_polygons
+        ]
+        for state_id, state_polygons in polygons.items()
+    }
+    # Drop rings that collapse to fewer than three distinct points on the grid
+    quantized = {
+        state_id: [
+            [ring for ring in polygon if len(ring) >= 4]
+            for polygon in state_polygons
+            if len(polygon[0]) >= 4
+        ]
+        for state_id, state_polygons in quantized.items()
+    }
+
+    junctions = find_junctions(
+        ring
+        for state_polygons in quantized.values()
+        for polygon in state_polygons
+        for ring in polygon
+    )
+
+    arc_index = ArcIndex()
+    references = {
+        state_id: [
+            [
+                [arc_index.add(arc) for arc in cut_ring(ring, junctions)]
+                for ring in polygon
+            ]
+            for polygon in state_polygons
+        ]
+        for state_id, state_polygons in quantized.items()
+    }
+    return arc_index.arcs, references, translate, scale, bounds
+
+
+def build_topology(geometries, quantization=10_000, flip_y=True, object_name="states"):
+    """
+    Build a quantized topology from a set of named (multi-)polygons.
+
+    Parameters:
+    - geometries (dict): Mapping of id (e.g., state code) to shapely (multi-)polygon.
+    - quantization (int): Number of grid steps along the longer side of the bounding box.
+    - flip_y (bool): Make y grow downwards, as in SVG.
+    - object_name (str): Name of the geometry collection in the topology.
+
+    Returns:
+    - dict: TopoJSON topology with 'transform', 'bbox', 'objects' and delta-encoded 'arcs'.
+    """
+    arcs, references, translate, scale, bounds = quantized_arcs(
+        geometries, quantization, flip_y
+    )
+
+    objects = []
+    for state_id in geometries:
+        state_arcs = references[state_id]
+        if len(state_arcs) == 1:
+            objects.append({"type": "Polygon", "id": state_id, "arcs": state_arcs[0]})
+        else:
+            objects.append({"type": "MultiPolygon", "id": state_id, "arcs": state_arcs})
+
+    x0, y0, x1, y1 = bounds
+    step = abs(scale[0])
+    width = round((x1 - x0) / step)
+    height = round((y1 - y0) / step)
+    return {
+        "type": "Topology",
+        "bbox": [0, 0, width, height],
+        "transform": {"scale": scale.tolist(), "translate": translate.tolist()},
+        "objects": {object_name: {"type": "GeometryCollection", "geometries": objects}},
+        "arcs": [delta_encode(arc) for arc in arcs],
+    }
+
+
+def _ring_points(ring, arcs):
+    # Join the arcs of a ring, dropping the point each arc shares with the previous one
+    points = []
+    for index in ring:
+        arc = arcs[~index][::-1] if index < 0 else arcs[index]
+        points.extend(arc if not points else arc[1:])
+    return points
+
+
+def _polygonal(geometry):
+    # make_valid can return a collection with collapsed parts as lines; keep
+    # only the polygons, which is all the rings and arcs are built from
+    polygons = shapely.get_parts(shapely.get_parts(geometry))
+    polygons = polygons[shapely.get_type_id(polygons) == 3]
+    return shapely.MultiPolygon(list(polygons)) if len(polygons) > 1 else polygons[0]
+
+
+def simplify_geometries(geometries, tolerance, quantization=10_000_000):
+    """
+    Simplify a set of named (multi-)polygons without opening gaps between neighbors.
+
+    Every arc, i.e., every border between two states or stretch of coast, is
+    simplified once with Douglas-Peucker, keeping its end points, and the rings
+    are rebuilt from the simplified arcs, so both sides of a border get the
+    same points. A ring that would collapse (fewer than four points) has its
+    arcs simplified again with half the tolerance until it keeps its shape, so
+    small states and islands are never dropped.
+
+    Parameters:
+    - geometries (dict): Mapping of id to shapely (multi-)polygon.
+    - tolerance (float): Largest distance a simplified border may move, in the
+      units of the geometries.
+    - quantization (int): Grid steps along the longer side of the bounding box,
+      fine enough that snapping to the grid does not change the shapes.
+
+    Returns:
+    - dict: Mapping of id to the simplified shapely (multi-)polygon.
+    """
+    arcs, references, translate, scale, _ = quantized_arcs(
+        geometries, quantization, flip_y=False
+    )
+    lines = np.array([shapely.LineString(arc) for arc in arcs])
+    tolerances = np.full(len(arcs), tolerance / abs(scale[0]))
+
+    def simplify(indices):
+        for i, line in zip(
+            indices, shapely.simplify(lines[indices], tolerances[indices])
+        ):
+            arcs[i] = [tuple(point) for point in shapely.get_coordinates(line)]
+
+    original = list(arcs)
+    simplify(np.arange(len(arcs)))
+    rings = [
+        ring
+        for state_polygons in references.values()
+        for polygon in state_polygons
+        for ring in polygon
+    ]
+    while True:
+        collapsed = {
+            index if index >= 0 else ~index
+            for ring in rings
+            if len(set(_ring_points(ring, arcs))) < 3
+            for index in ring
+        }
+        collapsed = [i for i in collapsed if tolerances[i] > 0]
+        if not collapsed:
+            break
+        collapsed = np.array(collapsed)
+        tolerances[collapsed] /= 2
+        # Below one grid step the original arc is as good as it gets
+        small = collapsed[tolerances[collapsed] < 1]
+        tolerances[small] = 0
+        for i in small:
+            arcs[i] = original[i]
+        simplify(collapsed[tolerances[collapsed] > 0])
+
+    def ring_coordinates(ring):
+        return np.asarray(_ring_points(ring, arcs), dtype=float) * scale + translate
+
+    simplified = {}
+    for state_id, state_polygons in references.items():
+        polygons = [
+            shapely.Polygon(
+                ring_coordinates(polygon[0]),
+                [ring_coordinates(hole) for hole in polygon[1:]],
+            )
+            for polygon in state_polygons
+        ]
+        geometry = shapely.MultiPolygon(polygons) if len(polygons) > 1 else polygons[0]
+        if not geometry.is_valid:
+            geometry = _polygonal(shapely.make_valid(geometry))
+        simplified[state_id] = geometry
+    return simplified
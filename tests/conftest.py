@@ -0,0 +1,25 @@
+"""
+Fixtures shared by the tests.
+"""
+
+import pytest
+
+from src.benchmarks.fred_stub import start_stub_server
+
+
+@pytest.fixture
+def stub_server():
+    """
+    Start local FRED stub servers with the given options, shut down after the test.
+    """
+    servers = []
+
+    def start(**options):
+        server = start_stub_server(**{"latency": 0, **options})
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,163 @@
+"""
+Tests of the county map against the synthetic county fixture and the FRED stub.
+"""
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+from matplotlib.font_manager import FontProperties
+
+from src.benchmarks.county_fixture import synthetic_counties
+from src.benchmarks.fred_stub import stub_fred_client
+from src.data.counties import collect_county_data, county_fips, county_series_id
+from src.visualization.choropleth import (
+    bin_values,
+    color_mapping,
+    color_scale,
+    default_scale,
+    missing_color,
+    value_colors,
+)
+from src.visualization.county_map import annotate_counties, merge_county_data
+from src.visualization.labels import axis_scale, text_size
+
+
+@pytest.fixture(scope="module")
+def counties():
+    """
+    About 60 synthetic counties cut from two square states, Alabama's FIPS
+    code keeping its leading zero.
+    """
+    import geopandas as gpd
+
+    states = gpd.GeoDataFrame(
+        {
+            "STATEFP": ["01", "06"],
+            "STUSPS": ["AL", "CA"],
+            "geometry": [
+                shapely.box(-90, 30, -80, 40),
+                shapely.box(-120, 35, -110, 45),
+            ],
+        },
+        crs="EPSG:4326",
+    )
+    return synthetic_counties(states, n_counties=60)
+
+
+def test_county_panel_is_keyed_by_fips(tmp_path, counties, stub_server):
+    path = str(tmp_path / "counties.shp")
+    counties.to_file(path)
+    fips = county_fips(path)
+    assert fips == sorted(counties["GEOID"])
+    assert fips[0].startswith("01")
+
+    missing = fips[1]
+    server = stub_server(
+        series_start="2022-01-01", missing_series=[county_series_id(missing)]
+    )
+    # FIPS codes read as numbers lose their leading zero
+    data = collect_county_data(
+        api_key=None,
+        fips_codes=[int(code) for code in fips],
+        observation_start="2022-01-01",
+        requests_per_minute=None,
+        fred=stub_fred_client(server),
+    )
+    assert sorted(server.attempts) == [county_series_id(code) for code in fips]
+    assert list(data.columns) == [code for code in fips if code != missing]
+    assert (data.dtypes == "float32").all()
+
+
+def test_merge_keeps_every_county_and_drops_unmatched_fips(counties):
+    geoids = counties["GEOID"].to_numpy()
+    # Values for every county but the first two, keyed by number, plus one
+    # FIPS code without a county
+    values = pd.Series(
+        np.arange(len(geoids) - 2, dtype=float),
+        index=[int(code) for code in geoids[2:]],
+    )
+    values[99001] = 100.0
+
+    merged = merge_county_data(counties, values, "apc")
+    assert len(merged) == len(counties)
+    assert list(merged["GEOID"]) == list(geoids)
+    assert merged["apc"].isna().sum() == 2
+    assert merged["apc"].iloc[:2].isna().all()
+    np.testing.assert_array_equal(merged["apc"].iloc[2:], values.iloc[:-1])
+    assert 100.0 not in merged["apc"].to_numpy()
+
+
+def test_colors_follow_the_bins_for_every_county():
+    values = pd.Series([-0.5, 0, 0.5, 1, 2.5, 3, 7, np.nan])
+    colors = value_colors(values, default_scale)
+    # Bins include their upper edge; NaN is missing
+    expected = ["<0%", "<0%", "0-1%", "0-1%", "2-3%", "2-3%", "3+%"]
+    assert list(colors) == [color_mapping[label] for label in expected] + [
+        missing_color
+    ]
+    binned = bin_values(values)
+    assert list(binned[:-1]) == expected
+    assert pd.isna(binned.iloc[-1])
+
+
+def test_data_driven_scale_colors_a_whole_panel():
+    panel = np.random.default_rng(0).normal(1, 2, (24, 3200))
+    panel[0, :10] = np.nan
+    scale = color_scale(panel, "quantile")
+    colors = value_colors(panel, scale)
+    assert colors.shape == panel.shape
+    assert (colors[0, :10] == scale.missing_color).all()
+    assert set(colors[1:].ravel()) == set(scale.colors)
+    # Each class holds about a fifth of the values
+    counts = pd.Series(colors[1:].ravel()).value_counts()
+    assert counts.min() > 0.15 * panel[1:].size
+
+
+def label_boxes(ax, labels, font, fontsize):
+    scale = axis_scale(ax)
+    boxes = []
+    for label in labels:
+        width, height = text_size(label.get_text(), font, fontsize)
+        x, y = np.asarray(label.get_position()) * scale
+        boxes.append(
+            shapely.box(x - width / 2, y - height / 2, x + width / 2, y + height / 2)
+        )
+    return np.array(boxes, dtype=object)
+
+
+@pytest.mark.parametrize(
+    "fontsize, expected",
+    [(1, "all"), (6, "some"), (40, "none")],
+)
+def test_labels_are_thinned_to_those_that_fit(counties, fontsize, expected):
+    data = counties.assign(value=np.linspace(-5, 5, len(counties)))
+    data.loc[data.index[::5], "value"] = np.nan
+    font = FontProperties()
+
+    fig, ax = plt.subplots(figsize=(5, 3.75), dpi=100)
+    ax.set_xlim(-125, -75)
+    ax.set_ylim(25, 50)
+    ax.set_aspect("equal")
+    labels = annotate_counties(data, ax, "value", {"light": font}, fontsize=fontsize)
+    plt.close(fig)
+
+    # Sliver counties along the state edges have no room for any label
+    roomy = data["value"].notna() & (shapely.area(data.geometry.values) > 1e-9)
+    fits = int(roomy.sum())
+    texts = {label.get_text() for label in labels}
+    assert "nan" not in texts
+    if expected == "all":
+        assert len(labels) == fits
+    elif expected == "none":
+        assert len(labels) == 0
+    else:
+        assert 0 < len(labels) < fits
+    boxes = label_boxes(ax, labels, font, fontsize)
+    pairs = shapely.STRtree(boxes).query(boxes, predicate="overlaps")
+    assert not (pairs[0] < pairs[1]).any()
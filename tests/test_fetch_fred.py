@@ -0,0 +1,76 @@
+"""
+Tests of the retries and the rate limiting of the FRED fetch against the stub server.
+"""
+
+import time
+
+import pytest
+
+from src.benchmarks.fred_stub import stub_fred_client
+from src.data.fetch_fred import (
+    FRED_BURST,
+    FRED_LIMIT_PER_MINUTE,
+    FRED_REQUESTS_PER_MINUTE,
+    TokenBucket,
+    fetch_many,
+    fetch_series,
+)
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_transient_errors_are_retried(stub_server, status):
+    server = stub_server(throttle_first=2, throttle_status=status)
+    data = fetch_series(stub_fred_client(server), "TXNA", backoff=0.001)
+    assert len(data) > 0
+    assert server.attempts["TXNA"] == 3
+
+
+def test_retries_stop_after_max_retries(stub_server):
+    server = stub_server(throttle_first=5)
+    with pytest.raises(ValueError, match="Too Many Requests"):
+        fetch_series(stub_fred_client(server), "TXNA", max_retries=2, backoff=0.001)
+    assert server.attempts["TXNA"] == 3
+
+
+def test_client_errors_are_not_retried(stub_server):
+    server = stub_server(missing_series=["VINA"], throttle_first=1, throttle_status=403)
+    fred = stub_fred_client(server)
+    with pytest.raises(ValueError, match="does not exist"):
+        fetch_series(fred, "VINA", backoff=0.001)
+    with pytest.raises(ValueError, match="Forbidden"):
+        fetch_series(fred, "TXNA", backoff=0.001)
+    assert server.attempts == {"VINA": 1, "TXNA": 1}
+
+
+def test_token_bucket_paces_requests_after_the_burst():
+    bucket = TokenBucket(rate=50, capacity=5)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05
+    for _ in range(10):
+        bucket.acquire()
+    # Ten more tokens at 50 per second
+    assert time.monotonic() - start >= 0.19
+
+
+def test_default_limit_covers_a_state_sweep_within_fred_limit():
+    # The burst plus a minute of refill bounds every 60 second window
+    assert FRED_BURST + FRED_REQUESTS_PER_MINUTE <= FRED_LIMIT_PER_MINUTE
+    assert FRED_BURST >= 56
+
+
+def test_fetch_many_shares_the_limit_between_workers(stub_server):
+    server = stub_server()
+    series_ids = [f"S{i:02d}NA" for i in range(6)]
+    start = time.monotonic()
+    # A burst of 120 - 117 = 3 requests, then one every 1/1.95 s
+    results = fetch_many(
+        stub_fred_client(server),
+        series_ids,
+        max_workers=6,
+        requests_per_minute=117,
+    )
+    elapsed = time.monotonic() - start
+    assert all(data is not None for data in results)
+    assert elapsed >= 3 / 1.95 - 0.05
@@ -0,0 +1,58 @@
+"""
+Tests of the on-disk FRED response cache against the stub server.
+"""
+
+import json
+import time
+
+import pytest
+
+from src.benchmarks.fred_stub import stub_fred_client
+from src.data.http_cache import ResponseCache
+
+
+def fetch(cache, server, series_id="TXNA"):
+    return cache.attach(stub_fred_client(server)).get_series(series_id)
+
+
+def test_warm_cache_makes_no_requests(tmp_path, stub_server):
+    server = stub_server()
+    cold = fetch(ResponseCache(str(tmp_path), ttl=3600), server)
+    assert server.request_count == 1
+
+    cache = ResponseCache(str(tmp_path), ttl=3600)
+    warm = fetch(cache, server)
+    assert server.request_count == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 0
+    assert warm.equals(cold)
+
+
+def test_not_modified_answer_renews_the_ttl(tmp_path, stub_server):
+    server = stub_server()
+    fetch(ResponseCache(str(tmp_path), ttl=3600), server)
+
+    # Age the stored response past the TTL
+    (meta_path,) = tmp_path.glob("*.json")
+    meta = json.loads(meta_path.read_text())
+    meta["stored"] = time.time() - 7200
+    meta_path.write_text(json.dumps(meta))
+
+    cache = ResponseCache(str(tmp_path), ttl=3600)
+    sent = server.bytes_sent
+    fetch(cache, server)
+    assert server.request_count == 2
+    assert server.not_modified == 1
+    assert server.bytes_sent == sent
+    assert cache.stats()["revalidated"] == 1
+    assert json.loads(meta_path.read_text())["stored"] > meta["stored"] + 3600
+
+    # Renewed, so the next fetch is served from disk
+    fetch(cache, server)
+    assert server.request_count == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_attach_rejects_clients_without_fetch_data(tmp_path):
+    with pytest.raises(TypeError, match="__fetch_data"):
+        ResponseCache(str(tmp_path)).attach(object())
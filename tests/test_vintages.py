@@ -0,0 +1,29 @@
+"""
+Tests of the append-only vintage store.
+"""
+
+import pandas as pd
+
+from src.data.vintages import VintageStore
+
+
+def test_observations_before_1970_round_trip(tmp_path):
+    # Days before 1970-01-01 are negative and must not spill into the column
+    dates = pd.to_datetime(["1939-01-01", "1969-12-01", "1970-01-01", "1970-02-01"])
+    first = pd.DataFrame(
+        {"TX": [1.0, 2.0, 3.0, 4.0], "CA": [5.0, 6.0, 7.0, 8.0]}, index=dates
+    )
+    revised = first.copy()
+    revised.loc["1939-01-01", "CA"] = 9.0
+    revised.loc["1969-12-01", "TX"] = 10.0
+
+    store = VintageStore(str(tmp_path))
+    assert store.record("employment_state", first, "2024-01-05") == 8
+    assert store.record("employment_state", revised, "2024-02-05") == 2
+
+    assert store.as_of("employment_state", "2024-01-31").equals(first)
+    assert store.as_of("employment_state", "2024-02-29").equals(revised)
+    history = store.history("employment_state", "CA", "1939-01-01")
+    assert history.tolist() == [5.0, 9.0]
+    assert list(history.index) == list(pd.to_datetime(["2024-01-05", "2024-02-05"]))
+    assert store.history("employment_state", "TX", "1970-01-01").tolist() == [3.0]